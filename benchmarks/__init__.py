@@ -0,0 +1,21 @@
+"""Benchmarks of the storage layer.
+
+Run `python -m benchmarks run --scale 10k --output baseline.json`, then compare
+later runs with `--baseline baseline.json`. `python -m benchmarks load` drives
+the whole app in-process with concurrent users.
+"""
+
+from .load import LoadReport, run_load
+from .runner import BenchmarkReport, compare_reports, run_scale
+from .seed import SCALES, ScaleSpec, seed_database
+
+__all__ = [
+    "BenchmarkReport",
+    "compare_reports",
+    "LoadReport",
+    "run_load",
+    "run_scale",
+    "SCALES",
+    "ScaleSpec",
+    "seed_database",
+]
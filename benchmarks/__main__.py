@@ -0,0 +1,234 @@
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Text
+
+from rich.console import Console
+from rich.markup import escape
+from rich.table import Table
+
+from .load import ACTIONS, DEFAULT_MIX, LoadReport, run_load
+from .runner import BenchmarkReport, Comparison, compare_reports, run_scale
+from .seed import SCALES, ScaleSpec
+
+console = Console(stderr=True)
+
+
+def print_report(report: BenchmarkReport) -> None:
+    for scale in report.scales:
+        table = Table(
+            title=f"DatabaseMemory @ {scale.scale.name} "
+            + f"(seeded in {scale.seed_seconds:.1f}s)"
+        )
+        table.add_column("Case", no_wrap=True)
+        for column in ("Iterations", "Median µs", "p95 µs", "p99 µs", "ops/s"):
+            table.add_column(column, justify="right")
+        for r in scale.results:
+            table.add_row(
+                escape(r.name),
+                str(r.iterations),
+                f"{r.median_us:.1f}",
+                f"{r.p95_us:.1f}",
+                f"{r.p99_us:.1f}",
+                f"{r.ops_per_second:,.0f}",
+            )
+        console.print(table)
+
+
+def print_comparisons(comparisons: Sequence[Comparison]) -> None:
+    styles = {"regression": "red", "improvement": "green", "ok": ""}
+    table = Table(title="Comparison with baseline")
+    table.add_column("Scale")
+    table.add_column("Case", no_wrap=True)
+    for column in ("Baseline µs", "Current µs", "Change", "Status"):
+        table.add_column(column, justify="right")
+    for c in comparisons:
+        table.add_row(
+            c.scale,
+            escape(c.name),
+            "-" if c.baseline_us is None else f"{c.baseline_us:.1f}",
+            "-" if c.current_us is None else f"{c.current_us:.1f}",
+            "-" if c.change is None else f"{c.change:+.1%}",
+            c.status,
+            style=styles.get(c.status, "yellow"),
+        )
+    console.print(table)
+
+
+def print_load_report(report: LoadReport) -> None:
+    table = Table(
+        title=f"Load @ {report.concurrency} concurrent, {report.users} users "
+        + f"({report.requests} requests in {report.seconds:.1f}s, "
+        + f"{report.throughput_rps:,.0f} req/s)"
+    )
+    table.add_column("Route", no_wrap=True)
+    for column in ("Requests", "Errors", "p50 ms", "p95 ms", "p99 ms", "req/s"):
+        table.add_column(column, justify="right")
+    for r in report.routes:
+        table.add_row(
+            escape(r.route),
+            str(r.requests),
+            str(r.errors),
+            f"{r.p50_ms:.2f}",
+            f"{r.p95_ms:.2f}",
+            f"{r.p99_ms:.2f}",
+            f"{r.throughput_rps:,.0f}",
+            style="red" if r.errors else "",
+        )
+    console.print(table)
+
+
+def parse_mix(values: Optional[Sequence[Text]]) -> Dict[Text, float]:
+    """`--mix me=4 --mix login=0` overrides the weights of the default mix."""
+
+    mix = dict(DEFAULT_MIX)
+    for value in values or []:
+        name, _, weight = value.partition("=")
+        if name not in ACTIONS or not weight:
+            raise SystemExit(
+                f"Invalid --mix {value!r}, use NAME=WEIGHT of {list(ACTIONS)}"
+            )
+        mix[name] = float(weight)
+    return mix
+
+
+def load_report(path: Text) -> BenchmarkReport:
+    return BenchmarkReport.model_validate_json(Path(path).read_text())
+
+
+def check_comparisons(
+    comparisons: Sequence[Comparison], *, baseline: Text, threshold: float
+) -> int:
+    print_comparisons(comparisons)
+    regressions = [c for c in comparisons if c.status == "regression"]
+    if regressions:
+        console.print(
+            f"{len(regressions)} case(s) slower than {baseline} by more than "
+            + f"{threshold:.0%}",
+            style="red",
+        )
+        return 1
+    return 0
+
+
+def parse_args(argv: Optional[List[Text]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Benchmarks of the storage layer and in-process load tests.",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Seed the database and time every case")
+    run.add_argument(
+        "--scale",
+        action="append",
+        help=f"Number of messages, one of {list(SCALES)} or a number "
+        + "(repeatable, default: 10k)",
+    )
+    run.add_argument("--duration", type=float, default=0.2, help="Seconds per case")
+    run.add_argument(
+        "-k", "--select", action="append", help="Only run cases containing this text"
+    )
+    run.add_argument("--seed", type=int, default=0)
+    run.add_argument("-o", "--output", help="Write the JSON report to this file")
+    run.add_argument("--baseline", help="Compare with a saved JSON report")
+    run.add_argument("--threshold", type=float, default=0.2)
+
+    load = commands.add_parser(
+        "load", help="Drive the whole app in-process with concurrent users"
+    )
+    load.add_argument("-c", "--concurrency", type=int, default=16)
+    load.add_argument(
+        "--users", type=int, help="Organization users (default: --concurrency)"
+    )
+    load.add_argument("--duration", type=float, default=10.0, help="Seconds of load")
+    load.add_argument("-n", "--requests", type=int, help="Stop after this many")
+    load.add_argument(
+        "--mix", action="append", help=f"Action weight NAME=WEIGHT, {DEFAULT_MIX}"
+    )
+    load.add_argument("--seed", type=int, default=0)
+    load.add_argument("-o", "--output", help="Write the JSON report to this file")
+
+    compare = commands.add_parser("compare", help="Compare two saved JSON reports")
+    compare.add_argument("baseline")
+    compare.add_argument("current")
+    compare.add_argument("--threshold", type=float, default=0.2)
+    return parser.parse_args(argv)
+
+
+def run_load_command(args: argparse.Namespace) -> int:
+    # Imported here, creating the app configures logging and the database
+    from fastapi_chat.main import create_app
+
+    report = asyncio.run(
+        run_load(
+            create_app(),
+            concurrency=args.concurrency,
+            users=args.users,
+            duration=args.duration,
+            requests=args.requests,
+            mix=parse_mix(args.mix),
+            seed=args.seed,
+        )
+    )
+    print_load_report(report)
+    if args.output:
+        Path(args.output).write_text(report.model_dump_json(indent=2))
+        console.print(f"Wrote {args.output}")
+    else:
+        print(report.model_dump_json(indent=2))
+    return 1 if report.errors else 0
+
+
+def main(argv: Optional[List[Text]] = None) -> int:
+    args = parse_args(argv)
+    if args.command == "compare":
+        return check_comparisons(
+            compare_reports(
+                load_report(args.baseline),
+                load_report(args.current),
+                threshold=args.threshold,
+            ),
+            baseline=args.baseline,
+            threshold=args.threshold,
+        )
+    if args.command == "load":
+        return run_load_command(args)
+
+    report = BenchmarkReport()
+    for name in args.scale or ["10k"]:
+        report.scales.append(
+            asyncio.run(
+                run_scale(
+                    ScaleSpec.from_name(name),
+                    duration=args.duration,
+                    select=args.select,
+                    seed=args.seed,
+                    progress=True,
+                )
+            )
+        )
+    print_report(report)
+    if args.output:
+        Path(args.output).write_text(report.model_dump_json(indent=2))
+        console.print(f"Wrote {args.output}")
+    else:
+        print(report.model_dump_json(indent=2))
+    if args.baseline:
+        return check_comparisons(
+            compare_reports(
+                load_report(args.baseline),
+                report,
+                threshold=args.threshold,
+                # Cases left out with --select are not missing
+                include_missing=not args.select,
+            ),
+            baseline=args.baseline,
+            threshold=args.threshold,
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,447 @@
+import random
+import time
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Text,
+    TypeVar,
+)
+
+from fastapi_chat.db._base import DatabaseBase
+from fastapi_chat.schemas.conversations import ConversationCreate, ConversationUpdate
+from fastapi_chat.schemas.messages import MessageCreate, MessageUpdate
+from fastapi_chat.schemas.organizations import OrganizationCreate, OrganizationUpdate
+from fastapi_chat.schemas.roles import Role
+from fastapi_chat.schemas.users import UserCreate, UserUpdate
+from fastapi_chat.utils.oauth import create_token_model
+
+from .seed import Dataset
+
+T = TypeVar("T")
+
+# Inputs are drawn up front and cycled, so picking them is not measured
+SAMPLE_SIZE = 1000
+
+
+class Case(NamedTuple):
+    """A timed call, `run` gets the iteration number to pick its input.
+
+    `setup` runs untimed before each call with the same number, e.g. to create
+    the record a delete case removes.
+    """
+
+    name: Text
+    run: Callable[[int], Awaitable[Any]]
+    setup: Optional[Callable[[int], Awaitable[Any]]] = None
+
+
+def cycle(values: Sequence[T]) -> Callable[[int], T]:
+    return lambda i: values[i % len(values)]
+
+
+def build_cases(db: DatabaseBase, dataset: Dataset, *, seed: int = 0) -> List[Case]:
+    """Cases for every `DatabaseBase` method, reads first, then writes, then
+    deletes of records created by the benchmark.
+
+    `run` must be called with increasing iteration numbers across a run, the
+    create cases derive unique names from them.
+    """
+
+    rng = random.Random(seed)
+
+    def sample(values: Sequence[T], k: int = SAMPLE_SIZE) -> List[T]:
+        return [rng.choice(values) for _ in range(k)]
+
+    def deep(ids: Sequence[Text], fraction: float = 0.9) -> Text:
+        """Cursor far into a sorted listing, keyset paging should not care."""
+
+        return sorted(ids)[int(len(ids) * fraction)]
+
+    org_id = cycle(sample(dataset.organization_ids))
+    org_ids = cycle(
+        [sample(dataset.organization_ids, 10) for _ in range(SAMPLE_SIZE // 10)]
+    )
+    user_index = cycle(sample(range(len(dataset.user_ids))))
+    user_id = cycle(sample(dataset.user_ids))
+    username = cycle(sample(dataset.usernames))
+    conversation_index = cycle(sample(range(len(dataset.conversation_ids))))
+    message_index = cycle(sample(range(len(dataset.message_ids))))
+    token = cycle(dataset.tokens)
+    revoked_token = cycle(dataset.revoked_tokens)
+    missing_id = "00000000-0000-7000-8000-000000000000"
+    busiest_conversation_id = max(
+        set(dataset.message_conversation_ids[:SAMPLE_SIZE]),
+        key=dataset.message_conversation_ids[:SAMPLE_SIZE].count,
+    )
+    busiest_message_ids = [
+        m
+        for m, c in zip(dataset.message_ids, dataset.message_conversation_ids)
+        if c == busiest_conversation_id
+    ]
+    deep_org_id = deep(dataset.organization_ids, 0.5)
+    deep_user_id = deep(dataset.user_ids)
+    deep_conversation_id = deep(dataset.conversation_ids)
+    deep_message_id = deep(busiest_message_ids, 0.1)
+
+    def user_org_id(i: int) -> Text:
+        return dataset.organization_ids[user_index(i) % len(dataset.organization_ids)]
+
+    def conversation_org_id(i: int) -> Text:
+        return dataset.organization_ids[
+            conversation_index(i) % len(dataset.organization_ids)
+        ]
+
+    def participant(i: int) -> Text:
+        return dataset.participant_ids[conversation_index(i)][0]
+
+    def participants(i: int) -> List[Text]:
+        return dataset.participant_ids[conversation_index(i)][:2]
+
+    cases = [
+        # Organizations
+        Case(
+            "retrieve_organization",
+            lambda i: db.retrieve_organization(org_id(i)),
+        ),
+        Case(
+            "retrieve_organization[missing]",
+            lambda i: db.retrieve_organization(missing_id),
+        ),
+        Case("list_organizations", lambda i: db.list_organizations()),
+        Case(
+            "list_organizations[disabled=any]",
+            lambda i: db.list_organizations(disabled=None),
+        ),
+        Case(
+            "list_organizations[organization_ids]",
+            lambda i: db.list_organizations(organization_ids=org_ids(i)),
+        ),
+        Case(
+            "list_organizations[deep]",
+            lambda i: db.list_organizations(start=deep_org_id),
+        ),
+        # Users
+        Case(
+            "retrieve_user",
+            lambda i: db.retrieve_user(dataset.user_ids[user_index(i)]),
+        ),
+        Case(
+            "retrieve_user[organization_id]",
+            lambda i: db.retrieve_user(
+                dataset.user_ids[user_index(i)], organization_id=user_org_id(i)
+            ),
+        ),
+        Case(
+            "retrieve_user_by_username",
+            lambda i: db.retrieve_user_by_username(username(i)),
+        ),
+        Case("list_users", lambda i: db.list_users()),
+        Case(
+            "list_users[organization_id]",
+            lambda i: db.list_users(organization_id=org_id(i)),
+        ),
+        Case("list_users[role]", lambda i: db.list_users(role=Role.ORG_ADMIN)),
+        Case(
+            "list_users[organization_id,roles,disabled]",
+            lambda i: db.list_users(
+                organization_id=org_id(i),
+                roles=[Role.ORG_ADMIN, Role.ORG_EDITOR],
+                disabled=False,
+            ),
+        ),
+        Case("list_users[deep]", lambda i: db.list_users(start=deep_user_id)),
+        Case(
+            "list_users[deep,desc,limit=100]",
+            lambda i: db.list_users(start=deep_user_id, sort="desc", limit=100),
+        ),
+        # Conversations
+        Case(
+            "retrieve_conversation",
+            lambda i: db.retrieve_conversation(
+                conversation_id=dataset.conversation_ids[conversation_index(i)]
+            ),
+        ),
+        Case("list_conversations", lambda i: db.list_conversations()),
+        Case(
+            "list_conversations[organization_id]",
+            lambda i: db.list_conversations(organization_id=org_id(i)),
+        ),
+        Case(
+            "list_conversations[participant]",
+            lambda i: db.list_conversations(participants=[participant(i)]),
+        ),
+        Case(
+            "list_conversations[participants=2]",
+            lambda i: db.list_conversations(participants=participants(i)),
+        ),
+        Case(
+            "list_conversations[disabled=False]",
+            lambda i: db.list_conversations(disabled=False),
+        ),
+        Case(
+            "list_conversations[deep]",
+            lambda i: db.list_conversations(start=deep_conversation_id),
+        ),
+        # Messages
+        Case(
+            "retrieve_message",
+            lambda i: db.retrieve_message(
+                conversation_id=dataset.message_conversation_ids[message_index(i)],
+                message_id=dataset.message_ids[message_index(i)],
+            ),
+        ),
+        Case(
+            "list_messages",
+            lambda i: db.list_messages(
+                conversation_id=dataset.message_conversation_ids[message_index(i)]
+            ),
+        ),
+        Case(
+            "list_messages[busiest]",
+            lambda i: db.list_messages(conversation_id=busiest_conversation_id),
+        ),
+        Case(
+            "list_messages[busiest,asc,limit=100]",
+            lambda i: db.list_messages(
+                conversation_id=busiest_conversation_id, sort="asc", limit=100
+            ),
+        ),
+        Case(
+            "list_messages[busiest,deep]",
+            lambda i: db.list_messages(
+                conversation_id=busiest_conversation_id, start=deep_message_id
+            ),
+        ),
+        Case(
+            "list_messages[busiest,before]",
+            lambda i: db.list_messages(
+                conversation_id=busiest_conversation_id,
+                sort="asc",
+                before=deep_message_id,
+            ),
+        ),
+        # Tokens
+        Case(
+            "retrieve_cached_token",
+            lambda i: db.retrieve_cached_token(username(i)),
+        ),
+        Case(
+            "retrieve_cached_token_by_token[access]",
+            lambda i: db.retrieve_cached_token_by_token(token(i).access_token),
+        ),
+        Case(
+            "retrieve_cached_token_by_token[refresh]",
+            lambda i: db.retrieve_cached_token_by_token(token(i).refresh_token),
+        ),
+        Case(
+            "is_token_blocked",
+            lambda i: db.is_token_blocked(token(i).access_token),
+        ),
+        Case(
+            "is_token_blocked[revoked]",
+            lambda i: db.is_token_blocked(revoked_token(i).access_token),
+        ),
+        Case("sweep_blacklisted_tokens", lambda i: db.sweep_blacklisted_tokens()),
+    ]
+
+    # Writes add records, they run last so the reads see the seeded dataset
+    new_tokens = [
+        (name, create_token_model({"sub": name}))
+        for name in sample(dataset.usernames, 100)
+    ]
+    # Tokens without a session in this database, as issued by another worker
+    other_worker_tokens = [
+        create_token_model({"sub": name}) for name in sample(dataset.usernames, 100)
+    ]
+    hashed_password = dataset.hashed_password
+    cases += [
+        Case(
+            "create_organization",
+            lambda i: db.create_organization(
+                organization_create=OrganizationCreate(name=f"benchmark-org-{i}"),
+                owner_id=user_id(i),
+            ),
+        ),
+        Case(
+            "update_organization",
+            lambda i: db.update_organization(
+                organization_id=org_id(i),
+                organization_update=OrganizationUpdate(description=f"Updated {i}"),
+            ),
+        ),
+        Case(
+            "create_user",
+            lambda i: db.create_user(
+                user_create=UserCreate(
+                    username=f"benchmark-user-{i}",
+                    email=f"benchmark{i}@example.com",
+                    password="benchmark",
+                    full_name="Benchmark User",
+                ),
+                hashed_password=hashed_password,
+                organization_id=org_id(i),
+            ),
+        ),
+        Case(
+            "create_conversation",
+            lambda i: db.create_conversation(
+                conversation_create=ConversationCreate(
+                    type="one_on_one", participant_ids=participants(i)
+                ),
+                organization_id=conversation_org_id(i),
+            ),
+        ),
+        Case(
+            "update_conversation",
+            lambda i: db.update_conversation(
+                conversation_id=dataset.conversation_ids[conversation_index(i)],
+                conversation_update=ConversationUpdate(name=f"Renamed {i}"),
+            ),
+        ),
+        Case(
+            "create_message",
+            lambda i: db.create_message(
+                conversation_id=dataset.conversation_ids[conversation_index(i)],
+                sender_id=participant(i),
+                message_create=MessageCreate(content="benchmark"),
+            ),
+        ),
+        Case(
+            "update_message",
+            lambda i: db.update_message(
+                conversation_id=dataset.message_conversation_ids[message_index(i)],
+                message_id=dataset.message_ids[message_index(i)],
+                message_update=MessageUpdate(content=f"edited {i}"),
+            ),
+        ),
+        Case(
+            "update_user",
+            lambda i: db.update_user(
+                user_id=user_id(i), user_update=UserUpdate(full_name=f"User {i}")
+            ),
+        ),
+        Case(
+            "caching_token",
+            lambda i: db.caching_token(*new_tokens[i % len(new_tokens)]),
+        ),
+        Case(
+            "delete_message[soft]",
+            lambda i: db.delete_message(
+                conversation_id=dataset.message_conversation_ids[message_index(i)],
+                message_id=dataset.message_ids[message_index(i)],
+            ),
+        ),
+        Case(
+            "invalidate_token",
+            lambda i: db.invalidate_token(new_tokens[i % len(new_tokens)][1]),
+        ),
+        Case(
+            "revoke_token",
+            lambda i: db.revoke_token(
+                other_worker_tokens[i % len(other_worker_tokens)].access_token,
+                session_id=f"benchmark-session-{i % len(other_worker_tokens)}",
+            ),
+        ),
+        Case(
+            "blacklist_token_digest",
+            lambda i: db.blacklist_token_digest(
+                f"{i:064x}", expires_at=int(time.time()) + 3600
+            ),
+        ),
+    ]
+
+    # Deletes remove a record their untimed setup created, keeping the seeded
+    # dataset and the cases above intact
+    created: Dict[int, Text] = {}
+
+    async def create_organization(i: int) -> None:
+        org = await db.create_organization(
+            organization_create=OrganizationCreate(name=f"benchmark-deleted-org-{i}"),
+            owner_id=user_id(i),
+        )
+        assert org is not None
+        created[i] = org.id
+
+    async def create_user(i: int) -> None:
+        user = await db.create_user(
+            user_create=UserCreate(
+                username=f"benchmark-deleted-user-{i}",
+                email=f"benchmark-deleted{i}@example.com",
+                password="benchmark",
+                full_name="Benchmark User",
+            ),
+            hashed_password=hashed_password,
+            organization_id=org_id(i),
+        )
+        assert user is not None
+        created[i] = user.id
+
+    async def create_conversation(i: int) -> None:
+        conversation = await db.create_conversation(
+            conversation_create=ConversationCreate(
+                type="one_on_one", participant_ids=participants(i)
+            ),
+            organization_id=conversation_org_id(i),
+        )
+        created[i] = conversation.id
+
+    async def create_message(i: int) -> None:
+        message = await db.create_message(
+            conversation_id=dataset.conversation_ids[conversation_index(i)],
+            sender_id=participant(i),
+            message_create=MessageCreate(content="benchmark"),
+        )
+        created[i] = message.id
+
+    cases += [
+        Case(
+            "delete_organization[soft]",
+            lambda i: db.delete_organization(organization_id=created.pop(i)),
+            setup=create_organization,
+        ),
+        Case(
+            "delete_organization[hard]",
+            lambda i: db.delete_organization(
+                organization_id=created.pop(i), soft_delete=False
+            ),
+            setup=create_organization,
+        ),
+        Case(
+            "delete_user[soft]",
+            lambda i: db.delete_user(created.pop(i)),
+            setup=create_user,
+        ),
+        Case(
+            "delete_user[hard]",
+            lambda i: db.delete_user(created.pop(i), soft_delete=False),
+            setup=create_user,
+        ),
+        Case(
+            "delete_conversation[soft]",
+            lambda i: db.delete_conversation(conversation_id=created.pop(i)),
+            setup=create_conversation,
+        ),
+        Case(
+            "delete_conversation[hard]",
+            lambda i: db.delete_conversation(
+                conversation_id=created.pop(i), soft_delete=False
+            ),
+            setup=create_conversation,
+        ),
+        Case(
+            "delete_message[hard]",
+            lambda i: db.delete_message(
+                conversation_id=dataset.conversation_ids[conversation_index(i)],
+                message_id=created.pop(i),
+                soft_delete=False,
+            ),
+            setup=create_message,
+        ),
+    ]
+    return cases
@@ -0,0 +1,362 @@
+import asyncio
+import platform
+import random
+import statistics
+import sys
+import time
+from contextlib import asynccontextmanager
+from datetime import UTC, datetime
+from typing import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Text,
+    Tuple,
+)
+
+import httpx
+from fastapi import FastAPI
+from pydantic import BaseModel, Field
+
+from fastapi_chat.schemas.roles import Role
+
+ADMIN_USERNAME = "admin"
+ADMIN_PASSWORD = "pass1234"
+USER_PASSWORD = "load-test-password"
+
+# Relative weights of the actions in the default traffic mix
+DEFAULT_MIX: Dict[Text, float] = {
+    "login": 1,
+    "me": 4,
+    "list_users": 2,
+    "my_conversations": 3,
+    "post_message": 3,
+    "refresh": 1,
+}
+
+
+class VirtualUser(BaseModel):
+    username: Text
+    role: Role
+    user_id: Text = ""
+    access_token: Text = ""
+    refresh_token: Text = ""
+    conversation_ids: List[Text] = Field(default_factory=list)
+
+    def headers(self) -> Dict[Text, Text]:
+        return {"Authorization": f"Bearer {self.access_token}"}
+
+
+class LoadContext(NamedTuple):
+    client: httpx.AsyncClient
+    org_id: Text
+
+
+class Action(NamedTuple):
+    """A request of the mix, `route` is the template latencies are grouped by."""
+
+    route: Text
+    roles: Sequence[Role]
+    send: Callable[[LoadContext, VirtualUser, int], Awaitable[httpx.Response]]
+
+
+def _set_tokens(user: VirtualUser, response: httpx.Response) -> None:
+    if response.status_code == 200:
+        data = response.json()
+        user.access_token = data["access_token"]
+        user.refresh_token = data["refresh_token"]
+
+
+async def send_login(ctx: LoadContext, user: VirtualUser, i: int) -> httpx.Response:
+    response = await ctx.client.post(
+        "/auth/login", data={"username": user.username, "password": USER_PASSWORD}
+    )
+    _set_tokens(user, response)
+    return response
+
+
+async def send_refresh(ctx: LoadContext, user: VirtualUser, i: int) -> httpx.Response:
+    response = await ctx.client.post(
+        "/auth/refresh-token",
+        json={"grant_type": "refresh_token", "refresh_token": user.refresh_token},
+    )
+    _set_tokens(user, response)
+    return response
+
+
+async def send_me(ctx: LoadContext, user: VirtualUser, i: int) -> httpx.Response:
+    return await ctx.client.get("/me", headers=user.headers())
+
+
+async def send_list_users(
+    ctx: LoadContext, user: VirtualUser, i: int
+) -> httpx.Response:
+    return await ctx.client.get(
+        f"/organizations/{ctx.org_id}/users", headers=user.headers()
+    )
+
+
+async def send_my_conversations(
+    ctx: LoadContext, user: VirtualUser, i: int
+) -> httpx.Response:
+    return await ctx.client.get(
+        f"/organizations/{ctx.org_id}/conversations/me", headers=user.headers()
+    )
+
+
+async def send_post_message(
+    ctx: LoadContext, user: VirtualUser, i: int
+) -> httpx.Response:
+    conversation_id = user.conversation_ids[i % len(user.conversation_ids)]
+    return await ctx.client.post(
+        f"/organizations/{ctx.org_id}/conversations/{conversation_id}/messages",
+        json={"content": f"Load test message {i}"},
+        headers=user.headers(),
+    )
+
+
+ORG_ROLES = (Role.ORG_ADMIN, Role.ORG_CLIENT)
+
+ACTIONS: Dict[Text, Action] = {
+    "login": Action("POST /auth/login", ORG_ROLES, send_login),
+    "me": Action("GET /me", ORG_ROLES, send_me),
+    "list_users": Action(
+        "GET /organizations/{org_id}/users", (Role.ORG_ADMIN,), send_list_users
+    ),
+    "my_conversations": Action(
+        "GET /organizations/{org_id}/conversations/me",
+        ORG_ROLES,
+        send_my_conversations,
+    ),
+    "post_message": Action(
+        "POST /organizations/{org_id}/conversations/{conversation_id}/messages",
+        ORG_ROLES,
+        send_post_message,
+    ),
+    "refresh": Action("POST /auth/refresh-token", ORG_ROLES, send_refresh),
+}
+
+
+class RouteResult(BaseModel):
+    route: Text
+    requests: int
+    errors: int
+    statuses: Dict[Text, int]
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    mean_ms: float
+    max_ms: float
+    throughput_rps: float
+
+
+class LoadReport(BaseModel):
+    """A load run, the JSON document written by `--output`."""
+
+    created_at: Text = Field(
+        default_factory=lambda: datetime.now(UTC).isoformat(timespec="seconds")
+    )
+    python: Text = Field(default_factory=lambda: sys.version.split()[0])
+    platform: Text = Field(default_factory=platform.platform)
+    concurrency: int
+    users: int
+    mix: Dict[Text, float]
+    seconds: float
+    requests: int
+    errors: int
+    throughput_rps: float
+    routes: List[RouteResult]
+
+
+class Recorder:
+    """Latencies and statuses of the requests, grouped by route template."""
+
+    def __init__(self):
+        self.latencies: Dict[Text, List[int]] = {}
+        self.statuses: Dict[Text, Dict[Text, int]] = {}
+
+    def record(self, route: Text, status_code: int, elapsed_ns: int) -> None:
+        self.latencies.setdefault(route, []).append(elapsed_ns)
+        statuses = self.statuses.setdefault(route, {})
+        statuses[str(status_code)] = statuses.get(str(status_code), 0) + 1
+
+    def results(self, seconds: float) -> List[RouteResult]:
+        results = []
+        for route, samples in self.latencies.items():
+            samples_ms = sorted(s / 1e6 for s in samples)
+            count = len(samples_ms)
+            statuses = self.statuses[route]
+            results.append(
+                RouteResult(
+                    route=route,
+                    requests=count,
+                    errors=sum(n for s, n in statuses.items() if int(s) >= 400),
+                    statuses=statuses,
+                    p50_ms=statistics.median(samples_ms),
+                    p95_ms=samples_ms[min(int(count * 0.95), count - 1)],
+                    p99_ms=samples_ms[min(int(count * 0.99), count - 1)],
+                    mean_ms=statistics.fmean(samples_ms),
+                    max_ms=samples_ms[-1],
+                    throughput_rps=count / seconds if seconds else 0.0,
+                )
+            )
+        return sorted(results, key=lambda r: r.route)
+
+
+@asynccontextmanager
+async def app_client(app: FastAPI) -> AsyncIterator[httpx.AsyncClient]:
+    """Client calling the app in-process, the ASGI transport skips the lifespan
+    so it is entered here."""
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://load-test"
+        ) as client:
+            yield client
+
+
+async def setup_users(
+    client: httpx.AsyncClient, *, users: int, seed: int = 0
+) -> Tuple[Text, List[VirtualUser]]:
+    """Create an organization, its users and their one-on-one conversations.
+
+    Every fourth user is an organization admin, the others are clients. Each
+    user talks with its two neighbours.
+    """
+
+    response = await client.post(
+        "/auth/login", data={"username": ADMIN_USERNAME, "password": ADMIN_PASSWORD}
+    )
+    response.raise_for_status()
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    response = await client.post(
+        "/organizations", json={"name": f"Load test {seed}"}, headers=headers
+    )
+    response.raise_for_status()
+    org_id = response.json()["id"]
+
+    virtual_users: List[VirtualUser] = []
+    for i in range(users):
+        user = VirtualUser(
+            username=f"load-user-{seed}-{i}",
+            role=Role.ORG_ADMIN if i % 4 == 0 else Role.ORG_CLIENT,
+        )
+        response = await client.post(
+            f"/organizations/{org_id}/users",
+            json={
+                "username": user.username,
+                "email": f"load-user-{seed}-{i}@example.com",
+                "password": USER_PASSWORD,
+                "full_name": f"Load User {i}",
+                "role": user.role.value,
+            },
+            headers=headers,
+        )
+        response.raise_for_status()
+        user.user_id = response.json()["id"]
+        virtual_users.append(user)
+
+    for i, user in enumerate(virtual_users):
+        other = virtual_users[(i + 1) % len(virtual_users)]
+        response = await client.post(
+            f"/organizations/{org_id}/conversations",
+            json={
+                "type": "one_on_one",
+                "participant_ids": [user.user_id, other.user_id],
+            },
+            headers=headers,
+        )
+        response.raise_for_status()
+        user.conversation_ids.append(response.json()["id"])
+        other.conversation_ids.append(response.json()["id"])
+    return org_id, virtual_users
+
+
+async def run_virtual_user(
+    ctx: LoadContext,
+    user: VirtualUser,
+    *,
+    mix: Dict[Text, float],
+    recorder: Recorder,
+    deadline: float,
+    budget: List[int],
+    rng: random.Random,
+) -> None:
+    names = [n for n in mix if user.role in ACTIONS[n].roles and mix[n] > 0]
+    weights = [mix[n] for n in names]
+    actions = [ACTIONS[n] for n in names]
+    i = 0
+    while time.perf_counter() < deadline and budget[0] > 0:
+        budget[0] -= 1
+        action = rng.choices(actions, weights)[0]
+        started = time.perf_counter_ns()
+        response = await action.send(ctx, user, i)
+        recorder.record(
+            action.route, response.status_code, time.perf_counter_ns() - started
+        )
+        i += 1
+
+
+async def run_load(
+    app: FastAPI,
+    *,
+    concurrency: int = 16,
+    users: Optional[int] = None,
+    duration: float = 10.0,
+    requests: Optional[int] = None,
+    mix: Optional[Dict[Text, float]] = None,
+    seed: int = 0,
+) -> LoadReport:
+    """Drive the app with `concurrency` virtual users until the duration or the
+    request budget runs out."""
+
+    mix = dict(DEFAULT_MIX if mix is None else mix)
+    unknown = set(mix) - set(ACTIONS)
+    if unknown:
+        raise ValueError(f"Unknown actions {sorted(unknown)}, use {list(ACTIONS)}")
+    users = max(users or concurrency, 2)
+    recorder = Recorder()
+    async with app_client(app) as client:
+        org_id, virtual_users = await setup_users(client, users=users, seed=seed)
+        ctx = LoadContext(client=client, org_id=org_id)
+        # Sessions start before the clock, the mix still includes logins
+        for user in virtual_users:
+            (await send_login(ctx, user, 0)).raise_for_status()
+
+        budget = [requests if requests is not None else sys.maxsize]
+        started = time.perf_counter()
+        deadline = started + duration
+        await asyncio.gather(
+            *(
+                run_virtual_user(
+                    ctx,
+                    virtual_users[n % users],
+                    mix=mix,
+                    recorder=recorder,
+                    deadline=deadline,
+                    budget=budget,
+                    rng=random.Random(seed + n),
+                )
+                for n in range(concurrency)
+            )
+        )
+        seconds = time.perf_counter() - started
+
+    routes = recorder.results(seconds)
+    total = sum(r.requests for r in routes)
+    return LoadReport(
+        concurrency=concurrency,
+        users=users,
+        mix=mix,
+        seconds=seconds,
+        requests=total,
+        errors=sum(r.errors for r in routes),
+        throughput_rps=total / seconds if seconds else 0.0,
+        routes=routes,
+    )
@@ -0,0 +1,185 @@
+import platform
+import statistics
+import sys
+import time
+from datetime import UTC, datetime
+from typing import Dict, List, Literal, Optional, Sequence, Text, Tuple
+
+from pydantic import BaseModel, Field
+
+from fastapi_chat.db._memory import DatabaseMemory
+
+from .cases import Case, build_cases
+from .seed import ScaleSpec, seed_database
+
+Metric = Literal["min_us", "median_us", "mean_us", "p95_us", "p99_us"]
+
+
+class CaseResult(BaseModel):
+    name: Text
+    iterations: int
+    min_us: float
+    median_us: float
+    mean_us: float
+    p95_us: float
+    p99_us: float
+    ops_per_second: float
+
+
+class ScaleReport(BaseModel):
+    scale: ScaleSpec
+    seed_seconds: float
+    results: List[CaseResult]
+
+
+class BenchmarkReport(BaseModel):
+    """A benchmark run, the JSON document written by `--output`."""
+
+    created_at: Text = Field(
+        default_factory=lambda: datetime.now(UTC).isoformat(timespec="seconds")
+    )
+    python: Text = Field(default_factory=lambda: sys.version.split()[0])
+    platform: Text = Field(default_factory=platform.platform)
+    database: Text = "DatabaseMemory"
+    scales: List[ScaleReport] = Field(default_factory=list)
+
+    def results_by_key(self) -> Dict[Tuple[Text, Text], CaseResult]:
+        return {
+            (report.scale.name, result.name): result
+            for report in self.scales
+            for result in report.results
+        }
+
+
+class Comparison(BaseModel):
+    scale: Text
+    name: Text
+    baseline_us: Optional[float]
+    current_us: Optional[float]
+    change: Optional[float] = Field(
+        default=None, description="Relative change, 0.1 is 10% slower"
+    )
+    status: Literal["ok", "regression", "improvement", "new", "missing"]
+
+
+def summarize(name: Text, samples_ns: Sequence[int]) -> CaseResult:
+    samples_us = sorted(s / 1000 for s in samples_ns)
+    count = len(samples_us)
+    mean_us = statistics.fmean(samples_us)
+    return CaseResult(
+        name=name,
+        iterations=count,
+        min_us=samples_us[0],
+        median_us=statistics.median(samples_us),
+        mean_us=mean_us,
+        p95_us=samples_us[min(int(count * 0.95), count - 1)],
+        p99_us=samples_us[min(int(count * 0.99), count - 1)],
+        ops_per_second=1e6 / mean_us if mean_us else 0.0,
+    )
+
+
+async def measure(
+    case: Case,
+    *,
+    iteration: int = 0,
+    duration: float = 0.2,
+    min_iterations: int = 20,
+    max_iterations: int = 10_000,
+    warmup: int = 5,
+) -> Tuple[CaseResult, int]:
+    """Time single calls for about `duration` seconds.
+
+    Returns the result and the next iteration number, cases get increasing
+    numbers over a whole run.
+    """
+
+    for _ in range(warmup):
+        if case.setup is not None:
+            await case.setup(iteration)
+        await case.run(iteration)
+        iteration += 1
+    samples: List[int] = []
+    deadline = time.perf_counter() + duration
+    while len(samples) < max_iterations and (
+        len(samples) < min_iterations or time.perf_counter() < deadline
+    ):
+        if case.setup is not None:
+            await case.setup(iteration)
+        started = time.perf_counter_ns()
+        await case.run(iteration)
+        samples.append(time.perf_counter_ns() - started)
+        iteration += 1
+    return summarize(case.name, samples), iteration
+
+
+async def run_scale(
+    spec: ScaleSpec,
+    *,
+    duration: float = 0.2,
+    select: Optional[Sequence[Text]] = None,
+    seed: int = 0,
+    progress: bool = False,
+) -> ScaleReport:
+    """Seed a fresh `DatabaseMemory` at the given scale and time every case."""
+
+    db = DatabaseMemory()
+    dataset = await seed_database(db, spec, seed=seed)
+    if progress:
+        print(f"Seeded {spec.name} in {dataset.seconds:.1f}s", file=sys.stderr)
+    results = []
+    iteration = 0
+    for case in build_cases(db, dataset, seed=seed):
+        if select and not any(s in case.name for s in select):
+            continue
+        result, iteration = await measure(case, iteration=iteration, duration=duration)
+        results.append(result)
+        if progress:
+            print(f"  {result.name}: {result.median_us:.1f}us", file=sys.stderr)
+    return ScaleReport(scale=spec, seed_seconds=dataset.seconds, results=results)
+
+
+def compare_reports(
+    baseline: BenchmarkReport,
+    current: BenchmarkReport,
+    *,
+    threshold: float = 0.2,
+    metric: Metric = "median_us",
+    include_missing: bool = True,
+) -> List[Comparison]:
+    """Compare two runs case by case, a change beyond `threshold` is reported."""
+
+    baseline_results = baseline.results_by_key()
+    current_results = current.results_by_key()
+    keys = list(current_results)
+    if include_missing:
+        keys += [k for k in baseline_results if k not in current_results]
+    comparisons: List[Comparison] = []
+    for key in keys:
+        before = baseline_results.get(key)
+        after = current_results.get(key)
+        baseline_us = getattr(before, metric) if before else None
+        current_us = getattr(after, metric) if after else None
+        change = None
+        if baseline_us is None:
+            status = "new"
+        elif current_us is None:
+            status = "missing"
+        else:
+            change = (current_us - baseline_us) / baseline_us if baseline_us else 0.0
+            if change > threshold:
+                status = "regression"
+            elif change < -threshold:
+                status = "improvement"
+            else:
+                status = "ok"
+        comparisons.append(
+            Comparison(
+                scale=key[0],
+                name=key[1],
+                baseline_us=baseline_us,
+                current_us=current_us,
+                change=change,
+                status=status,
+            )
+        )
+    return comparisons
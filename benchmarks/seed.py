@@ -0,0 +1,159 @@
+import random
+import time
+from typing import Dict, List, Optional, Text
+
+from faker import Faker
+from pydantic import BaseModel, Field
+
+from fastapi_chat.db._memory import DatabaseMemory
+from fastapi_chat.schemas.conversations import ConversationCreate
+from fastapi_chat.schemas.messages import MessageCreate
+from fastapi_chat.schemas.oauth import Token
+from fastapi_chat.schemas.organizations import OrganizationCreate
+from fastapi_chat.schemas.roles import Role
+from fastapi_chat.schemas.users import UserCreate
+from fastapi_chat.utils.oauth import create_token_model, get_password_hash
+
+SCALES: Dict[Text, int] = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+ORG_ROLES = (Role.ORG_ADMIN, Role.ORG_EDITOR, Role.ORG_VIEWER, Role.ORG_CLIENT)
+
+
+class ScaleSpec(BaseModel):
+    """Record counts of a dataset, derived from its number of messages."""
+
+    name: Text
+    messages: int
+    organizations: int
+    users: int
+    conversations: int
+    sessions: int
+    revoked_sessions: int
+
+    @classmethod
+    def from_name(cls, name: Text) -> "ScaleSpec":
+        """Build a spec from a named scale ('10k', '100k', '1m') or a count."""
+
+        messages = SCALES.get(name.lower())
+        if messages is None:
+            try:
+                messages = int(name.replace("_", ""))
+            except ValueError:
+                raise ValueError(
+                    f"Unknown scale '{name}', use one of {list(SCALES)} or a number"
+                )
+        return cls(
+            name=name,
+            messages=messages,
+            organizations=max(messages // 1000, 2),
+            users=max(messages // 10, 10),
+            conversations=max(messages // 20, 5),
+            sessions=max(messages // 100, 5),
+            revoked_sessions=max(messages // 1000, 2),
+        )
+
+
+class Dataset(BaseModel):
+    """IDs of the seeded records, the benchmark cases pick their inputs here."""
+
+    spec: ScaleSpec
+    organization_ids: List[Text] = Field(default_factory=list)
+    user_ids: List[Text] = Field(default_factory=list)
+    usernames: List[Text] = Field(default_factory=list)
+    conversation_ids: List[Text] = Field(default_factory=list)
+    participant_ids: List[List[Text]] = Field(default_factory=list)
+    message_ids: List[Text] = Field(default_factory=list)
+    message_conversation_ids: List[Text] = Field(default_factory=list)
+    tokens: List[Token] = Field(default_factory=list)
+    revoked_tokens: List[Token] = Field(default_factory=list)
+    hashed_password: Text = ""
+    seconds: float = 0.0
+
+
+async def seed_database(
+    db: DatabaseMemory, spec: ScaleSpec, *, seed: Optional[int] = 0
+) -> Dataset:
+    """Fill the database through its public methods, so every index is built.
+
+    Faker generates the organizations and users; messages reuse a pool of
+    sentences, generating a million of them would dominate the seeding time.
+    """
+
+    started = time.perf_counter()
+    rng = random.Random(seed)
+    fake = Faker()
+    Faker.seed(seed)
+    # Hashing is not what the benchmarks measure, one hash serves every user
+    hashed_password = get_password_hash("benchmark")
+    dataset = Dataset(spec=spec, hashed_password=hashed_password)
+
+    for _ in range(spec.organizations):
+        org = await db.create_organization(
+            organization_create=OrganizationCreate(name=fake.company()),
+            owner_id=DatabaseMemory.fake_super_admin_init["admin"]["id"],
+        )
+        assert org is not None
+        dataset.organization_ids.append(org.id)
+
+    user_ids_by_org: Dict[Text, List[Text]] = {}
+    for i in range(spec.users):
+        organization_id = dataset.organization_ids[i % spec.organizations]
+        user = await db.create_user(
+            user_create=UserCreate(
+                username=f"{fake.user_name()}{i}",
+                email=f"user{i}@example.com",
+                password="benchmark",
+                full_name=fake.name(),
+                role=rng.choice(ORG_ROLES),
+                disabled=rng.random() < 0.05,
+            ),
+            hashed_password=hashed_password,
+            organization_id=organization_id,
+        )
+        assert user is not None
+        dataset.user_ids.append(user.id)
+        dataset.usernames.append(user.username)
+        user_ids_by_org.setdefault(organization_id, []).append(user.id)
+
+    for i in range(spec.conversations):
+        organization_id = dataset.organization_ids[i % spec.organizations]
+        members = user_ids_by_org[organization_id]
+        group = rng.random() < 0.2
+        participant_ids = rng.sample(
+            members, min(len(members), rng.randint(3, 8) if group else 2)
+        )
+        conversation = await db.create_conversation(
+            conversation_create=ConversationCreate(
+                type="group" if group else "one_on_one",
+                name=fake.catch_phrase() if group else None,
+                participant_ids=participant_ids,
+            ),
+            organization_id=organization_id,
+        )
+        dataset.conversation_ids.append(conversation.id)
+        dataset.participant_ids.append(participant_ids)
+
+    sentences = [fake.sentence() for _ in range(1000)]
+    for i in range(spec.messages):
+        # Skewed towards a few busy conversations, like real traffic
+        c = int(spec.conversations * rng.random() ** 3)
+        message = await db.create_message(
+            conversation_id=dataset.conversation_ids[c],
+            sender_id=rng.choice(dataset.participant_ids[c]),
+            message_create=MessageCreate(content=sentences[i % len(sentences)]),
+        )
+        dataset.message_ids.append(message.id)
+        dataset.message_conversation_ids.append(message.conversation_id)
+
+    for i in range(spec.sessions + spec.revoked_sessions):
+        username = dataset.usernames[i % spec.users]
+        token = create_token_model({"sub": username})
+        await db.caching_token(username, token)
+        if i < spec.sessions:
+            dataset.tokens.append(token)
+        else:
+            await db.invalidate_token(token)
+            dataset.revoked_tokens.append(token)
+
+    dataset.seconds = time.perf_counter() - started
+    return dataset
@@ -1,11 +1,12 @@
 from fastapi import APIRouter
 
 from .auth import router as auth_router
-
-# from .conversations import router as conversations_router
+from .messages import router as messages_router
+from .org_conversations import router as conversations_router
 from .org_users import router as users_router
 from .organizations import router as organizations_router
 from .platform import router as platform_router
+from .realtime import router as realtime_router
 
 router = APIRouter()
 
@@ -13,6 +14,6 @@ router.include_router(auth_router, tags=["auth"])
 router.include_router(platform_router, tags=["platform"])
 router.include_router(organizations_router, tags=["organizations"])
 router.include_router(users_router, tags=["organizations.users"])
-# router.include_router(
-#     conversations_router, prefix="/conversations", tags=["conversations"]
-# )
+router.include_router(conversations_router, tags=["organizations.conversations"])
+router.include_router(messages_router, tags=["organizations.conversations.messages"])
+router.include_router(realtime_router, tags=["realtime"])
@@ -8,7 +8,12 @@ from pydantic import BaseModel
 
 from ..config import logger, settings
 from ..db._base import DatabaseBase
-from ..db.tokens import caching_token, invalidate_token, retrieve_cached_token
+from ..db.tokens import (
+    caching_token,
+    invalidate_token,
+    retrieve_cached_token_by_token,
+    revoke_token,
+)
 from ..deps.db import depend_db
 from ..deps.oauth import (
     TokenPayloadDepends,
@@ -20,12 +25,7 @@ from ..deps.oauth import (
     depends_token_payload,
 )
 from ..schemas.oauth import RefreshTokenRequest, Token
-from ..utils.oauth import (
-    authenticate_user,
-    create_token_model,
-    is_token_expired,
-    validate_client,
-)
+from ..utils.oauth import authenticate_user, create_token_model, validate_client
 
 router = APIRouter()
 
@@ -46,19 +46,13 @@ async def api_login(
     # Authenticate the user with the given username and password.
     user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
-        logger.debug(f"User '{form_data.username}' failed to authenticate")
+        logger.debug("User '%s' failed to authenticate", form_data.username)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    # Return if token active
-    token = await retrieve_cached_token(db, username=user.username)
-    if token is not None and is_token_expired(token.access_token) is False:
-        logger.debug(f"User '{form_data.username}' already has a token")
-        return token
-
     # Create an access token for the authenticated user.
     token = create_token_model(
         data={
@@ -100,11 +94,14 @@ async def api_logout(
     if not isinstance(username, Text):
         raise credentials_exception
 
-    token = await retrieve_cached_token(db, username=username)
+    token = await retrieve_cached_token_by_token(db, token=token_payload.token)
 
-    # Logout user and invalidate the token.
+    # Logout the session and invalidate the token.
     if token is not None:
         await invalidate_token(db, token=token)
+    else:
+        # Issued by another worker, revoke the token and its session
+        await revoke_token(db, token=token_payload.token, session_id=payload.get("sid"))
 
     # Return a response.
     return JSONResponse(
@@ -151,10 +148,16 @@ async def api_refresh_token(
     )
     user = token_payload_user.user
 
-    # Logout user and invalidate the token.
-    token_old = await retrieve_cached_token(db, username=user.username)
+    # Logout the refreshed session and invalidate the token.
+    token_old = await retrieve_cached_token_by_token(db, token=form_data.refresh_token)
     if token_old is not None:
         await invalidate_token(db, token=token_old)
+    else:
+        await revoke_token(
+            db,
+            token=form_data.refresh_token,
+            session_id=token_payload.payload.get("sid"),
+        )
 
     # Create a new access token for the user
     token = create_token_model(
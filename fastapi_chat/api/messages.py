@@ -1,122 +1,271 @@
-from typing import Literal, Optional, Text
+from typing import Annotated, Literal, Optional, Text
 
-from fastapi import APIRouter, Body, Depends, HTTPException, Path, Query, Response
+from fastapi import APIRouter, Body, Depends, HTTPException
+from fastapi import Path as QueryPath
+from fastapi import Query, Response, status
 
-from fastapi_chat.db.messages import (
+from ..db._base import DatabaseBase
+from ..db.conversations import retrieve_conversation
+from ..db.messages import (
     create_message,
     delete_message,
     list_messages,
     retrieve_message,
     update_message,
 )
-from fastapi_chat.deps.oauth import RoleChecker
-from fastapi_chat.schemas.messages import Message, MessageCreate, MessageUpdate
-from fastapi_chat.schemas.oauth import Role
-from fastapi_chat.schemas.pagination import Pagination
+from ..deps.db import depend_db
+from ..deps.oauth import DependsUserPermissions, TokenOrgDepends
+from ..realtime import hub
+from ..schemas.conversations import ConversationInDB
+from ..schemas.messages import Message, MessageCreate, MessageInDB, MessageUpdate
+from ..schemas.pagination import Pagination
+from ..schemas.permissions import Permission
+from ..schemas.role_per_definitions import get_role_permissions
 
 router = APIRouter()
 
 
-@router.get(
-    "/conversations/{conversation_id}/messages",
-    dependencies=[Depends(RoleChecker([Role.ADMIN, Role.EDITOR]))],
-    response_model=Pagination[Message],
-)
+def is_moderator(token_payload_org: TokenOrgDepends, permission: Permission) -> bool:
+    """Whether the user may act on content of conversations it is not part of."""
+
+    user_permissions = get_role_permissions(token_payload_org.user.role)
+    return (
+        user_permissions.manage_all_resources is True
+        or user_permissions.is_permission_granted([permission]) is True
+    )
+
+
+async def retrieve_member_conversation(
+    db: DatabaseBase,
+    *,
+    token_payload_org: TokenOrgDepends,
+    conversation_id: Text,
+    moderator_permission: Optional[Permission] = None,
+) -> ConversationInDB:
+    conversation = await retrieve_conversation(db, conversation_id=conversation_id)
+    if (
+        conversation is None
+        or conversation.organization_id != token_payload_org.organization.id
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Conversation not found"
+        )
+    user_id = token_payload_org.user.id
+    if any(p.user_id == user_id for p in conversation.participants):
+        return conversation
+    if moderator_permission is not None and is_moderator(
+        token_payload_org, moderator_permission
+    ):
+        return conversation
+    raise HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN, detail="Not a conversation participant"
+    )
+
+
+async def retrieve_owned_message(
+    db: DatabaseBase,
+    *,
+    token_payload_org: TokenOrgDepends,
+    conversation_id: Text,
+    message_id: Text,
+    moderator_permission: Permission,
+) -> MessageInDB:
+    message = await retrieve_message(
+        db, conversation_id=conversation_id, message_id=message_id
+    )
+    if message is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Message not found"
+        )
+    if message.sender_id != token_payload_org.user.id and not is_moderator(
+        token_payload_org, moderator_permission
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient permissions"
+        )
+    return message
+
+
+@router.get("/organizations/{org_id}/conversations/{conversation_id}/messages")
 async def api_list_messages(
-    conversation_id: Text = Path(..., description="ID of the conversation"),
-    sort: Literal["asc", "desc", 1, -1] = Query("desc", description="Sort order"),
-    start: Optional[Text] = Query(
-        None, description="Starting message ID for pagination"
+    conversation_id: Annotated[Text, QueryPath(...)],
+    sort: Literal["asc", "desc"] = Query(default="desc"),
+    start: Optional[Text] = Query(default=None),
+    before: Optional[Text] = Query(default=None),
+    limit: Optional[int] = Query(default=20, ge=1, le=100),
+    token_payload_org: TokenOrgDepends = Depends(
+        DependsUserPermissions(
+            [Permission.ORG_CLIENT_USE_ORG_CONTENT], "depends_org_managing"
+        )
     ),
-    before: Optional[Text] = Query(None, description="End message ID for pagination"),
-    limit: int = Query(20, ge=1, le=100, description="Number of messages to return"),
+    db: DatabaseBase = Depends(depend_db),
 ) -> Pagination[Message]:
-    """Retrieve messages for a specific conversation."""
+    """List messages of a conversation, the latest first by default."""
 
+    await retrieve_member_conversation(
+        db,
+        token_payload_org=token_payload_org,
+        conversation_id=conversation_id,
+        moderator_permission=Permission.READ_ORG_CONTENT,
+    )
     return Pagination[Message].model_validate(
-        list_messages(
-            conversation_id=conversation_id,
-            sort=sort,
-            start=start,
-            before=before,
-            limit=limit,
+        (
+            await list_messages(
+                db,
+                conversation_id=conversation_id,
+                sort=sort,
+                start=start,
+                before=before,
+                limit=limit,
+            )
         ).model_dump()
     )
 
 
 @router.post(
-    "/conversations/{conversation_id}/messages",
-    dependencies=[Depends(RoleChecker([Role.ADMIN, Role.EDITOR]))],
-    response_model=Message,
-    status_code=201,
+    "/organizations/{org_id}/conversations/{conversation_id}/messages",
+    status_code=status.HTTP_201_CREATED,
 )
 async def api_create_message(
-    conversation_id: Text = Path(..., description="ID of the conversation"),
+    conversation_id: Annotated[Text, QueryPath(...)],
     message_create: MessageCreate = Body(...),
+    token_payload_org: TokenOrgDepends = Depends(
+        DependsUserPermissions(
+            [Permission.ORG_CLIENT_USE_ORG_CONTENT], "depends_org_managing"
+        )
+    ),
+    db: DatabaseBase = Depends(depend_db),
 ) -> Message:
-    """Create a new message in a conversation."""
+    """Send a new message to a conversation."""
 
-    message = message_create.to_message()
-    created_message = create_message(conversation_id=conversation_id, message=message)
-    if created_message is None:
-        raise HTTPException(status_code=400, detail="Failed to create message")
-    return created_message
+    conversation = await retrieve_member_conversation(
+        db, token_payload_org=token_payload_org, conversation_id=conversation_id
+    )
+    if conversation.disabled:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive conversation"
+        )
+    message = await create_message(
+        db,
+        conversation_id=conversation_id,
+        sender_id=token_payload_org.user.id,
+        message_create=message_create,
+    )
+    hub.publish_to_conversation(
+        conversation, "message.created", message, event_id=message.id
+    )
+    return message
 
 
 @router.get(
-    "/conversations/{conversation_id}/messages/{message_id}",
-    dependencies=[Depends(RoleChecker([Role.ADMIN, Role.EDITOR]))],
-    response_model=Message,
+    "/organizations/{org_id}/conversations/{conversation_id}/messages/{message_id}"
 )
 async def api_retrieve_message(
-    conversation_id: Text = Path(..., description="ID of the conversation"),
-    message_id: Text = Path(..., description="ID of the message"),
+    conversation_id: Annotated[Text, QueryPath(...)],
+    message_id: Annotated[Text, QueryPath(...)],
+    token_payload_org: TokenOrgDepends = Depends(
+        DependsUserPermissions(
+            [Permission.ORG_CLIENT_USE_ORG_CONTENT], "depends_org_managing"
+        )
+    ),
+    db: DatabaseBase = Depends(depend_db),
 ) -> Message:
-    """Retrieve a specific message by its ID."""
+    """Retrieve a message by ID."""
 
-    message = retrieve_message(conversation_id=conversation_id, message_id=message_id)
+    await retrieve_member_conversation(
+        db,
+        token_payload_org=token_payload_org,
+        conversation_id=conversation_id,
+        moderator_permission=Permission.READ_ORG_CONTENT,
+    )
+    message = await retrieve_message(
+        db, conversation_id=conversation_id, message_id=message_id
+    )
     if message is None:
-        raise HTTPException(status_code=404, detail="Message not found")
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Message not found"
+        )
     return message
 
 
 @router.put(
-    "/conversations/{conversation_id}/messages/{message_id}",
-    dependencies=[Depends(RoleChecker([Role.ADMIN, Role.EDITOR]))],
-    response_model=Message,
+    "/organizations/{org_id}/conversations/{conversation_id}/messages/{message_id}"
 )
 async def api_update_message(
-    conversation_id: Text = Path(..., description="ID of the conversation"),
-    message_id: Text = Path(..., description="ID of the message"),
+    conversation_id: Annotated[Text, QueryPath(...)],
+    message_id: Annotated[Text, QueryPath(...)],
     message_update: MessageUpdate = Body(...),
+    token_payload_org: TokenOrgDepends = Depends(
+        DependsUserPermissions(
+            [Permission.ORG_CLIENT_USE_ORG_CONTENT], "depends_org_managing"
+        )
+    ),
+    db: DatabaseBase = Depends(depend_db),
 ) -> Message:
-    """Update an existing message."""
+    """Update a message, only its sender or a content editor may do so."""
 
-    updated_message = update_message(
+    conversation = await retrieve_member_conversation(
+        db,
+        token_payload_org=token_payload_org,
+        conversation_id=conversation_id,
+        moderator_permission=Permission.UPDATE_ORG_CONTENT,
+    )
+    await retrieve_owned_message(
+        db,
+        token_payload_org=token_payload_org,
+        conversation_id=conversation_id,
+        message_id=message_id,
+        moderator_permission=Permission.UPDATE_ORG_CONTENT,
+    )
+    message = await update_message(
+        db,
         conversation_id=conversation_id,
         message_id=message_id,
         message_update=message_update,
     )
-    if updated_message is None:
-        raise HTTPException(status_code=404, detail="Message not found")
-    return updated_message
+    if message is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Message not found"
+        )
+    hub.publish_to_conversation(conversation, "message.updated", message)
+    return message
 
 
 @router.delete(
-    "/conversations/{conversation_id}/messages/{message_id}",
-    dependencies=[Depends(RoleChecker([Role.ADMIN, Role.EDITOR]))],
-    status_code=204,
+    "/organizations/{org_id}/conversations/{conversation_id}/messages/{message_id}"
 )
 async def api_delete_message(
-    conversation_id: Text = Path(..., description="ID of the conversation"),
-    message_id: Text = Path(..., description="ID of the message"),
-    soft_delete: bool = Query(True, description="Perform a soft delete if True"),
+    conversation_id: Annotated[Text, QueryPath(...)],
+    message_id: Annotated[Text, QueryPath(...)],
+    soft_delete: bool = Query(default=True),
+    token_payload_org: TokenOrgDepends = Depends(
+        DependsUserPermissions(
+            [Permission.ORG_CLIENT_USE_ORG_CONTENT], "depends_org_managing"
+        )
+    ),
+    db: DatabaseBase = Depends(depend_db),
 ):
     """Delete a message (soft delete by default)."""
 
-    success = delete_message(
-        conversation_id=conversation_id, message_id=message_id, soft_delete=soft_delete
+    conversation = await retrieve_member_conversation(
+        db,
+        token_payload_org=token_payload_org,
+        conversation_id=conversation_id,
+        moderator_permission=Permission.DELETE_ORG_CONTENT,
+    )
+    await retrieve_owned_message(
+        db,
+        token_payload_org=token_payload_org,
+        conversation_id=conversation_id,
+        message_id=message_id,
+        moderator_permission=Permission.DELETE_ORG_CONTENT,
+    )
+    message = await delete_message(
+        db,
+        conversation_id=conversation_id,
+        message_id=message_id,
+        soft_delete=soft_delete,
     )
-    if success is None:
-        raise HTTPException(status_code=404, detail="Message not found")
-    return Response(status_code=204)
+    if message is not None:
+        hub.publish_to_conversation(conversation, "message.deleted", message)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
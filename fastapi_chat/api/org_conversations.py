@@ -4,50 +4,67 @@ from fastapi import APIRouter, Depends, HTTPException
 from fastapi import Path as QueryPath
 from fastapi import Query, Response, status
 
-from fastapi_chat.db._base import DatabaseBase
-from fastapi_chat.db.conversations import (
+from ..db._base import DatabaseBase
+from ..db.conversations import (
     create_conversation,
     delete_conversation,
     list_conversations,
     retrieve_conversation,
     update_conversation,
 )
-from fastapi_chat.deps.db import depend_db
-from fastapi_chat.deps.oauth import TYPE_TOKEN_PAYLOAD_DATA_USER_ORG
-from fastapi_chat.deps.oauth import Permission as Per
-from fastapi_chat.deps.oauth import UserPermissionChecker
-from fastapi_chat.schemas.conversations import (
+from ..deps.db import depend_db
+from ..deps.oauth import DependsUserPermissions, TokenOrgDepends
+from ..realtime import hub
+from ..schemas.conversations import (
     Conversation,
     ConversationCreate,
+    ConversationInDB,
     ConversationUpdate,
 )
-from fastapi_chat.schemas.pagination import Pagination
+from ..schemas.pagination import Pagination
+from ..schemas.permissions import Permission
 
 router = APIRouter()
 
 
+async def retrieve_org_conversation(
+    db: DatabaseBase, *, organization_id: Text, conversation_id: Text
+) -> ConversationInDB:
+    conversation = await retrieve_conversation(db, conversation_id=conversation_id)
+    if conversation is None or conversation.organization_id != organization_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Conversation not found"
+        )
+    return conversation
+
+
 @router.get("/organizations/{org_id}/conversations/me")
 async def api_list_my_conversations(
     disabled: Optional[bool] = Query(default=None),
-    sort: Literal["asc", "desc", 1, -1] = Query(default="asc"),
+    sort: Literal["asc", "desc"] = Query(default="asc"),
     start: Optional[Text] = Query(default=None),
     before: Optional[Text] = Query(default=None),
-    limit: Optional[int] = Query(default=20),
-    token_payload_data_user_org: TYPE_TOKEN_PAYLOAD_DATA_USER_ORG = Depends(
-        UserPermissionChecker([Per.USE_ORG_CONTENT], "org_user")
+    limit: Optional[int] = Query(default=20, ge=1, le=100),
+    token_payload_org: TokenOrgDepends = Depends(
+        DependsUserPermissions(
+            [Permission.ORG_CLIENT_USE_ORG_CONTENT], "depends_org_managing"
+        )
     ),
     db: DatabaseBase = Depends(depend_db),
 ) -> Pagination[Conversation]:
-    """List conversations from the database."""
+    """List the conversations the current user participates in."""
 
-    user = token_payload_data_user_org[3]
-    org = token_payload_data_user_org[4]
+    user = token_payload_org.user
+    org = token_payload_org.organization
     if user.organization_id != org.id:
-        raise HTTPException(status_code=403, detail="User not in organization")
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="User not in organization"
+        )
     return Pagination[Conversation].model_validate(
         (
             await list_conversations(
                 db,
+                organization_id=org.id,
                 participants=[user.id],
                 disabled=disabled,
                 sort=sort,
@@ -59,37 +76,44 @@ async def api_list_my_conversations(
     )
 
 
-@router.post(
-    "/organizations/{org_id}/conversations",
-    dependencies=[Depends(UserPermissionChecker([Per.MANAGE_ORG_USERS], "org_user"))],
-)
+@router.post("/organizations/{org_id}/conversations")
 async def api_create_conversation(
     conversation_create: ConversationCreate,
+    token_payload_org: TokenOrgDepends = Depends(
+        DependsUserPermissions([Permission.CREATE_ORG_CONTENT], "depends_org_managing")
+    ),
     db: DatabaseBase = Depends(depend_db),
 ) -> Conversation:
     """Create a new conversation."""
 
-    return await create_conversation(db, conversation_create=conversation_create)
+    conversation = await create_conversation(
+        db,
+        conversation_create=conversation_create,
+        organization_id=token_payload_org.organization.id,
+    )
+    hub.publish_to_conversation(conversation, "conversation.created", conversation)
+    return conversation
 
 
-@router.get(
-    "/organizations/{org_id}/conversations",
-    dependencies=[Depends(UserPermissionChecker([Per.MANAGE_ORG_USERS], "org_user"))],
-)
+@router.get("/organizations/{org_id}/conversations")
 async def api_list_conversations(
     disabled: Optional[bool] = Query(default=None),
-    sort: Literal["asc", "desc", 1, -1] = Query(default="asc"),
+    sort: Literal["asc", "desc"] = Query(default="asc"),
     start: Optional[Text] = Query(default=None),
     before: Optional[Text] = Query(default=None),
-    limit: Optional[int] = Query(default=20),
+    limit: Optional[int] = Query(default=20, ge=1, le=100),
+    token_payload_org: TokenOrgDepends = Depends(
+        DependsUserPermissions([Permission.READ_ORG_CONTENT], "depends_org_managing")
+    ),
     db: DatabaseBase = Depends(depend_db),
 ) -> Pagination[Conversation]:
-    """List conversations from the database."""
+    """List conversations of the organization."""
 
     return Pagination[Conversation].model_validate(
         (
             await list_conversations(
                 db,
+                organization_id=token_payload_org.organization.id,
                 disabled=disabled,
                 sort=sort,
                 start=start,
@@ -100,57 +124,81 @@ async def api_list_conversations(
     )
 
 
-@router.get(
-    "/organizations/{org_id}/conversations/{conversation_id}",
-    dependencies=[Depends(UserPermissionChecker([Per.MANAGE_ORG_USERS], "org_user"))],
-)
-async def api_get_conversation(
+@router.get("/organizations/{org_id}/conversations/{conversation_id}")
+async def api_retrieve_conversation(
     conversation_id: Annotated[Text, QueryPath(...)],
+    token_payload_org: TokenOrgDepends = Depends(
+        DependsUserPermissions([Permission.READ_ORG_CONTENT], "depends_org_managing")
+    ),
     db: DatabaseBase = Depends(depend_db),
 ) -> Conversation:
     """Retrieve a conversation by ID."""
 
-    conversation = await retrieve_conversation(db, conversation_id=conversation_id)
-    if conversation is None:
-        raise HTTPException(status_code=404, detail="Conversation not found")
-
-    return conversation
+    return await retrieve_org_conversation(
+        db,
+        organization_id=token_payload_org.organization.id,
+        conversation_id=conversation_id,
+    )
 
 
-@router.put(
-    "/organizations/{org_id}/conversations/{conversation_id}",
-    dependencies=[Depends(UserPermissionChecker([Per.MANAGE_ORG_USERS], "org_user"))],
-    response_model=Conversation,
-)
+@router.put("/organizations/{org_id}/conversations/{conversation_id}")
 async def api_update_conversation(
     conversation_id: Annotated[Text, QueryPath(...)],
     conversation_update: ConversationUpdate,
+    token_payload_org: TokenOrgDepends = Depends(
+        DependsUserPermissions([Permission.UPDATE_ORG_CONTENT], "depends_org_managing")
+    ),
     db: DatabaseBase = Depends(depend_db),
 ) -> Conversation:
     """Update an existing conversation."""
 
+    conversation_origin = await retrieve_org_conversation(
+        db,
+        organization_id=token_payload_org.organization.id,
+        conversation_id=conversation_id,
+    )
     conversation = await update_conversation(
         db,
         conversation_id=conversation_id,
         conversation_update=conversation_update,
     )
     if conversation is None:
-        raise HTTPException(status_code=404, detail="Conversation not found")
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Conversation not found"
+        )
+    # Removed participants are told as well, so they can drop the conversation
+    hub.publish_to_conversation(
+        conversation,
+        "conversation.updated",
+        conversation,
+        user_ids={
+            p.user_id
+            for p in conversation_origin.participants + conversation.participants
+        },
+    )
     return conversation
 
 
-@router.delete(
-    "/organizations/{org_id}/conversations/{conversation_id}",
-    dependencies=[Depends(UserPermissionChecker([Per.MANAGE_ORG_USERS], "org_user"))],
-)
+@router.delete("/organizations/{org_id}/conversations/{conversation_id}")
 async def api_delete_conversation(
     conversation_id: Annotated[Text, QueryPath(...)],
     soft_delete: bool = Query(default=True),
+    token_payload_org: TokenOrgDepends = Depends(
+        DependsUserPermissions([Permission.DELETE_ORG_CONTENT], "depends_org_managing")
+    ),
     db: DatabaseBase = Depends(depend_db),
 ):
-    """Delete a conversation"""
+    """Delete a conversation."""
 
+    conversation = await retrieve_org_conversation(
+        db,
+        organization_id=token_payload_org.organization.id,
+        conversation_id=conversation_id,
+    )
     await delete_conversation(
         db, conversation_id=conversation_id, soft_delete=soft_delete
     )
+    hub.publish_to_conversation(
+        conversation, "conversation.deleted", {"id": conversation.id}
+    )
     return Response(status_code=status.HTTP_204_NO_CONTENT)
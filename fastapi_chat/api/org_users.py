@@ -9,7 +9,7 @@ from ..config import settings
 from ..db._base import DatabaseBase
 from ..db.organizations import retrieve_organization
 from ..db.tokens import caching_token
-from ..db.users import create_user, delete_user, get_user_by_id, list_users, update_user
+from ..db.users import create_user, delete_user, list_users, update_user
 from ..deps.db import depend_db
 from ..deps.oauth import (
     DependsUserPermissions,
@@ -21,7 +21,7 @@ from ..schemas.pagination import Pagination
 from ..schemas.permissions import Permission
 from ..schemas.users import User, UserCreate, UserGuestRegister, UserUpdate
 from ..utils.common import run_as_coro
-from ..utils.oauth import create_token_model, get_password_hash
+from ..utils.oauth import create_token_model, get_password_hash_async
 
 router = APIRouter()
 
@@ -57,7 +57,7 @@ async def api_register(
     created_user = await create_user(
         db,
         user_create=user_guest_register,
-        hashed_password=get_password_hash(user_guest_register.password),
+        hashed_password=await get_password_hash_async(user_guest_register.password),
         organization_id=org.id,
         allow_org_empty=False,
     )
@@ -142,7 +142,7 @@ async def api_create_user(
     created_user = await create_user(
         db,
         user_create=user_create,
-        hashed_password=get_password_hash(user_create.password),
+        hashed_password=await get_password_hash_async(user_create.password),
         organization_id=org.id,
         allow_org_empty=False,
     )
@@ -158,16 +158,12 @@ async def api_retrieve_user(
     token_payload_org_user: TokenOrgUserManagingDepends = Depends(
         DependsUserPermissions([Permission.READ_ORG_USER], "depends_org_user_managing")
     ),
-    db: DatabaseBase = Depends(depend_db),
 ) -> User:
     """Retrieve user profile information."""
 
-    user = await get_user_by_id(
-        db,
-        organization_id=token_payload_org_user.organization.id,
-        user_id=token_payload_org_user.target_user.id,
-    )
-    if user is None:
+    # The target user is fetched once by the permission dependency
+    user = token_payload_org_user.target_user
+    if user.organization_id != token_payload_org_user.organization.id:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
         )
@@ -16,7 +16,7 @@ from ..schemas.role_per_definitions import get_role_permissions
 from ..schemas.roles import Role
 from ..schemas.users import PlatformUserCreate, PlatformUserUpdate, User
 from ..utils.common import run_as_coro
-from ..utils.oauth import get_password_hash
+from ..utils.oauth import get_password_hash_async
 
 router = APIRouter()
 
@@ -74,7 +74,7 @@ async def api_create_platform_user(
     created_user = await create_user(
         db,
         user_create=user_create,
-        hashed_password=get_password_hash(user_create.password),
+        hashed_password=await get_password_hash_async(user_create.password),
         organization_id=None,
         allow_org_empty=True,
     )
@@ -0,0 +1,322 @@
+import asyncio
+import contextlib
+import functools
+from typing import (
+    Annotated,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterable,
+    List,
+    Optional,
+    Text,
+)
+
+import uuid_utils as uuid
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi import Path as QueryPath
+from fastapi import Query, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+from starlette.requests import HTTPConnection
+
+from ..config import logger, settings
+from ..db._base import DatabaseBase
+from ..db.conversations import list_conversations
+from ..db.messages import list_messages
+from ..deps.db import depend_db
+from ..deps.oauth import (
+    TokenOrgDepends,
+    authenticate_token,
+    depends_current_path_org_id,
+    depends_org_managing,
+)
+from ..realtime import hub
+from ..schemas.messages import MessageInDB
+from ..schemas.permissions import Permission
+from ..schemas.role_per_definitions import get_role_permissions
+from .messages import retrieve_member_conversation
+
+router = APIRouter()
+
+
+def get_connection_token(
+    connection: HTTPConnection, token: Optional[Text]
+) -> Optional[Text]:
+    """Browser WebSockets and EventSource cannot set headers, so accept a query."""
+
+    if token:
+        return token
+    authorization = connection.headers.get("authorization", "")
+    scheme, _, credentials = authorization.partition(" ")
+    if scheme.lower() == "bearer" and credentials:
+        return credentials
+    return None
+
+
+@router.websocket("/ws")
+async def ws_events(
+    websocket: WebSocket,
+    access_token: Optional[Text] = Query(default=None),
+):
+    """Push the events of the user's conversations over a WebSocket."""
+
+    token = get_connection_token(websocket, access_token)
+    if token is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    try:
+        token_payload_user = await authenticate_token(token, websocket.app.state.db)
+    except HTTPException as e:
+        logger.debug("WebSocket authentication failed: %s", e.detail)
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    connection = hub.connect(websocket, user_id=token_payload_user.user.id)
+    sender = asyncio.create_task(connection.run_sender())
+    try:
+        while True:
+            # Clients only keep the connection alive, events flow server to client
+            if await websocket.receive_text() == "ping":
+                connection.send("pong")
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        hub.disconnect(connection)
+        sender.cancel()
+        with contextlib.suppress(asyncio.CancelledError, Exception):
+            await sender
+
+
+async def authenticate_org_stream(
+    token: Optional[Text], *, org_id: Text, db: DatabaseBase
+) -> TokenOrgDepends:
+    """Run the organization content checks of the REST routes for a stream."""
+
+    if token is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    token_payload_user = await authenticate_token(token, db)
+    token_payload_org = await depends_org_managing(
+        token_payload_user, await depends_current_path_org_id(org_id, db=db)
+    )
+    user_permissions = get_role_permissions(token_payload_org.user.role)
+    if not user_permissions.is_permission_granted(
+        [Permission.ORG_CLIENT_USE_ORG_CONTENT]
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient permissions"
+        )
+    return token_payload_org
+
+
+def parse_last_event_id(last_event_id: Optional[Text]) -> Optional[Text]:
+    """Event IDs are message UUIDv7s, anything else starts a fresh stream."""
+
+    if not last_event_id:
+        return None
+    try:
+        event_id = uuid.UUID(last_event_id.strip())
+    except ValueError:
+        return None
+    # The replay reads the creation time of the ID, only v7 carries one
+    if event_id.version != 7:
+        return None
+    return str(event_id)
+
+
+async def replay_messages(
+    db: DatabaseBase, *, conversation_ids: Iterable[Text], last_event_id: Text
+) -> List[Text]:
+    """SSE frames of the messages created after `last_event_id`.
+
+    Clients too far behind get a single `stream.reset` event instead and are
+    expected to reload through the list endpoints.
+    """
+
+    limit = settings.REALTIME_SSE_REPLAY_LIMIT
+    messages: List[MessageInDB] = []
+    for conversation_id in conversation_ids:
+        page = await list_messages(
+            db,
+            conversation_id=conversation_id,
+            sort="asc",
+            start=last_event_id,
+            limit=limit + 1,
+        )
+        messages.extend(m for m in page.data if m.id != last_event_id)
+        if len(messages) > limit:
+            logger.debug("Too many events to replay since '%s'", last_event_id)
+            # A fresh ID, so the next reconnect resumes from now
+            return [
+                hub.sse_frame(
+                    "stream.reset",
+                    {"last_event_id": last_event_id},
+                    event_id=str(uuid.uuid7()),
+                )
+            ]
+    messages.sort(key=lambda m: m.id)
+    return [hub.sse_frame("message.created", m, event_id=m.id) for m in messages]
+
+
+async def replay_my_messages(
+    db: DatabaseBase, *, organization_id: Text, user_id: Text, last_event_id: Text
+) -> List[Text]:
+    """Replay the messages of the user's conversations active since the event."""
+
+    since = uuid.UUID(last_event_id).timestamp // 1000
+    conversation_ids: List[Text] = []
+    start: Optional[Text] = None
+    while True:
+        page = await list_conversations(
+            db,
+            organization_id=organization_id,
+            participants=[user_id],
+            start=start,
+            limit=100,
+        )
+        conversation_ids.extend(
+            c.id
+            for c in page.data
+            if c.last_message_at is not None and c.last_message_at >= since
+        )
+        if not page.has_more:
+            break
+        start = page.last_id
+    return await replay_messages(
+        db, conversation_ids=conversation_ids, last_event_id=last_event_id
+    )
+
+
+async def stream_events(
+    *,
+    user_id: Text,
+    conversation_id: Optional[Text] = None,
+    replay: Optional[Callable[[], Awaitable[List[Text]]]] = None,
+) -> AsyncIterator[Text]:
+    """Yield the SSE frames of a hub connection, with heartbeats while idle.
+
+    The connection lives as long as the response, its queue is the only state
+    an idle stream holds. Streams end after REALTIME_SSE_MAX_STREAM_SECONDS and
+    clients resume with `Last-Event-ID`. The connection is registered before
+    the replay is read, so an event may be both replayed and sent live:
+    clients should ignore IDs they have seen.
+    """
+
+    connection = hub.connect(
+        None, user_id=user_id, conversation_id=conversation_id, transport="sse"
+    )
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.REALTIME_SSE_MAX_STREAM_SECONDS
+    try:
+        yield f"retry: {settings.REALTIME_SSE_RETRY_MILLISECONDS}\n\n"
+        if replay is not None:
+            for frame in await replay():
+                yield frame
+        while (remaining := deadline - loop.time()) > 0:
+            try:
+                data = await asyncio.wait_for(
+                    connection.queue.get(),
+                    timeout=min(settings.REALTIME_SSE_HEARTBEAT_SECONDS, remaining),
+                )
+            except asyncio.TimeoutError:
+                # Keeps proxies from closing an idle stream
+                yield ": heartbeat\n\n"
+                continue
+            if data is None:
+                break
+            yield data
+    finally:
+        hub.disconnect(connection)
+
+
+def event_stream_response(stream: AsyncIterator[Text]) -> StreamingResponse:
+    return StreamingResponse(
+        stream,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/organizations/{org_id}/conversations/me/events")
+async def sse_my_conversations_events(
+    request: Request,
+    org_id: Annotated[Text, QueryPath(...)],
+    access_token: Optional[Text] = Query(default=None),
+    last_event_id: Optional[Text] = Header(default=None, alias="Last-Event-ID"),
+    db: DatabaseBase = Depends(depend_db),
+) -> StreamingResponse:
+    """Stream the events of every conversation of the user as Server-Sent Events.
+
+    Reconnecting with `Last-Event-ID` replays the messages created since. Only
+    `message.created` events carry an ID and are replayed: edits, deletions
+    and conversation changes sent while disconnected are lost, clients reload
+    through the list endpoints to catch up with them.
+    """
+
+    token_payload_org = await authenticate_org_stream(
+        get_connection_token(request, access_token), org_id=org_id, db=db
+    )
+    last_event_id = parse_last_event_id(last_event_id)
+    return event_stream_response(
+        stream_events(
+            user_id=token_payload_org.user.id,
+            replay=(
+                None
+                if last_event_id is None
+                else functools.partial(
+                    replay_my_messages,
+                    db,
+                    organization_id=token_payload_org.organization.id,
+                    user_id=token_payload_org.user.id,
+                    last_event_id=last_event_id,
+                )
+            ),
+        )
+    )
+
+
+@router.get("/organizations/{org_id}/conversations/{conversation_id}/events")
+async def sse_conversation_events(
+    request: Request,
+    org_id: Annotated[Text, QueryPath(...)],
+    conversation_id: Annotated[Text, QueryPath(...)],
+    access_token: Optional[Text] = Query(default=None),
+    last_event_id: Optional[Text] = Header(default=None, alias="Last-Event-ID"),
+    db: DatabaseBase = Depends(depend_db),
+) -> StreamingResponse:
+    """Stream the events of a conversation as Server-Sent Events.
+
+    Only participants may listen, the hub routes events to participants.
+    Reconnecting with `Last-Event-ID` replays the messages created since. Only
+    `message.created` events carry an ID and are replayed: edits, deletions
+    and conversation changes sent while disconnected are lost, clients reload
+    through the list endpoints to catch up with them.
+    """
+
+    token_payload_org = await authenticate_org_stream(
+        get_connection_token(request, access_token), org_id=org_id, db=db
+    )
+    await retrieve_member_conversation(
+        db, token_payload_org=token_payload_org, conversation_id=conversation_id
+    )
+    last_event_id = parse_last_event_id(last_event_id)
+    return event_stream_response(
+        stream_events(
+            user_id=token_payload_org.user.id,
+            conversation_id=conversation_id,
+            replay=(
+                None
+                if last_event_id is None
+                else functools.partial(
+                    replay_messages,
+                    db,
+                    conversation_ids=[conversation_id],
+                    last_event_id=last_event_id,
+                )
+            ),
+        )
+    )
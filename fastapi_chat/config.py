@@ -1,5 +1,10 @@
+import atexit
+import copy
+import json
 import logging
 import logging.config
+import logging.handlers
+import queue
 from datetime import datetime
 from pathlib import Path
 from typing import Literal, Optional, Text
@@ -10,12 +15,17 @@ from pydantic import Field
 from pydantic_settings import BaseSettings
 from rich.console import Console
 
+from .utils.metrics import Counter
 from .version import VERSION
 
 init(autoreset=True)
 
 console = Console()
 
+LOG_RECORDS_DROPPED = Counter(
+    "log_records_dropped_total", "Log records dropped because the queue was full."
+)
+
 
 class Settings(BaseSettings):
     app_name: Text = "fastapi-chat"
@@ -25,6 +35,8 @@ class Settings(BaseSettings):
     )
     logging_level: Text = "DEBUG"
     logs_dir: Text = "logs"
+    log_format: Literal["text", "json"] | None = Field(default=None)
+    log_queue_size: int = 10000
 
     # OAuth2
     token_url: Text = "/auth/login"
@@ -34,9 +46,45 @@ class Settings(BaseSettings):
     ALGORITHM: Text = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    TOKEN_BLACKLIST_SWEEP_INTERVAL_SECONDS: float = 60.0
+    MAX_SESSIONS_PER_USER: int = 10
+    VERIFIED_TOKEN_CACHE_SIZE: int = 10000
+
+    # Executor
+    EXECUTOR_MAX_WORKERS: Optional[int] = Field(default=None)
+    DB_SYNC_MAX_CONCURRENCY: Optional[int] = Field(default=None)
+    PASSWORD_HASH_WORKERS: Optional[int] = Field(default=None)
+    PASSWORD_HASH_MAX_QUEUE: int = 64
+
+    # Event loop monitor
+    LOOP_MONITOR_ENABLED: bool = True
+    LOOP_MONITOR_INTERVAL_SECONDS: float = 0.1
+    LOOP_MONITOR_THRESHOLD_SECONDS: float = 0.1  # Lag logged with the stack
+    LOOP_MONITOR_LOG_INTERVAL_SECONDS: float = 60.0
+
+    # Real-time
+    REALTIME_SEND_QUEUE_SIZE: int = 256
+    REALTIME_SSE_HEARTBEAT_SECONDS: float = 15.0
+    REALTIME_SSE_RETRY_MILLISECONDS: int = 3000
+    REALTIME_SSE_REPLAY_LIMIT: int = 500
+    REALTIME_SSE_MAX_STREAM_SECONDS: float = 3600.0
+
+    # Event bus
+    EVENT_BUS_URL: Optional[Text] = Field(default=None)  # redis:// for workers
+    EVENT_BUS_CHANNEL: Text = "fastapi-chat:events"
+    EVENT_BUS_FLUSH_INTERVAL_SECONDS: float = 0.005
+    EVENT_BUS_MAX_BATCH: int = 500
 
     # Database
     DB_URL: Optional[Text] = Field(default=None)
+    DB_INSTRUMENTATION: bool = True
+    DB_TIMING_HEADERS: bool = False  # X-DB-Calls and Server-Timing headers
+    DEPENDENCY_TIMING: bool = False  # Time the auth and DB dependencies
+    USER_CACHE_SIZE: int = 10000
+    USER_CACHE_TTL_SECONDS: float = 30.0
+    ORG_CACHE_SIZE: int = 1000
+    ORG_CACHE_TTL_SECONDS: float = 60.0
+    ORG_CACHE_NEGATIVE_TTL_SECONDS: float = 5.0
 
     def validate_values(self):
         if not self.app_env:
@@ -47,6 +95,8 @@ class Settings(BaseSettings):
                 "Value 'APP_ENV' must be one of 'development', 'production', "
                 + f"'test', but got '{self.app_env}'."
             )
+        if self.log_format is None:
+            self.log_format = "json" if self.app_env == "production" else "text"
 
 
 settings = Settings()
@@ -83,6 +133,8 @@ class ColoredIsoDatetimeFormatter(IsoDatetimeFormatter):
     }
 
     def format(self, record):
+        # Color a copy, the same record is shared with the other handlers
+        record = logging.makeLogRecord(record.__dict__)
         levelname = record.levelname
         if levelname in self.COLORS:
             record.levelname = (
@@ -96,6 +148,69 @@ class ColoredIsoDatetimeFormatter(IsoDatetimeFormatter):
         return super(ColoredIsoDatetimeFormatter, self).format(record)
 
 
+class JsonFormatter(IsoDatetimeFormatter):
+    """Format records as single-line JSON objects for log collectors."""
+
+    def format(self, record):
+        data = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            data["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data["exc_info"] = record.exc_text
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that drops records instead of blocking when the queue is full.
+
+    The number of dropped records is reported with the next record that fits.
+    """
+
+    def __init__(self, queue: queue.Queue):
+        super().__init__(queue)
+        self.dropped = 0
+        self._unreported = 0
+
+    def prepare(self, record):
+        # Keep the traceback apart from the message, each formatter places it
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        if self._unreported:
+            report = logging.makeLogRecord(
+                {
+                    "name": record.name,
+                    "levelno": logging.WARNING,
+                    "levelname": "WARNING",
+                    "msg": "Dropped %d log records, the logging queue was full",
+                    "args": (self._unreported,),
+                }
+            )
+            try:
+                self.queue.put_nowait(report)
+                self._unreported = 0
+            except queue.Full:
+                pass
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            self._unreported += 1
+            LOG_RECORDS_DROPPED.inc()
+
+
 def default_logging_config():
     d = {
         "version": 1,
@@ -110,12 +225,17 @@ def default_logging_config():
                 "()": IsoDatetimeFormatter,
                 "format": "%(asctime)s %(levelname)-8s %(name)s  - %(message)s",
             },
+            "json_formatter": {"()": JsonFormatter},
         },
         "handlers": {
             "console_handler": {
                 "level": "DEBUG",
                 "class": "logging.StreamHandler",
-                "formatter": "basic_formatter",
+                "formatter": (
+                    "json_formatter"
+                    if settings.log_format == "json"
+                    else "basic_formatter"
+                ),
             },
             "file_handler": {
                 "level": settings.logging_level,
@@ -123,7 +243,11 @@ def default_logging_config():
                 "filename": Path(settings.logs_dir)
                 .joinpath(f"{settings.app_name}.log")
                 .resolve(),
-                "formatter": "file_formatter",
+                "formatter": (
+                    "json_formatter"
+                    if settings.log_format == "json"
+                    else "file_formatter"
+                ),
                 "maxBytes": 2097152,
                 "backupCount": 20,
             },
@@ -133,7 +257,11 @@ def default_logging_config():
                 "filename": Path(settings.logs_dir)
                 .joinpath(f"{settings.app_name}.error.log")
                 .resolve(),
-                "formatter": "file_formatter",
+                "formatter": (
+                    "json_formatter"
+                    if settings.log_format == "json"
+                    else "file_formatter"
+                ),
             },
         },
         "loggers": {
@@ -147,5 +275,24 @@ def default_logging_config():
     return d
 
 
+def setup_queue_logging(
+    logger: logging.Logger, *, maxsize: int
+) -> logging.handlers.QueueListener:
+    """Move the logger's handlers behind a queue drained by a background thread."""
+
+    handlers = list(logger.handlers)
+    for handler in handlers:
+        logger.removeHandler(handler)
+    queue_handler = DroppingQueueHandler(queue.Queue(maxsize=maxsize))
+    logger.addHandler(queue_handler)
+    listener = logging.handlers.QueueListener(
+        queue_handler.queue, *handlers, respect_handler_level=True
+    )
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+
 logging.config.dictConfig(default_logging_config())
 logger = logging.getLogger(settings.app_name)
+log_listener = setup_queue_logging(logger, maxsize=settings.log_queue_size)
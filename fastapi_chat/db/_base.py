@@ -1,14 +1,16 @@
-from typing import TYPE_CHECKING, Literal, Optional, Sequence, Text
+from typing import TYPE_CHECKING, Literal, Optional, Sequence, Text, cast
 
 from yarl import URL
 
 if TYPE_CHECKING:
+    from fastapi_chat.events import EventBus
     from fastapi_chat.schemas.conversations import (
         ConversationCreate,
         ConversationInDB,
         ConversationUpdate,
     )
 
+    from ..schemas.messages import MessageCreate, MessageInDB, MessageUpdate
     from ..schemas.oauth import Token, TokenInDB
     from ..schemas.organizations import (
         Organization,
@@ -22,9 +24,15 @@ if TYPE_CHECKING:
 
 class DatabaseBase:
     _url: URL | Text | None
+    event_bus: Optional["EventBus"] = None
 
     @classmethod
-    def from_url(cls, url: URL | Text | None):
+    def from_url(cls, url: URL | Text | None, *, instrument: Optional[bool] = None):
+        """Create the database for the URL, wrapped with metrics unless
+        `instrument` or `settings.DB_INSTRUMENTATION` is false."""
+
+        from fastapi_chat.config import settings
+        from fastapi_chat.db._instrumented import InstrumentedDatabase
         from fastapi_chat.db._memory import DatabaseMemory
 
         db: DatabaseBase
@@ -36,6 +44,8 @@ class DatabaseBase:
             db = DatabaseMemory()
         else:
             db = DatabaseMemory()
+        if settings.DB_INSTRUMENTATION if instrument is None else instrument:
+            return cast("DatabaseBase", InstrumentedDatabase(db))
         return db
 
     @property
@@ -147,6 +157,11 @@ class DatabaseBase:
     async def retrieve_cached_token(self, username: Text) -> Optional["TokenInDB"]:
         raise NotImplementedError
 
+    async def retrieve_cached_token_by_token(
+        self, token: Text
+    ) -> Optional["TokenInDB"]:
+        raise NotImplementedError
+
     async def caching_token(
         self, username: Text, token: "Token"
     ) -> Optional["TokenInDB"]:
@@ -155,17 +170,34 @@ class DatabaseBase:
     async def invalidate_token(self, token: Optional["Token"]):
         raise NotImplementedError
 
-    async def is_token_blocked(self, token: Text) -> bool:
+    async def revoke_token(
+        self, token: Text, *, session_id: Optional[Text] = None
+    ) -> None:
+        raise NotImplementedError
+
+    async def is_token_blocked(
+        self, token: Text, *, session_id: Optional[Text] = None
+    ) -> bool:
+        raise NotImplementedError
+
+    async def sweep_blacklisted_tokens(self, now: Optional[int] = None) -> int:
+        raise NotImplementedError
+
+    async def blacklist_token_digest(self, digest: Text, *, expires_at: int) -> None:
         raise NotImplementedError
 
     async def create_conversation(
-        self, *, conversation_create: "ConversationCreate"
+        self,
+        *,
+        conversation_create: "ConversationCreate",
+        organization_id: Optional[Text] = None,
     ) -> "ConversationInDB":
         raise NotImplementedError
 
     async def list_conversations(
         self,
         *,
+        organization_id: Optional[Text] = None,
         participants: Optional[Sequence[Text]] = None,
         disabled: Optional[bool] = None,
         sort: Literal["asc", "desc", 1, -1] = "asc",
@@ -190,6 +222,41 @@ class DatabaseBase:
     ) -> None:
         raise NotImplementedError
 
+    async def create_message(
+        self, *, conversation_id: Text, sender_id: Text, message_create: "MessageCreate"
+    ) -> "MessageInDB":
+        raise NotImplementedError
+
+    async def list_messages(
+        self,
+        *,
+        conversation_id: Text,
+        sort: Literal["asc", "desc", 1, -1] = "desc",
+        start: Optional[Text] = None,
+        before: Optional[Text] = None,
+        limit: Optional[int] = 20,
+    ) -> "Pagination[MessageInDB]":
+        raise NotImplementedError
+
+    async def retrieve_message(
+        self, *, conversation_id: Text, message_id: Text
+    ) -> Optional["MessageInDB"]:
+        raise NotImplementedError
+
+    async def update_message(
+        self,
+        *,
+        conversation_id: Text,
+        message_id: Text,
+        message_update: "MessageUpdate",
+    ) -> Optional["MessageInDB"]:
+        raise NotImplementedError
+
+    async def delete_message(
+        self, *, conversation_id: Text, message_id: Text, soft_delete: bool = True
+    ) -> Optional["MessageInDB"]:
+        raise NotImplementedError
+
     def __str__(self) -> Text:
         _attr = ""
         if self.url_safe:
@@ -0,0 +1,134 @@
+from typing import TYPE_CHECKING, Dict, Generic, Iterable, Optional, Text, TypeVar
+
+from cachetools import TTLCache
+
+from fastapi_chat.events import TOPIC_CACHE_INVALIDATE
+from fastapi_chat.utils.metrics import Counter
+
+if TYPE_CHECKING:
+    from fastapi_chat.db._base import DatabaseBase
+
+T = TypeVar("T")
+
+CACHE_HITS = Counter(
+    "db_cache_hits_total", "Lookups served from a record cache.", labelnames=("cache",)
+)
+CACHE_MISSES = Counter(
+    "db_cache_misses_total",
+    "Lookups that fell through a record cache to the database.",
+    labelnames=("cache",),
+)
+
+
+class RecordCache(Generic[T]):
+    """Bounded TTL/LRU cache of database records keyed by ID, with aliases.
+
+    Aliases (e.g. a username) map to the record ID, so invalidating the ID is
+    enough to drop every way of reaching the record. With `negative_ttl`, IDs
+    known to be missing are remembered for that short time as well.
+    """
+
+    def __init__(
+        self,
+        name: Text,
+        *,
+        maxsize: int,
+        ttl: float,
+        negative_ttl: Optional[float] = None,
+    ):
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self._records: TTLCache[Text, T] = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._aliases: TTLCache[Text, Text] = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._missing: Optional[TTLCache[Text, bool]] = (
+            TTLCache(maxsize=maxsize, ttl=negative_ttl) if negative_ttl else None
+        )
+        self._hits_counter = CACHE_HITS.labels(name)
+        self._misses_counter = CACHE_MISSES.labels(name)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def get(self, key: Text) -> Optional[T]:
+        record = self._records.get(key)
+        self._count(record is not None)
+        return record
+
+    def get_by_alias(self, alias: Text) -> Optional[T]:
+        key = self._aliases.get(alias)
+        record = None if key is None else self._records.get(key)
+        self._count(record is not None)
+        return record
+
+    def is_missing(self, key: Text) -> bool:
+        """Whether the key was recently looked up and not found."""
+
+        if self._missing is None or key not in self._missing:
+            return False
+        self._count(True)
+        return True
+
+    def set(self, key: Text, record: T, *, aliases: Iterable[Text] = ()) -> None:
+        self._records[key] = record
+        for alias in aliases:
+            self._aliases[alias] = key
+        if self._missing is not None:
+            self._missing.pop(key, None)
+
+    def set_missing(self, key: Text) -> None:
+        if self._missing is not None:
+            self._missing[key] = True
+
+    def invalidate(self, key: Text) -> None:
+        self._records.pop(key, None)
+        if self._missing is not None:
+            self._missing.pop(key, None)
+
+    def clear(self) -> None:
+        self._records.clear()
+        self._aliases.clear()
+        if self._missing is not None:
+            self._missing.clear()
+
+    def stats(self) -> Dict[Text, int]:
+        return {"size": len(self._records), "hits": self.hits, "misses": self.misses}
+
+    def _count(self, hit: bool) -> None:
+        if hit:
+            self.hits += 1
+            self._hits_counter.inc()
+        else:
+            self.misses += 1
+            self._misses_counter.inc()
+
+
+def get_record_cache(
+    db: "DatabaseBase",
+    name: Text,
+    *,
+    maxsize: int,
+    ttl: float,
+    negative_ttl: Optional[float] = None,
+) -> RecordCache:
+    """Return the named record cache of the database, created on first use."""
+
+    caches: Optional[Dict[Text, RecordCache]] = getattr(db, "_record_caches", None)
+    if caches is None:
+        caches = {}
+        setattr(db, "_record_caches", caches)
+    cache = caches.get(name)
+    if cache is None:
+        cache = caches[name] = RecordCache(
+            name, maxsize=maxsize, ttl=ttl, negative_ttl=negative_ttl
+        )
+    return cache
+
+
+def publish_invalidation(db: "DatabaseBase", name: Text, key: Text) -> None:
+    """Tell the other workers to drop a record from their named cache."""
+
+    if db.event_bus is not None:
+        db.event_bus.publish(
+            TOPIC_CACHE_INVALIDATE, {"cache": name, "key": key}, key=f"{name}:{key}"
+        )
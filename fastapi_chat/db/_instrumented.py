@@ -0,0 +1,113 @@
+import functools
+import inspect
+import time
+from typing import Any, Callable, FrozenSet, Text
+
+from fastapi_chat.utils.common import run_as_coro
+from fastapi_chat.utils.metrics import Counter, Histogram
+from fastapi_chat.utils.timing import current_request_timings
+
+from ._base import DatabaseBase
+
+DB_CALL_BUCKETS = (
+    0.00005,
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+)
+
+DB_CALLS = Counter(
+    "db_calls_total", "Database calls by method.", labelnames=("method",)
+)
+DB_ERRORS = Counter(
+    "db_errors_total", "Database calls raising an error.", labelnames=("method",)
+)
+DB_CALL_DURATION = Histogram(
+    "db_call_duration_seconds",
+    "Database call latency by method.",
+    buckets=DB_CALL_BUCKETS,
+    labelnames=("method",),
+)
+
+# Executor limit shared by the sync database calls, see `DB_SYNC_MAX_CONCURRENCY`
+DB_LIMIT_KEY = "db"
+
+# Storage methods of `DatabaseBase`, the ones wrapped with metrics
+DATABASE_METHODS: FrozenSet[Text] = frozenset(
+    name
+    for name, value in vars(DatabaseBase).items()
+    if not name.startswith("_") and inspect.isfunction(value)
+)
+
+
+class InstrumentedDatabase:
+    """Wrap a database to record the calls, errors and latency of each method.
+
+    Every call is also added to the current request's timings, so the DB calls
+    of a request can be counted. Anything else is read from and written to the
+    wrapped database.
+
+    Sync methods are wrapped as coroutines running on the shared executor under
+    the `DB_LIMIT_KEY` limit, the metrics are only updated from the event loop
+    thread.
+    """
+
+    def __init__(self, db: DatabaseBase):
+        object.__setattr__(self, "db", db)
+
+    def __getattr__(self, name: Text) -> Any:
+        if name == "db":
+            raise AttributeError(name)
+        value = getattr(self.db, name)
+        if name in DATABASE_METHODS:
+            value = _instrument(name, value)
+            # Later lookups find the wrapper without reaching __getattr__
+            object.__setattr__(self, name, value)
+        return value
+
+    def __setattr__(self, name: Text, value: Any) -> None:
+        setattr(self.db, name, value)
+
+    def __str__(self) -> Text:
+        return f"{self.__class__.__name__}({self.db})"
+
+    __repr__ = __str__
+
+
+def _instrument(name: Text, method: Callable[..., Any]) -> Callable[..., Any]:
+    calls = DB_CALLS.labels(name)
+    errors = DB_ERRORS.labels(name)
+    duration = DB_CALL_DURATION.labels(name)
+    call = (
+        method
+        if inspect.iscoroutinefunction(method)
+        else functools.partial(run_as_coro, method, limit_key=DB_LIMIT_KEY)
+    )
+
+    @functools.wraps(method)
+    async def instrumented(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await call(*args, **kwargs)
+        except Exception:
+            errors.inc()
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            calls.inc()
+            duration.observe(elapsed)
+            timings = current_request_timings()
+            if timings is not None:
+                timings.add_db_call(elapsed)
+
+    return instrumented
@@ -1,25 +1,116 @@
+import bisect
+import heapq
+import time
 from types import MappingProxyType
-from typing import List, Literal, Optional, Sequence, Text, TypedDict
+from typing import (
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Literal,
+    Mapping,
+    Optional,
+    Sequence,
+    Text,
+    Tuple,
+    TypedDict,
+    TypeVar,
+)
 
+from ..config import settings
 from ..db._base import DatabaseBase
+from ..events import TOPIC_TOKEN_REVOKED
 from ..schemas.conversations import (
     ConversationCreate,
     ConversationInDB,
     ConversationUpdate,
 )
-from ..schemas.oauth import Token, TokenBlacklisted, TokenInDB
+from ..schemas.messages import MessageCreate, MessageInDB, MessageUpdate
+from ..schemas.oauth import Token, TokenInDB, session_digest, token_digest
 from ..schemas.organizations import Organization, OrganizationCreate, OrganizationUpdate
 from ..schemas.pagination import Pagination
 from ..schemas.roles import Role
 from ..schemas.users import UserCreate, UserInDB, UserUpdate
+from ..utils.oauth import forget_verified_token, get_token_expires_at
+
+T = TypeVar("T")
 
 
 class _BD(TypedDict):
-    cached_tokens: List["TokenInDB"]
-    blacklisted_tokens: List["TokenBlacklisted"]
-    organizations: List["Organization"]
-    users: List["UserInDB"]
-    conversations: List["ConversationInDB"]
+    cached_tokens: Dict[Text, "TokenInDB"]  # access token digest: token
+    blacklisted_tokens: Dict[Text, int]  # token digest: expires at
+    organizations: Dict[Text, "Organization"]
+    users: Dict[Text, "UserInDB"]
+    conversations: Dict[Text, "ConversationInDB"]
+    messages: Dict[Text, "MessageInDB"]
+
+
+def _index_insert(index: List[Text], key: Text) -> None:
+    """Insert a key into a sorted index, ignoring duplicates."""
+
+    pos = bisect.bisect_left(index, key)
+    if pos == len(index) or index[pos] != key:
+        index.insert(pos, key)
+
+
+def _index_remove(index: List[Text], key: Text) -> None:
+    """Remove a key from a sorted index if present."""
+
+    pos = bisect.bisect_left(index, key)
+    if pos < len(index) and index[pos] == key:
+        del index[pos]
+
+
+def _index_range(
+    index: Sequence[Text],
+    *,
+    sort: Literal["asc", "desc", 1, -1] = "asc",
+    start: Optional[Text] = None,
+    before: Optional[Text] = None,
+) -> Iterator[Text]:
+    """Iterate a sorted index from `start` (inclusive) up to `before` (exclusive)."""
+
+    if sort in ("asc", 1):
+        lo = bisect.bisect_left(index, start) if start else 0
+        hi = bisect.bisect_left(index, before) if before else len(index)
+        for i in range(lo, hi):
+            yield index[i]
+    else:
+        hi = bisect.bisect_right(index, start) if start else len(index)
+        lo = bisect.bisect_right(index, before) if before else 0
+        for i in range(hi - 1, lo - 1, -1):
+            yield index[i]
+
+
+def _keyset_page(
+    index: Sequence[Text],
+    records: Mapping[Text, T],
+    *,
+    sort: Literal["asc", "desc", 1, -1] = "asc",
+    start: Optional[Text] = None,
+    before: Optional[Text] = None,
+    limit: int = 20,
+    where: Optional[Callable[[T], bool]] = None,
+) -> Dict:
+    """Walk a sorted index and collect at most `limit` matching records."""
+
+    data: List[T] = []
+    has_more = False
+    for record_id in _index_range(index, sort=sort, start=start, before=before):
+        record = records[record_id]
+        if where is not None and not where(record):
+            continue
+        if len(data) >= limit:
+            has_more = True
+            break
+        data.append(record)
+    return {
+        "object": "list",
+        "data": data,
+        "first_id": getattr(data[0], "id") if data else None,
+        "last_id": getattr(data[-1], "id") if data else None,
+        "has_more": has_more,
+    }
 
 
 class DatabaseMemory(DatabaseBase):
@@ -42,15 +133,47 @@ class DatabaseMemory(DatabaseBase):
     def __init__(self, *arg, **kwargs):
         self._url = None
         self._db = _BD(
-            cached_tokens=[],
-            blacklisted_tokens=[],
-            organizations=[],
-            users=[
-                UserInDB.model_validate(u)
+            cached_tokens={},
+            blacklisted_tokens={},
+            organizations={},
+            users={
+                u["id"]: UserInDB.model_validate(u)
                 for u in dict(self.fake_super_admin_init).values()
-            ],
-            conversations=[],
+            },
+            conversations={},
+            messages={},
         )
+        # Sorted id indexes, UUIDv7 ids sort by creation time
+        self._organization_ids: List[Text] = sorted(self._db["organizations"])
+        self._user_ids: List[Text] = sorted(self._db["users"])
+        self._user_ids_by_org: Dict[Optional[Text], List[Text]] = {}
+        for user in self._db["users"].values():
+            _index_insert(
+                self._user_ids_by_org.setdefault(user.organization_id, []), user.id
+            )
+        self._conversation_ids: List[Text] = sorted(self._db["conversations"])
+        self._conversation_ids_by_org: Dict[Optional[Text], List[Text]] = {}
+        self._conversation_ids_by_participant: Dict[Text, List[Text]] = {}
+        for conversation in self._db["conversations"].values():
+            self._index_conversation(conversation)
+        # Per-conversation message logs, appended in id order
+        self._message_ids_by_conversation: Dict[Text, List[Text]] = {}
+        for message in self._db["messages"].values():
+            _index_insert(
+                self._message_ids_by_conversation.setdefault(
+                    message.conversation_id, []
+                ),
+                message.id,
+            )
+        # Session indexes, values are access token digests
+        self._session_digests_by_refresh: Dict[Text, Text] = {}
+        self._session_digests_by_username: Dict[Text, Dict[Text, None]] = {}
+        # Min-heap of (expires_at, token digest) for sweeping the blacklist
+        self._blacklist_expiry: List[Tuple[int, Text]] = []
+        # Usernames are unique across organizations
+        self._user_ids_by_username: Dict[Text, Text] = {
+            user.username: user.id for user in self._db["users"].values()
+        }
 
     @property
     def client(self) -> _BD:
@@ -68,51 +191,45 @@ class DatabaseMemory(DatabaseBase):
     ) -> "Pagination[Organization]":
         limit = min(limit or 1000, 1000)
         organizations = self._db["organizations"]
+        index: Sequence[Text] = self._organization_ids
         if organization_id is not None:
-            organizations = [org for org in organizations if org.id == organization_id]
+            index = [organization_id] if organization_id in organizations else []
         if organization_ids is not None:
-            organizations = [org for org in organizations if org.id in organization_ids]
-        if disabled is not None:
-            organizations = [org for org in organizations if org.disabled == disabled]
-        if sort in ("asc", 1):
-            organizations = sorted(organizations, key=lambda org: org.id)
-        else:
-            organizations = sorted(organizations, key=lambda org: org.id, reverse=True)
-        if start:
-            organizations = [
-                org
-                for org in organizations
-                if (org.id >= start if sort in ("asc", 1) else org.id <= start)
-            ]
-        if before:
-            organizations = [
-                org
-                for org in organizations
-                if (org.id < before if sort in ("asc", 1) else org.id > before)
-            ]
+            index = sorted(
+                set(
+                    org_id
+                    for org_id in organization_ids
+                    if org_id in organizations
+                    and (organization_id is None or org_id == organization_id)
+                )
+            )
+
+        def where(org: "Organization") -> bool:
+            return disabled is None or org.disabled == disabled
+
         return Pagination[Organization].model_validate(
-            {
-                "object": "list",
-                "data": organizations[:limit],
-                "first_id": organizations[0].id if organizations else None,
-                "last_id": organizations[-1].id if organizations else None,
-                "has_more": len(organizations) > limit,
-            }
+            _keyset_page(
+                index,
+                organizations,
+                sort=sort,
+                start=start,
+                before=before,
+                limit=limit,
+                where=where,
+            )
         )
 
     async def retrieve_organization(
         self, organization_id: Text
     ) -> Optional["Organization"]:
-        for org in self._db["organizations"]:
-            if org.id == organization_id:
-                return org
-        return None
+        return self._db["organizations"].get(organization_id)
 
     async def create_organization(
         self, *, organization_create: "OrganizationCreate", owner_id: Text
     ) -> Optional["Organization"]:
         org = organization_create.to_organization(owner_id=owner_id)
-        self._db["organizations"].append(org)
+        self._db["organizations"][org.id] = org
+        _index_insert(self._organization_ids, org.id)
         return org
 
     async def update_organization(
@@ -122,10 +239,7 @@ class DatabaseMemory(DatabaseBase):
         if org is None:
             return None
         updated_org = organization_update.apply_organization(org)
-        for i, o in enumerate(self._db["organizations"]):
-            if o.id == organization_id:
-                self._db["organizations"][i] = updated_org
-                break
+        self._db["organizations"][organization_id] = updated_org
         return updated_org
 
     async def delete_organization(
@@ -139,30 +253,27 @@ class DatabaseMemory(DatabaseBase):
             org.disabled = True
             return org
         else:
-            self._db["organizations"] = [
-                o for o in self._db["organizations"] if o.id != organization_id
-            ]
+            self._db["organizations"].pop(organization_id, None)
+            _index_remove(self._organization_ids, organization_id)
             return org
 
     async def retrieve_user(
         self, user_id: Text, *, organization_id: Optional[Text] = None
     ) -> Optional["UserInDB"]:
-        for user in self._db["users"]:
-            if organization_id is not None and user.organization_id != organization_id:
-                continue
-            if user.id == user_id:
-                return user
-        return None
+        user = self._db["users"].get(user_id)
+        if user is None:
+            return None
+        if organization_id is not None and user.organization_id != organization_id:
+            return None
+        return user
 
     async def retrieve_user_by_username(
         self, username: Text, organization_id: Optional[Text] = None
     ) -> Optional["UserInDB"]:
-        for user in self._db["users"]:
-            if organization_id is not None and user.organization_id != organization_id:
-                continue
-            if user.username == username:
-                return user
-        return None
+        user_id = self._user_ids_by_username.get(username)
+        if user_id is None:
+            return None
+        return await self.retrieve_user(user_id, organization_id=organization_id)
 
     async def list_users(
         self,
@@ -177,39 +288,29 @@ class DatabaseMemory(DatabaseBase):
         limit: Optional[int] = 20,
     ) -> Pagination[UserInDB]:
         limit = min(limit or 1000, 1000)
-        users = self._db["users"]
+        index: Sequence[Text] = self._user_ids
         if organization_id is not None:
-            users = [user for user in users if user.organization_id == organization_id]
-        if role is not None:
-            users = [user for user in users if user.role == role]
-        if roles is not None:
-            users = [user for user in users if user.role in roles]
-        if disabled is not None:
-            users = [user for user in users if user.disabled == disabled]
-        if sort in ("asc", 1):
-            users = sorted(users, key=lambda user: user.id)
-        else:
-            users = sorted(users, key=lambda user: user.id, reverse=True)
-        if start:
-            users = [
-                user
-                for user in users
-                if (user.id >= start if sort in ("asc", 1) else user.id <= start)
-            ]
-        if before:
-            users = [
-                user
-                for user in users
-                if (user.id < before if sort in ("asc", 1) else user.id > before)
-            ]
+            index = self._user_ids_by_org.get(organization_id, [])
+
+        def where(user: "UserInDB") -> bool:
+            if role is not None and user.role != role:
+                return False
+            if roles is not None and user.role not in roles:
+                return False
+            if disabled is not None and user.disabled != disabled:
+                return False
+            return True
+
         return Pagination[UserInDB].model_validate(
-            {
-                "object": "list",
-                "data": users[:limit],
-                "first_id": users[0].id if users else None,
-                "last_id": users[-1].id if users else None,
-                "has_more": len(users) > limit,
-            }
+            _keyset_page(
+                index,
+                self._db["users"],
+                sort=sort,
+                start=start,
+                before=before,
+                limit=limit,
+                where=where,
+            )
         )
 
     async def update_user(
@@ -226,10 +327,10 @@ class DatabaseMemory(DatabaseBase):
             return None
         updated_user = user_update.apply_user(user)
         updated_user_db = updated_user.to_db_model(hashed_password=user.hashed_password)
-        for i, u in enumerate(self._db["users"]):
-            if u.id == user_id:
-                self._db["users"][i] = updated_user_db
-                break
+        self._db["users"][user_id] = updated_user_db
+        if updated_user_db.username != user.username:
+            self._user_ids_by_username.pop(user.username, None)
+            self._user_ids_by_username[updated_user_db.username] = user_id
         return updated_user_db
 
     async def create_user(
@@ -247,7 +348,12 @@ class DatabaseMemory(DatabaseBase):
         if await self.retrieve_user_by_username(user.username):
             return None
         user_db = user.to_db_model(hashed_password=hashed_password)
-        self._db["users"].append(user_db)
+        self._db["users"][user_db.id] = user_db
+        self._user_ids_by_username[user_db.username] = user_db.id
+        _index_insert(self._user_ids, user_db.id)
+        _index_insert(
+            self._user_ids_by_org.setdefault(user_db.organization_id, []), user_db.id
+        )
         return user_db
 
     async def delete_user(
@@ -264,71 +370,171 @@ class DatabaseMemory(DatabaseBase):
         if user is None:
             return False
         if soft_delete:
-            for i, u in enumerate(self._db["users"]):
-                if u.id == user_id:
-                    self._db["users"][i].disabled = True
-                    break
+            user.disabled = True
         else:
-            self._db["users"] = [u for u in self._db["users"] if u.id != user_id]
-            user.disabled
+            self._db["users"].pop(user_id, None)
+            self._user_ids_by_username.pop(user.username, None)
+            _index_remove(self._user_ids, user_id)
+            _index_remove(self._user_ids_by_org.get(user.organization_id, []), user_id)
         return out
 
     async def retrieve_cached_token(self, username: Text) -> Optional["TokenInDB"]:
-        for token in self._db["cached_tokens"]:
-            if token.username == username and not await self.is_token_blocked(
-                token.access_token
-            ):
-                return token
-        return None
+        """Return the most recent session of the user."""
+
+        digests = self._session_digests_by_username.get(username)
+        if not digests:
+            return None
+        return self._db["cached_tokens"].get(next(reversed(digests)))
+
+    async def retrieve_cached_token_by_token(
+        self, token: Text
+    ) -> Optional["TokenInDB"]:
+        """Return the session owning the given access or refresh token."""
+
+        digest = token_digest(token)
+        digest = self._session_digests_by_refresh.get(digest, digest)
+        return self._db["cached_tokens"].get(digest)
 
     async def caching_token(
         self, username: Text, token: Token
     ) -> Optional["TokenInDB"]:
-        token_db = await self.retrieve_cached_token(username)
-        if token_db:
-            return None
-        token_db = token.to_db_model(username=username)
-        self._db["cached_tokens"].append(token_db)
+        token_db = (
+            token
+            if isinstance(token, TokenInDB)
+            else token.to_db_model(username=username)
+        )
+        digests = self._session_digests_by_username.setdefault(username, {})
+        self._db["cached_tokens"][token_db.access_token_digest] = token_db
+        self._session_digests_by_refresh[token_db.refresh_token_digest] = (
+            token_db.access_token_digest
+        )
+        digests[token_db.access_token_digest] = None
+
+        # Revoke the oldest sessions beyond the per-user limit
+        while len(digests) > max(settings.MAX_SESSIONS_PER_USER, 1):
+            oldest = self._db["cached_tokens"].get(next(iter(digests)))
+            if oldest is None:
+                digests.pop(next(iter(digests)))
+                continue
+            await self.invalidate_token(oldest)
         return token_db
 
     async def invalidate_token(self, token: Optional["Token"]):
         if token is None:
             return
-        for i, t in enumerate(self._db["cached_tokens"]):
-            if t.md5() == token.md5():
-                self._db["cached_tokens"].pop(i)
-                break
-        self._db["blacklisted_tokens"].append(
-            TokenBlacklisted.model_validate({"token": token.access_token})
-        )
-        self._db["blacklisted_tokens"].append(
-            TokenBlacklisted.model_validate({"token": token.refresh_token})
+        if isinstance(token, TokenInDB):
+            access_digest = token.access_token_digest
+            refresh_digest = token.refresh_token_digest
+        else:
+            access_digest = token_digest(token.access_token)
+            refresh_digest = token_digest(token.refresh_token)
+        token_db = self._db["cached_tokens"].pop(access_digest, None)
+        self._session_digests_by_refresh.pop(refresh_digest, None)
+        if token_db is not None:
+            digests = self._session_digests_by_username.get(token_db.username)
+            if digests is not None:
+                digests.pop(access_digest, None)
+                if not digests:
+                    del self._session_digests_by_username[token_db.username]
+        self._blacklist_token(token.access_token, digest=access_digest)
+        self._blacklist_token(token.refresh_token, digest=refresh_digest)
+
+    async def revoke_token(
+        self, token: Text, *, session_id: Optional[Text] = None
+    ) -> None:
+        """Blacklist a token whose session is not stored here, e.g. issued by
+        another worker, and every other token of its session."""
+
+        self._blacklist_token(token)
+        if session_id is not None:
+            # The session lives as long as its refresh token at most
+            self._revoke_digest(
+                session_digest(session_id),
+                expires_at=int(time.time())
+                + settings.REFRESH_TOKEN_EXPIRE_DAYS * 86400,
+            )
+
+    async def is_token_blocked(
+        self, token: Text, *, session_id: Optional[Text] = None
+    ) -> bool:
+        blacklisted_tokens = self._db["blacklisted_tokens"]
+        if token_digest(token) in blacklisted_tokens:
+            return True
+        return session_id is not None and (
+            session_digest(session_id) in blacklisted_tokens
         )
 
-    async def is_token_blocked(self, token: Text) -> bool:
-        for blacklisted_token in self._db["blacklisted_tokens"]:
-            if blacklisted_token.token == token:
-                return True
-        return False
+    async def sweep_blacklisted_tokens(self, now: Optional[int] = None) -> int:
+        """Drop blacklisted tokens that have expired and can no longer be used."""
+
+        now = int(time.time()) if now is None else now
+        blacklisted_tokens = self._db["blacklisted_tokens"]
+        count = 0
+        while self._blacklist_expiry and self._blacklist_expiry[0][0] < now:
+            expires_at, digest = heapq.heappop(self._blacklist_expiry)
+            if blacklisted_tokens.get(digest) == expires_at:
+                del blacklisted_tokens[digest]
+                count += 1
+        return count
+
+    def _blacklist_token(self, token: Text, *, digest: Optional[Text] = None) -> None:
+        digest = token_digest(token) if digest is None else digest
+        forget_verified_token(digest=digest)
+        if digest in self._db["blacklisted_tokens"]:
+            return
+        expires_at = get_token_expires_at(token)
+        if expires_at is None:
+            expires_at = int(time.time()) + settings.REFRESH_TOKEN_EXPIRE_DAYS * 86400
+        self._revoke_digest(digest, expires_at=expires_at)
+
+    def _revoke_digest(self, digest: Text, *, expires_at: int) -> None:
+        """Blacklist a digest and publish the revocation to the other workers."""
+
+        if digest in self._db["blacklisted_tokens"]:
+            return
+        self._blacklist_digest(digest, expires_at=expires_at)
+        if self.event_bus is not None:
+            self.event_bus.publish(
+                TOPIC_TOKEN_REVOKED,
+                {"digest": digest, "expires_at": expires_at},
+                key=digest,
+            )
+
+    async def blacklist_token_digest(self, digest: Text, *, expires_at: int) -> None:
+        """Blacklist a token revoked by another worker."""
+
+        if digest not in self._db["blacklisted_tokens"]:
+            self._blacklist_digest(digest, expires_at=expires_at)
+
+    def _blacklist_digest(self, digest: Text, *, expires_at: int) -> None:
+        self._db["blacklisted_tokens"][digest] = expires_at
+        heapq.heappush(self._blacklist_expiry, (expires_at, digest))
 
     async def create_conversation(
-        self, *, conversation_create: "ConversationCreate"
+        self,
+        *,
+        conversation_create: "ConversationCreate",
+        organization_id: Optional[Text] = None,
     ) -> "ConversationInDB":
         """Create a new conversation in the database."""
 
-        conversation = conversation_create.to_conversation()
-        conversation = ConversationInDB.model_validate(conversation)
+        conversation = conversation_create.to_conversation(
+            organization_id=organization_id
+        )
+        conversation = ConversationInDB.model_validate(conversation.model_dump())
 
         # Validate conversation data
-        if any(c.id == conversation.id for c in self._db["conversations"]):
+        if conversation.id in self._db["conversations"]:
             raise ValueError("Conversation already exists")
 
-        self._db["conversations"].append(conversation)
+        self._db["conversations"][conversation.id] = conversation
+        self._index_conversation(conversation)
         return conversation
 
     async def list_conversations(
         self,
         *,
+        organization_id: Optional[Text] = None,
         participants: Optional[Sequence[Text]] = None,
         disabled: Optional[bool] = None,
         sort: Literal["asc", "desc", 1, -1] = "asc",
@@ -339,55 +545,44 @@ class DatabaseMemory(DatabaseBase):
         """List conversations from the database."""
 
         limit = min(limit or 1000, 1000)
-        conversations = self._db["conversations"]
-        if participants is not None:
-            conversations = [
-                conversation
-                for conversation in conversations
-                if set(participants) <= set(conversation.participants)
-            ]
-        if disabled is not None:
-            conversations = [
-                conversation
-                for conversation in conversations
-                if conversation.disabled == disabled
-            ]
-        if sort in ("asc", 1):
-            conversations = sorted(
-                conversations, key=lambda conversation: conversation.id
-            )
-        else:
-            conversations = sorted(
-                conversations, key=lambda conversation: conversation.id, reverse=True
+        index: Sequence[Text] = self._conversation_ids
+        if organization_id is not None:
+            index = self._conversation_ids_by_org.get(organization_id, [])
+        if participants:
+            # Walk the smallest participant index and check the others
+            index = min(
+                (
+                    self._conversation_ids_by_participant.get(user_id, [])
+                    for user_id in participants
+                ),
+                key=len,
             )
-        if start:
-            conversations = [
-                conversation
-                for conversation in conversations
-                if (
-                    conversation.id >= start
-                    if sort in ("asc", 1)
-                    else conversation.id <= start
-                )
-            ]
-        if before:
-            conversations = [
-                conversation
-                for conversation in conversations
-                if (
-                    conversation.id < before
-                    if sort in ("asc", 1)
-                    else conversation.id > before
-                )
-            ]
+        participant_ids = set(participants or [])
+
+        def where(conversation: "ConversationInDB") -> bool:
+            if (
+                organization_id is not None
+                and conversation.organization_id != organization_id
+            ):
+                return False
+            if len(participant_ids) > 1 and not participant_ids <= {
+                p.user_id for p in conversation.participants
+            }:
+                return False
+            if disabled is not None and conversation.disabled != disabled:
+                return False
+            return True
+
         return Pagination[ConversationInDB].model_validate(
-            {
-                "object": "list",
-                "data": conversations[:limit],
-                "first_id": conversations[0].id if conversations else None,
-                "last_id": conversations[-1].id if conversations else None,
-                "has_more": len(conversations) > limit,
-            }
+            _keyset_page(
+                index,
+                self._db["conversations"],
+                sort=sort,
+                start=start,
+                before=before,
+                limit=limit,
+                where=where,
+            )
         )
 
     async def retrieve_conversation(
@@ -397,10 +592,7 @@ class DatabaseMemory(DatabaseBase):
     ) -> Optional["ConversationInDB"]:
         """Retrieve a conversation from the database."""
 
-        for conversation in self._db["conversations"]:
-            if conversation.id == conversation_id:
-                return conversation
-        return None
+        return self._db["conversations"].get(conversation_id)
 
     async def update_conversation(
         self,
@@ -410,15 +602,16 @@ class DatabaseMemory(DatabaseBase):
     ) -> Optional["ConversationInDB"]:
         """Update a conversation in the database."""
 
-        conversation = await self.retrieve_conversation(conversation_id=conversation_id)
-        if conversation is None:
+        conversation_old = await self.retrieve_conversation(
+            conversation_id=conversation_id
+        )
+        if conversation_old is None:
             return None
-        conversation = conversation_update.apply_conversation(conversation)
+        conversation = conversation_update.apply_conversation(conversation_old)
         conversation = ConversationInDB.model_validate(conversation.model_dump())
-        for i, c in enumerate(self._db["conversations"]):
-            if c.id == conversation_id:
-                self._db["conversations"][i] = conversation
-                break
+        self._unindex_conversation(conversation_old)
+        self._db["conversations"][conversation_id] = conversation
+        self._index_conversation(conversation)
         return conversation
 
     async def delete_conversation(
@@ -429,17 +622,136 @@ class DatabaseMemory(DatabaseBase):
     ) -> None:
         """Delete a conversation from the database."""
 
+        conversation = await self.retrieve_conversation(conversation_id=conversation_id)
+        if conversation is None:
+            return
         if soft_delete:
-            conversation = await self.retrieve_conversation(
-                conversation_id=conversation_id
+            conversation.disabled = True
+        else:
+            self._db["conversations"].pop(conversation_id, None)
+            self._unindex_conversation(conversation)
+
+    async def create_message(
+        self,
+        *,
+        conversation_id: Text,
+        sender_id: Text,
+        message_create: "MessageCreate",
+    ) -> "MessageInDB":
+        """Append a new message to the conversation log."""
+
+        message = message_create.to_message(
+            conversation_id=conversation_id, sender_id=sender_id
+        )
+        message = MessageInDB.model_validate(message.model_dump())
+
+        # Validate message data
+        if message.id in self._db["messages"]:
+            raise ValueError("Message already exists")
+
+        self._db["messages"][message.id] = message
+        # UUIDv7 ids grow over time, so this is an append in practice
+        _index_insert(
+            self._message_ids_by_conversation.setdefault(conversation_id, []),
+            message.id,
+        )
+        conversation = self._db["conversations"].get(conversation_id)
+        if conversation is not None:
+            conversation.last_message_at = message.created_at
+        return message
+
+    async def list_messages(
+        self,
+        *,
+        conversation_id: Text,
+        sort: Literal["asc", "desc", 1, -1] = "desc",
+        start: Optional[Text] = None,
+        before: Optional[Text] = None,
+        limit: Optional[int] = 20,
+    ) -> Pagination[MessageInDB]:
+        """List messages of a conversation, the latest first by default."""
+
+        limit = min(limit or 1000, 1000)
+        return Pagination[MessageInDB].model_validate(
+            _keyset_page(
+                self._message_ids_by_conversation.get(conversation_id, []),
+                self._db["messages"],
+                sort=sort,
+                start=start,
+                before=before,
+                limit=limit,
             )
-            if conversation is not None:
-                conversation.disabled = True
-                for i, c in enumerate(self._db["conversations"]):
-                    if c.id == conversation_id:
-                        self._db["conversations"][i] = conversation
-                        break
+        )
+
+    async def retrieve_message(
+        self, *, conversation_id: Text, message_id: Text
+    ) -> Optional["MessageInDB"]:
+        """Retrieve a message of the conversation."""
+
+        message = self._db["messages"].get(message_id)
+        if message is None or message.conversation_id != conversation_id:
+            return None
+        return message
+
+    async def update_message(
+        self,
+        *,
+        conversation_id: Text,
+        message_id: Text,
+        message_update: "MessageUpdate",
+    ) -> Optional["MessageInDB"]:
+        """Update a message of the conversation."""
+
+        message = await self.retrieve_message(
+            conversation_id=conversation_id, message_id=message_id
+        )
+        if message is None:
+            return None
+        return message_update.apply_to_message(message)
+
+    async def delete_message(
+        self, *, conversation_id: Text, message_id: Text, soft_delete: bool = True
+    ) -> Optional["MessageInDB"]:
+        """Delete a message of the conversation."""
+
+        message = await self.retrieve_message(
+            conversation_id=conversation_id, message_id=message_id
+        )
+        if message is None:
+            return None
+        if soft_delete:
+            message.is_deleted = True
         else:
-            self._db["conversations"] = [
-                c for c in self._db["conversations"] if c.id != conversation_id
-            ]
+            self._db["messages"].pop(message_id, None)
+            _index_remove(
+                self._message_ids_by_conversation.get(conversation_id, []), message_id
+            )
+        return message
+
+    def _index_conversation(self, conversation: "ConversationInDB") -> None:
+        _index_insert(self._conversation_ids, conversation.id)
+        _index_insert(
+            self._conversation_ids_by_org.setdefault(conversation.organization_id, []),
+            conversation.id,
+        )
+        for participant in conversation.participants:
+            _index_insert(
+                self._conversation_ids_by_participant.setdefault(
+                    participant.user_id, []
+                ),
+                conversation.id,
+            )
+
+    def _unindex_conversation(self, conversation: "ConversationInDB") -> None:
+        _index_remove(self._conversation_ids, conversation.id)
+        _index_remove(
+            self._conversation_ids_by_org.get(conversation.organization_id, []),
+            conversation.id,
+        )
+        for participant in conversation.participants:
+            index = self._conversation_ids_by_participant.get(participant.user_id)
+            if index is None:
+                continue
+            _index_remove(index, conversation.id)
+            if not index:
+                del self._conversation_ids_by_participant[participant.user_id]
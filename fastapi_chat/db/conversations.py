@@ -13,18 +13,24 @@ if TYPE_CHECKING:
 
 
 async def create_conversation(
-    db: "DatabaseBase", *, conversation_create: "ConversationCreate"
+    db: "DatabaseBase",
+    *,
+    conversation_create: "ConversationCreate",
+    organization_id: Optional[Text] = None,
 ) -> "ConversationInDB":
     """Create a new conversation in the database."""
 
     return await run_as_coro(
-        db.create_conversation, conversation_create=conversation_create
+        db.create_conversation,
+        conversation_create=conversation_create,
+        organization_id=organization_id,
     )
 
 
 async def list_conversations(
     db: "DatabaseBase",
     *,
+    organization_id: Optional[Text] = None,
     participants: Optional[Sequence[Text]] = None,
     disabled: Optional[bool] = None,
     sort: Literal["asc", "desc", 1, -1] = "asc",
@@ -36,6 +42,7 @@ async def list_conversations(
 
     return await run_as_coro(
         db.list_conversations,
+        organization_id=organization_id,
         participants=participants,
         disabled=disabled,
         sort=sort,
@@ -50,7 +57,7 @@ async def retrieve_conversation(
 ) -> Optional["ConversationInDB"]:
     """Retrieve a conversation from the database."""
 
-    return await run_as_coro(db.retrieve_conversation, conversation_id)
+    return await run_as_coro(db.retrieve_conversation, conversation_id=conversation_id)
 
 
 async def update_conversation(
@@ -1,115 +1,90 @@
-from typing import Annotated, Dict, List, Literal, Optional, Text
+from typing import TYPE_CHECKING, Literal, Optional, Text
 
-from fastapi_chat.schemas.messages import Message, MessageUpdate
+from fastapi_chat.schemas.messages import MessageCreate, MessageInDB, MessageUpdate
 from fastapi_chat.schemas.pagination import Pagination
+from fastapi_chat.utils.common import run_as_coro
 
-fake_messages_db: Annotated[
-    Dict[Text, List["Message"]], "conversation_id: messages"
-] = {}
+if TYPE_CHECKING:
+    from fastapi_chat.db._base import DatabaseBase
 
 
-def list_messages(
-    db=fake_messages_db,
+async def list_messages(
+    db: "DatabaseBase",
     *,
     conversation_id: Text,
     sort: Literal["asc", "desc", 1, -1] = "desc",
     start: Optional[Text] = None,
     before: Optional[Text] = None,
-    limit: int = 20,
-) -> Pagination[Message]:
+    limit: Optional[int] = 20,
+) -> Pagination[MessageInDB]:
     """Retrieve messages for a specific conversation."""
 
-    limit = min(limit or 1000, 1000)
-    messages = [
-        Message.model_validate(message)
-        for message in fake_messages_db.get(conversation_id, [])
-    ]
-    if sort in ("asc", 1):
-        messages = sorted(messages, key=lambda message: message.id)
-    else:
-        messages = sorted(messages, key=lambda message: message.id, reverse=True)
-    if start:
-        messages = [
-            message
-            for message in messages
-            if (message.id >= start if sort in ("asc", 1) else message.id <= start)
-        ]
-    if before:
-        messages = [
-            message
-            for message in messages
-            if (message.id < before if sort in ("asc", 1) else message.id > before)
-        ]
-    return Pagination[Message].model_validate(
-        {
-            "object": "list",
-            "data": messages[:limit],
-            "first_id": messages[0].id if messages else None,
-            "last_id": messages[-1].id if messages else None,
-            "has_more": len(messages) > limit,
-        }
+    return await run_as_coro(
+        db.list_messages,
+        conversation_id=conversation_id,
+        sort=sort,
+        start=start,
+        before=before,
+        limit=limit,
     )
 
 
-def retrieve_message(
-    db=fake_messages_db,
-    *,
-    conversation_id: Text,
-    message_id: Text,
-) -> Optional["Message"]:
+async def retrieve_message(
+    db: "DatabaseBase", *, conversation_id: Text, message_id: Text
+) -> Optional["MessageInDB"]:
     """Retrieve a message from a conversation."""
 
-    for message in db.get(conversation_id, []):
-        if message.id == message_id:
-            return message
-    return None
+    return await run_as_coro(
+        db.retrieve_message, conversation_id=conversation_id, message_id=message_id
+    )
 
 
-def create_message(
-    db=fake_messages_db,
+async def create_message(
+    db: "DatabaseBase",
     *,
     conversation_id: Text,
-    message: "Message",
-) -> "Message":
+    sender_id: Text,
+    message_create: "MessageCreate",
+) -> "MessageInDB":
     """Create a new message in a conversation."""
 
-    db.setdefault(conversation_id, []).append(message)
-    return message
+    return await run_as_coro(
+        db.create_message,
+        conversation_id=conversation_id,
+        sender_id=sender_id,
+        message_create=message_create,
+    )
 
 
-def update_message(
-    db=fake_messages_db,
+async def update_message(
+    db: "DatabaseBase",
     *,
     conversation_id: Text,
     message_id: Text,
     message_update: "MessageUpdate",
-) -> Optional["Message"]:
+) -> Optional["MessageInDB"]:
     """Update a message in a conversation."""
 
-    messages = db.get(conversation_id, [])
-    for i, m in enumerate(messages):
-        if m.id == message_id:
-            updated_msg = message_update.apply_to_message(m)
-            messages[i] = updated_msg
-            return messages[i]
-    return None
+    return await run_as_coro(
+        db.update_message,
+        conversation_id=conversation_id,
+        message_id=message_id,
+        message_update=message_update,
+    )
 
 
-def delete_message(
-    db=fake_messages_db,
+async def delete_message(
+    db: "DatabaseBase",
     *,
     conversation_id: Text,
     message_id: Text,
     soft_delete: bool = True,
-) -> Optional["Message"]:
+) -> Optional["MessageInDB"]:
     """Delete a message from a conversation."""
 
-    messages = db.get(conversation_id, [])
-    for i, m in enumerate(messages):
-        if m.id == message_id:
-            if soft_delete:
-                messages[i].is_deleted = True
-                return messages[i]
-            else:
-                return messages.pop(i)
-    return None
+    return await run_as_coro(
+        db.delete_message,
+        conversation_id=conversation_id,
+        message_id=message_id,
+        soft_delete=soft_delete,
+    )
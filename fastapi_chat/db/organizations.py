@@ -1,5 +1,7 @@
 from typing import TYPE_CHECKING, Literal, Optional, Sequence, Text
 
+from fastapi_chat.config import settings
+from fastapi_chat.db._cache import RecordCache, get_record_cache, publish_invalidation
 from fastapi_chat.schemas.organizations import (
     Organization,
     OrganizationCreate,
@@ -12,6 +14,25 @@ if TYPE_CHECKING:
     from fastapi_chat.db._base import DatabaseBase
 
 
+def get_organization_cache(db: "DatabaseBase") -> RecordCache[Organization]:
+    """Return the organization cache of the database, keyed by organization ID."""
+
+    return get_record_cache(
+        db,
+        "organizations",
+        maxsize=settings.ORG_CACHE_SIZE,
+        ttl=settings.ORG_CACHE_TTL_SECONDS,
+        negative_ttl=settings.ORG_CACHE_NEGATIVE_TTL_SECONDS,
+    )
+
+
+def invalidate_cached_organization(
+    db: "DatabaseBase", *, organization_id: Text
+) -> None:
+    get_organization_cache(db).invalidate(organization_id)
+    publish_invalidation(db, "organizations", organization_id)
+
+
 async def list_organizations(
     db: "DatabaseBase",
     *,
@@ -54,11 +75,13 @@ async def update_organization(
     organization_id: Text,
     organization_update: OrganizationUpdate,
 ) -> Optional[Organization]:
-    return await run_as_coro(
+    org = await run_as_coro(
         db.update_organization,
         organization_id=organization_id,
         organization_update=organization_update,
     )
+    invalidate_cached_organization(db, organization_id=organization_id)
+    return org
 
 
 async def retrieve_organization(
@@ -66,7 +89,18 @@ async def retrieve_organization(
     *,
     organization_id: Text,
 ) -> Optional[Organization]:
-    return await run_as_coro(db.retrieve_organization, organization_id)
+    cache = get_organization_cache(db)
+    if cache.is_missing(organization_id):
+        return None
+    org = cache.get(organization_id)
+    if org is not None:
+        return org
+    org = await run_as_coro(db.retrieve_organization, organization_id)
+    if org is None:
+        cache.set_missing(organization_id)
+    else:
+        cache.set(organization_id, org)
+    return org
 
 
 async def delete_organization(
@@ -75,6 +109,8 @@ async def delete_organization(
     organization_id: Text,
     soft_delete: bool = True,
 ) -> Optional[Organization]:
-    return await run_as_coro(
+    org = await run_as_coro(
         db.delete_organization, organization_id=organization_id, soft_delete=soft_delete
     )
+    invalidate_cached_organization(db, organization_id=organization_id)
+    return org
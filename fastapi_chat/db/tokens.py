@@ -1,6 +1,9 @@
+import asyncio
 from typing import TYPE_CHECKING, Optional, Text
 
+from fastapi_chat.config import logger
 from fastapi_chat.utils.common import run_as_coro
+from fastapi_chat.utils.oauth import forget_verified_token
 
 if TYPE_CHECKING:
     from fastapi_chat.db._base import DatabaseBase
@@ -23,13 +26,58 @@ async def retrieve_cached_token(
     return await run_as_coro(db.retrieve_cached_token, username)
 
 
+async def retrieve_cached_token_by_token(
+    db: "DatabaseBase", *, token: Text
+) -> Optional["TokenInDB"]:
+    """Get the cached token owning the given access or refresh token."""
+
+    return await run_as_coro(db.retrieve_cached_token_by_token, token)
+
+
 async def invalidate_token(db: "DatabaseBase", *, token: Optional["Token"]):
     """Invalidate the token for the given user."""
 
     await run_as_coro(db.invalidate_token, token)
+    if token is not None:
+        forget_verified_token(token.access_token)
+        forget_verified_token(token.refresh_token)
+
+
+async def revoke_token(
+    db: "DatabaseBase", *, token: Text, session_id: Optional[Text] = None
+):
+    """Revoke a token without a cached session, and the tokens of its session."""
+
+    await run_as_coro(db.revoke_token, token, session_id=session_id)
+    forget_verified_token(token)
+
+
+async def is_token_blocked(
+    db: "DatabaseBase", *, token: Text, session_id: Optional[Text] = None
+) -> bool:
+    """Check if the token or its session is in the blacklist."""
+
+    return await run_as_coro(db.is_token_blocked, token, session_id=session_id)
+
+
+async def sweep_blacklisted_tokens(db: "DatabaseBase") -> int:
+    """Remove expired tokens from the blacklist."""
+
+    return await run_as_coro(db.sweep_blacklisted_tokens)
 
 
-async def is_token_blocked(db: "DatabaseBase", *, token: Text) -> bool:
-    """Check if the token is in the blacklist."""
+async def run_blacklist_sweeper(db: "DatabaseBase", *, interval: float) -> None:
+    """Periodically remove expired tokens from the blacklist until cancelled."""
 
-    return await run_as_coro(db.is_token_blocked, token)
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            count = await sweep_blacklisted_tokens(db)
+        except NotImplementedError:
+            logger.warning("Database %s does not support blacklist sweeping", db)
+            return
+        except Exception as e:
+            logger.exception(e)
+            continue
+        if count:
+            logger.debug("Swept %d expired tokens from the blacklist", count)
@@ -1,5 +1,7 @@
 from typing import TYPE_CHECKING, Literal, Optional, Sequence, Text
 
+from fastapi_chat.config import settings
+from fastapi_chat.db._cache import RecordCache, get_record_cache, publish_invalidation
 from fastapi_chat.schemas.pagination import Pagination
 from fastapi_chat.utils.common import run_as_coro
 
@@ -10,16 +12,46 @@ if TYPE_CHECKING:
     from fastapi_chat.db._base import DatabaseBase
 
 
+def get_user_cache(db: "DatabaseBase") -> RecordCache[UserInDB]:
+    """Return the user cache of the database, keyed by user ID and username."""
+
+    return get_record_cache(
+        db,
+        "users",
+        maxsize=settings.USER_CACHE_SIZE,
+        ttl=settings.USER_CACHE_TTL_SECONDS,
+    )
+
+
+def invalidate_cached_user(db: "DatabaseBase", *, user_id: Text) -> None:
+    get_user_cache(db).invalidate(user_id)
+    publish_invalidation(db, "users", user_id)
+
+
 async def get_user(db: "DatabaseBase", *, username: Text) -> Optional["UserInDB"]:
-    return await run_as_coro(db.retrieve_user_by_username, username)
+    cache = get_user_cache(db)
+    user = cache.get_by_alias(username)
+    if user is not None and user.username == username:
+        return user
+    user = await run_as_coro(db.retrieve_user_by_username, username)
+    if user is not None:
+        cache.set(user.id, user, aliases=(user.username,))
+    return user
 
 
 async def get_user_by_id(
     db: "DatabaseBase", *, user_id: Text, organization_id: Optional[Text] = None
 ) -> Optional["UserInDB"]:
-    return await run_as_coro(
-        db.retrieve_user, organization_id=organization_id, user_id=user_id
-    )
+    cache = get_user_cache(db)
+    user = cache.get(user_id)
+    if user is None:
+        user = await run_as_coro(db.retrieve_user, user_id=user_id)
+        if user is None:
+            return None
+        cache.set(user.id, user, aliases=(user.username,))
+    if organization_id is not None and user.organization_id != organization_id:
+        return None
+    return user
 
 
 async def list_users(
@@ -58,12 +90,14 @@ async def update_user(
 ) -> Optional[UserInDB]:
     """Update a user in the database."""
 
-    return await run_as_coro(
+    user = await run_as_coro(
         db.update_user,
         organization_id=organization_id,
         user_id=user_id,
         user_update=user_update,
     )
+    invalidate_cached_user(db, user_id=user_id)
+    return user
 
 
 async def create_user(
@@ -94,9 +128,11 @@ async def delete_user(
 ) -> bool:
     """Delete a user from the database."""
 
-    return await run_as_coro(
+    deleted = await run_as_coro(
         db.delete_user,
         user_id=user_id,
         organization_id=organization_id,
         soft_delete=soft_delete,
     )
+    invalidate_cached_user(db, user_id=user_id)
+    return deleted
@@ -2,9 +2,12 @@ from typing import TYPE_CHECKING
 
 from fastapi import Request
 
+from ..utils.timing import timed_dependency
+
 if TYPE_CHECKING:
     from fastapi_chat.db._base import DatabaseBase
 
 
+@timed_dependency
 def depend_db(request: Request) -> "DatabaseBase":
     return request.app.state.db
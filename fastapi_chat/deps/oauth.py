@@ -1,58 +1,90 @@
+import logging
 import time
-from typing import Annotated, Dict, List, Literal, Text, TypeVar
+from typing import Annotated, Dict, List, Literal, Protocol, Text, TypeVar, cast
 
 from fastapi import Depends, HTTPException
 from fastapi import Path as QueryPath
 from fastapi import status
-from pydantic import BaseModel
 from pydantic_core import ValidationError
 
 from ..config import logger
 from ..db._base import DatabaseBase
+from ..db.organizations import retrieve_organization
 from ..db.tokens import is_token_blocked
-from ..db.users import get_user
+from ..db.users import get_user, get_user_by_id
 from ..deps.db import depend_db
 from ..schemas.oauth import TokenData
 from ..schemas.organizations import Organization
 from ..schemas.permissions import Permission
-from ..schemas.role_per_definitions import get_role_permissions
+from ..schemas.role_per_definitions import get_role_permissions, permissions_mask
 from ..schemas.roles import Role
 from ..schemas.users import UserInDB
 from ..utils.common import run_as_coro
 from ..utils.oauth import oauth2_scheme, verify_payload, verify_token
+from ..utils.timing import timed_dependency
 
 T = TypeVar("T")
 
 
-class TokenPayloadDepends(BaseModel):
+class AuthContext:
+    """Request-scoped auth state, built once and enriched by each dependency."""
+
+    __slots__ = (
+        "token",
+        "payload",
+        "token_data",
+        "user",
+        "organization",
+        "target_user",
+    )
+
     token: Text
     payload: Dict
+    token_data: TokenData
+    user: UserInDB
+    organization: Organization
+    target_user: UserInDB
 
+    def __init__(self, token: Text, payload: Dict):
+        self.token = token
+        self.payload = payload
+
+
+# What each dependency guarantees about the shared `AuthContext`, for the
+# annotations: every dependency returns the same context with one more field set
+
+
+class TokenPayloadDepends(Protocol):
+    token: Text
+    payload: Dict
 
-class TokenDataDepends(TokenPayloadDepends):
+
+class TokenDataDepends(TokenPayloadDepends, Protocol):
     token_data: TokenData
 
 
-class TokenUserDepends(TokenDataDepends):
+class TokenUserDepends(TokenDataDepends, Protocol):
     user: UserInDB
 
 
-class TokenUserManagingDepends(TokenUserDepends):
+class TokenUserManagingDepends(TokenUserDepends, Protocol):
     target_user: UserInDB
 
 
-class TokenOrgDepends(TokenUserDepends):
+class TokenOrgDepends(TokenUserDepends, Protocol):
     organization: Organization
 
 
-class TokenOrgUserManagingDepends(TokenUserManagingDepends, TokenOrgDepends):
+class TokenOrgUserManagingDepends(TokenUserManagingDepends, TokenOrgDepends, Protocol):
     pass
 
 
+@timed_dependency
 async def depends_token(token: Text = Depends(oauth2_scheme)) -> Text:
     return token
 
 
+@timed_dependency
 async def depends_token_payload(
     token: Text = Depends(depends_token),
 ) -> TokenPayloadDepends:
@@ -65,22 +97,25 @@ async def depends_token_payload(
     # Verify the token and check the payload.
     payload = verify_token(token)
     if payload is None:
-        logger.debug(f"Token '{token}' is invalid")
+        logger.debug("Token '%s' is invalid", token)
         raise credentials_exception
     payload = verify_payload(payload)
     if payload is None:
-        logger.debug(f"Token '{token}' has an invalid payload")
+        logger.debug("Token '%s' has an invalid payload", token)
         raise credentials_exception
 
-    return TokenPayloadDepends.model_validate({"token": token, "payload": payload})
+    return AuthContext(token=token, payload=payload)
 
 
+@timed_dependency
 async def depends_current_token_payload(
-    token_payload: Annotated[TokenPayloadDepends, Depends(depends_token_payload)]
+    token_payload: Annotated[TokenPayloadDepends, Depends(depends_token_payload)],
 ) -> TokenPayloadDepends:
     payload = token_payload.payload
     if time.time() > payload["exp"]:
-        logger.debug(f"Token '{token_payload.token}' has expired at {payload['exp']}")
+        logger.debug(
+            "Token '%s' has expired at %s", token_payload.token, payload["exp"]
+        )
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token expired",
@@ -89,6 +124,7 @@ async def depends_current_token_payload(
     return token_payload
 
 
+@timed_dependency
 async def depends_active_token_payload(
     token_payload: Annotated[
         TokenPayloadDepends, Depends(depends_current_token_payload)
@@ -98,15 +134,17 @@ async def depends_active_token_payload(
 
     token = token_payload.token
     payload = token_payload.payload
-    if await run_as_coro(is_token_blocked, db, token=token):
-        logger.debug(f"Token '{token}' has been invalidated")
+    if await run_as_coro(
+        is_token_blocked, db, token=token, session_id=payload.get("sid")
+    ):
+        logger.debug("Token '%s' has been invalidated", token)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
     if payload.get("disabled") is True:
-        logger.debug(f"Token '{token}' has been disabled")
+        logger.debug("Token '%s' has been disabled", token)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token disabled",
@@ -115,6 +153,7 @@ async def depends_active_token_payload(
     return token_payload
 
 
+@timed_dependency
 async def depends_token_data(
     token_payload: Annotated[
         TokenPayloadDepends, Depends(depends_active_token_payload)
@@ -129,20 +168,21 @@ async def depends_token_data(
     # Parse token data
     payload = token_payload.payload
     try:
-        token_data = TokenData.from_payload(payload=dict(payload))
+        token_data = TokenData.from_payload(payload=payload)
     except ValidationError as e:
         logger.exception(e)
-        logger.error(f"Token '{token_payload.token}' has invalid payload: {payload}")
+        logger.error("Token '%s' has invalid payload: %s", token_payload.token, payload)
         raise credentials_exception
     if token_data.username is None:
-        logger.error(f"Token '{token_payload.token}' has an invalid username")
+        logger.error("Token '%s' has an invalid username", token_payload.token)
         raise credentials_exception
 
-    return TokenDataDepends.model_validate(
-        {"token": token_payload.token, "payload": payload, "token_data": token_data}
-    )
+    context = cast(AuthContext, token_payload)
+    context.token_data = token_data
+    return context
 
 
+@timed_dependency
 async def depends_current_user(
     token_payload_data: Annotated[TokenDataDepends, Depends(depends_token_data)],
     db: Annotated[DatabaseBase, Depends(depend_db)],
@@ -158,66 +198,78 @@ async def depends_current_user(
     # Get user from the database
     user = await get_user(db, username=token_data.username)
     if user is None:
-        logger.debug(f"User '{token_data.username}' not found")
+        logger.debug("User '%s' not found", token_data.username)
         raise credentials_exception
 
-    return TokenUserDepends.model_validate(
-        {
-            "token": token_payload_data.token,
-            "payload": token_payload_data.payload,
-            "token_data": token_data,
-            "user": user,
-        }
-    )
+    context = cast(AuthContext, token_payload_data)
+    context.user = user
+    return context
 
 
+@timed_dependency
 async def depends_active_user(
-    token_payload_user: Annotated[TokenUserDepends, Depends(depends_current_user)]
+    token_payload_user: Annotated[TokenUserDepends, Depends(depends_current_user)],
 ) -> TokenUserDepends:
     current_user = token_payload_user.user
     if current_user.disabled:
-        logger.debug(f"User '{current_user.username}' is inactive")
+        logger.debug("User '%s' is inactive", current_user.username)
         raise HTTPException(status_code=403, detail="Inactive user")
     return token_payload_user
 
 
+async def authenticate_token(token: Text, db: DatabaseBase) -> TokenUserDepends:
+    """Run the bearer token checks outside of the dependency injection."""
+
+    token_payload = await depends_active_token_payload(
+        await depends_current_token_payload(await depends_token_payload(token)),
+        db=db,
+    )
+    return await depends_active_user(
+        await depends_current_user(await depends_token_data(token_payload), db=db)
+    )
+
+
+@timed_dependency
 async def depends_path_user_id(
     user_id: Text = QueryPath(..., description="The ID of the user to retrieve."),
     db: DatabaseBase = Depends(depend_db),
 ):
-    user = await run_as_coro(db.retrieve_user, user_id=user_id)
+    user = await get_user_by_id(db, user_id=user_id)
     if user is None:
-        logger.debug(f"Querying user '{user_id}' not found")
+        logger.debug("Querying user '%s' not found", user_id)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
         )
     return user
 
 
+@timed_dependency
 async def depends_current_path_org_id(
     org_id: Text = QueryPath(
         ..., description="The ID of the organization to retrieve."
     ),
     db: DatabaseBase = Depends(depend_db),
 ):
-    current_org = await run_as_coro(db.retrieve_organization, organization_id=org_id)
+    current_org = await retrieve_organization(db, organization_id=org_id)
     if current_org is None:
-        logger.debug(f"Organization '{org_id}' not found")
+        logger.debug("Organization '%s' not found", org_id)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Organization not found"
         )
     return current_org
 
 
+@timed_dependency
 async def depends_active_path_org_id(
     current_org: Organization = Depends(depends_current_path_org_id),
 ):
     if current_org.disabled:
-        logger.debug(f"Organization '{current_org.id}' is inactive")
+        logger.debug("Organization '%s' is inactive", current_org.id)
         raise HTTPException(status_code=400, detail="Inactive organization")
     return current_org
 
 
+@timed_dependency
 async def depends_platform_user(
     token_payload_user: TokenUserDepends = Depends(depends_active_user),
 ) -> TokenUserDepends:
@@ -230,16 +282,17 @@ async def depends_platform_user(
     ):
         pass  # Platform users have access
     else:
-        logger.debug(f"User '{user.username}' is not a platform user")
+        logger.debug("User '%s' is not a platform user", user.username)
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient permissions"
         )
     return token_payload_user
 
 
+@timed_dependency
 async def depends_user_managing(
-    target_user: UserInDB = Depends(depends_path_user_id),
     token_payload_user: TokenUserDepends = Depends(depends_active_user),
+    target_user: UserInDB = Depends(depends_path_user_id),
 ) -> TokenUserManagingDepends:
     user = token_payload_user.user
     user_role_per = get_role_permissions(user.role)
@@ -249,7 +302,9 @@ async def depends_user_managing(
     # User can manage users with lower or equal roles
     if tar_user_role_per.auth_level > user_role_per.auth_level:
         logger.debug(
-            f"User '{user.id}' cannot manage user '{target_user.id}' with higher role"
+            "User '%s' cannot manage user '%s' with higher role",
+            user.id,
+            target_user.id,
         )
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient permissions"
@@ -262,7 +317,7 @@ async def depends_user_managing(
     # Hard check that the super admin cannot be managed
     elif target_user.role == Role.SUPER_ADMIN:
         logger.debug(
-            f"User '{user.username}' cannot manage Super Admin '{target_user.id}'"
+            "User '%s' cannot manage Super Admin '%s'", user.username, target_user.id
         )
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient permissions"
@@ -271,27 +326,23 @@ async def depends_user_managing(
     # Check if the user is a member of the same organization
     elif user.organization_id != target_user.organization_id:
         logger.debug(
-            f"User organization '{user.organization_id}' does not match "
-            + f"target user organization '{target_user.organization_id}'"
+            "User organization '%s' does not match target user organization '%s'",
+            user.organization_id,
+            target_user.organization_id,
         )
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient permissions"
         )
 
-    return TokenUserManagingDepends.model_validate(
-        {
-            "token": token_payload_user.token,
-            "payload": token_payload_user.payload,
-            "token_data": token_payload_user.token_data,
-            "user": user,
-            "target_user": target_user,
-        }
-    )
+    context = cast(AuthContext, token_payload_user)
+    context.target_user = target_user
+    return context
 
 
+@timed_dependency
 async def depends_org_managing(
-    org: Organization = Depends(depends_current_path_org_id),
     token_payload_user: TokenUserDepends = Depends(depends_active_user),
+    org: Organization = Depends(depends_current_path_org_id),
 ) -> TokenOrgDepends:
     user = token_payload_user.user
 
@@ -299,27 +350,22 @@ async def depends_org_managing(
         pass
 
     elif org.id != user.organization_id:
-        logger.debug(f"User '{user.id}' is not a member of organization '{org.id}'")
+        logger.debug("User '%s' is not a member of organization '%s'", user.id, org.id)
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient permissions"
         )
 
-    return TokenOrgDepends.model_validate(
-        {
-            "token": token_payload_user.token,
-            "payload": token_payload_user.payload,
-            "token_data": token_payload_user.token_data,
-            "user": user,
-            "organization": org,
-        }
-    )
+    context = cast(AuthContext, token_payload_user)
+    context.organization = org
+    return context
 
 
+@timed_dependency
 async def depends_org_user_managing(
+    token_payload_org: TokenOrgDepends = Depends(depends_org_managing),
     target_payload_user_managing: TokenUserManagingDepends = Depends(
         depends_user_managing
     ),
-    token_payload_org: TokenOrgDepends = Depends(depends_org_managing),
 ) -> TokenOrgUserManagingDepends:
     user = token_payload_org.user
     org = token_payload_org.organization
@@ -332,7 +378,7 @@ async def depends_org_user_managing(
     # Hard check that the super admin cannot be managed
     elif target_user.role == Role.SUPER_ADMIN:
         logger.debug(
-            f"User '{user.username}' cannot manage Super Admin '{target_user.id}'"
+            "User '%s' cannot manage Super Admin '%s'", user.username, target_user.id
         )
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient permissions"
@@ -341,7 +387,7 @@ async def depends_org_user_managing(
     # Check if the user is a member of the same organization
     elif user.organization_id != org.id:
         logger.debug(
-            f"User '{user.username}' is not a member of organization '{org.id}'"
+            "User '%s' is not a member of organization '%s'", user.username, org.id
         )
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient permissions"
@@ -350,22 +396,15 @@ async def depends_org_user_managing(
     # Check if the target user is a member of the same organization
     elif target_user.organization_id != org.id:
         logger.debug(
-            f"User '{target_user.username}' is not a member of organization '{org.id}'"
+            "User '%s' is not a member of organization '%s'",
+            target_user.username,
+            org.id,
         )
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient permissions"
         )
 
-    return TokenOrgUserManagingDepends.model_validate(
-        {
-            "token": token_payload_org.token,
-            "payload": token_payload_org.payload,
-            "token_data": token_payload_org.token_data,
-            "user": user,
-            "organization": org,
-            "target_user": target_user,
-        }
-    )
+    return cast(AuthContext, token_payload_org)
 
 
 def DependsUserPermissions(
@@ -407,31 +446,53 @@ def DependsUserPermissions(
     elif depends_on == "depends_user_managing":
         depends_payload_func = depends_user_managing
 
-    async def check_permissions(token_payload: T = Depends(depends_payload_func)) -> T:
-        if hasattr(token_payload, "user") is False:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Could not validate credentials",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
+    # Compiled when the route is defined, checked with a single mask AND
+    required_mask = permissions_mask(required_permissions)
+    depends_user_func = (
+        depends_current_user
+        if depends_on == "depends_current_user"
+        else depends_active_user
+    )
 
-        user: UserInDB = getattr(token_payload, "user")
+    @timed_dependency
+    async def check_role_permissions(
+        token_payload_user: TokenUserDepends = Depends(depends_user_func),
+    ) -> TokenUserDepends:
+        user = token_payload_user.user
         user_permissions = get_role_permissions(user.role)
-        logger.debug(
-            f"User '{user.username}' with role '{user.role}' "
-            + f"has permissions '{user_permissions.has_permissions_str()}'"
-        )
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "User '%s' with role '%s' has permissions '%s'",
+                user.username,
+                user.role,
+                user_permissions.has_permissions_str(),
+            )
 
         # Check if the user has the required permissions
         if user_permissions.manage_all_resources is True:
-            return token_payload  # Super Admin has all permissions
+            return token_payload_user  # Super Admin has all permissions
 
         # Check if the user has the required permissions
-        if user_permissions.is_permission_granted(required_permissions) is False:
+        if user_permissions.is_permission_granted(required_mask) is False:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient permissions"
             )
 
+        return token_payload_user
+
+    # The role check is declared first, so the token and role are verified
+    # before `depends_payload_func` fetches any path entity.
+    @timed_dependency
+    async def check_permissions(
+        token_payload_user: TokenUserDepends = Depends(check_role_permissions),
+        token_payload: T = Depends(depends_payload_func),
+    ) -> T:
+        if hasattr(token_payload, "user") is False:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Could not validate credentials",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
         return token_payload
 
     return check_permissions
@@ -0,0 +1,19 @@
+from ._base import (
+    TOPIC_CACHE_INVALIDATE,
+    TOPIC_CONVERSATION_EVENT,
+    TOPIC_TOKEN_REVOKED,
+    Event,
+    EventBus,
+)
+from ._memory import InProcessEventBus
+from ._redis import RedisEventBus
+
+__all__ = [
+    "TOPIC_CACHE_INVALIDATE",
+    "TOPIC_CONVERSATION_EVENT",
+    "TOPIC_TOKEN_REVOKED",
+    "Event",
+    "EventBus",
+    "InProcessEventBus",
+    "RedisEventBus",
+]
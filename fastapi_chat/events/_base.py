@@ -0,0 +1,166 @@
+import asyncio
+import itertools
+import os
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Coroutine,
+    Dict,
+    List,
+    Optional,
+    Set,
+    Text,
+    Tuple,
+    Union,
+)
+
+import uuid_utils as uuid
+from pydantic import BaseModel, Field
+from yarl import URL
+
+from ..config import logger, settings
+from ..utils.metrics import Counter
+
+EVENTS_PUBLISHED = Counter(
+    "event_bus_events_published_total", "Events sent to other workers."
+)
+EVENTS_COALESCED = Counter(
+    "event_bus_events_coalesced_total", "Events replaced by a newer event in a batch."
+)
+EVENTS_RECEIVED = Counter(
+    "event_bus_events_received_total", "Events received from other workers."
+)
+
+TOPIC_TOKEN_REVOKED = "token.revoked"
+TOPIC_CACHE_INVALIDATE = "cache.invalidate"
+TOPIC_CONVERSATION_EVENT = "conversation.event"
+
+EventHandler = Callable[["Event"], Union[None, Awaitable[None]]]
+
+
+class Event(BaseModel):
+    topic: Text
+    data: Dict[Text, Any] = Field(default_factory=dict)
+    key: Optional[Text] = Field(
+        default=None, description="Events with the same topic and key coalesce"
+    )
+    origin: Text = Field(default="", description="ID of the publishing worker")
+
+
+class EventBus:
+    """Broadcast state changes to the other workers.
+
+    The publishing worker applies a change itself, the bus only carries it to
+    the others: handlers never see events of their own worker. Events are
+    batched for `flush_interval` seconds, and events with the same topic and
+    key in a batch coalesce to the latest one.
+    """
+
+    def __init__(
+        self,
+        *,
+        flush_interval: Optional[float] = None,
+        max_batch: Optional[int] = None,
+    ):
+        self.origin = f"{os.getpid()}-{uuid.uuid7()}"
+        self.flush_interval = (
+            settings.EVENT_BUS_FLUSH_INTERVAL_SECONDS
+            if flush_interval is None
+            else flush_interval
+        )
+        self.max_batch = max_batch or settings.EVENT_BUS_MAX_BATCH
+        self._handlers: Dict[Text, List[EventHandler]] = {}
+        self._pending: Dict[Tuple[Text, Text | int], Event] = {}
+        self._sequence = itertools.count()
+        self._flush_timer: Optional[asyncio.Task] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    @classmethod
+    def from_url(cls, url: URL | Text | None, **kwargs) -> "EventBus":
+        from fastapi_chat.events._memory import InProcessEventBus
+        from fastapi_chat.events._redis import RedisEventBus
+
+        if url is None or str(url).strip() == "" or str(url).startswith("memory"):
+            return InProcessEventBus(**kwargs)
+        return RedisEventBus(URL(url), **kwargs)
+
+    def subscribe(self, topic: Text, handler: EventHandler) -> None:
+        self._handlers.setdefault(topic, []).append(handler)
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        """Send the pending events and stop the bus."""
+
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self.flush()
+
+    def publish(
+        self, topic: Text, data: Dict[Text, Any], *, key: Optional[Text] = None
+    ):
+        """Queue an event for the next batch, it never waits on the transport."""
+
+        event = Event(topic=topic, data=data, key=key, origin=self.origin)
+        # Events without a key never coalesce, a sequence number keeps them apart
+        pending_key = (topic, key if key is not None else next(self._sequence))
+        if key is not None and pending_key in self._pending:
+            # Re-insert so the batch keeps the order of the latest publishes
+            del self._pending[pending_key]
+            EVENTS_COALESCED.inc()
+        self._pending[pending_key] = event
+        if len(self._pending) >= self.max_batch:
+            self._spawn(self.flush())
+        elif self._flush_timer is None or self._flush_timer.done():
+            self._flush_timer = self._spawn(self._flush_later(self.flush_interval))
+
+    async def flush(self) -> None:
+        if not self._pending:
+            return
+        events = list(self._pending.values())
+        self._pending = {}
+        EVENTS_PUBLISHED.inc(len(events))
+        try:
+            await self.send_batch(events)
+        except Exception as e:
+            logger.exception(e)
+            logger.error("Failed to publish %d events", len(events))
+
+    async def send_batch(self, events: List[Event]) -> None:
+        raise NotImplementedError
+
+    async def dispatch(self, events: List[Event]) -> None:
+        """Run the handlers of events received from other workers."""
+
+        for event in events:
+            if event.origin == self.origin:
+                continue
+            EVENTS_RECEIVED.inc()
+            for handler in self._handlers.get(event.topic, ()):
+                try:
+                    result = handler(event)
+                    if asyncio.iscoroutine(result):
+                        await result
+                except Exception as e:
+                    logger.exception(e)
+
+    def _spawn(self, coro: Coroutine[Any, Any, None]) -> Optional[asyncio.Task]:
+        try:
+            task = asyncio.get_running_loop().create_task(coro)
+        except RuntimeError:
+            # No running loop, the events go out with the next flush
+            coro.close()
+            return None
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _flush_later(self, delay: float) -> None:
+        await asyncio.sleep(delay)
+        await self.flush()
+
+    def __str__(self) -> Text:
+        return f"{self.__class__.__name__}(origin={self.origin})"
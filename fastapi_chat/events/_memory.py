@@ -0,0 +1,14 @@
+from typing import List
+
+from ._base import Event, EventBus
+
+
+class InProcessEventBus(EventBus):
+    """Event bus of a single worker.
+
+    The worker applies its own changes directly, so there is nobody to send
+    the events to: batches are dropped once flushed.
+    """
+
+    async def send_batch(self, events: List[Event]) -> None:
+        pass
@@ -0,0 +1,121 @@
+import asyncio
+import contextlib
+import json
+from typing import List, Optional, Text
+
+from yarl import URL
+
+from ..config import logger, settings
+from ._base import Event, EventBus
+
+# Buses created from `fakeredis://` URLs in one process share this server
+_FAKE_SERVER = None
+
+
+def _fake_server():
+    global _FAKE_SERVER
+
+    import fakeredis
+
+    if _FAKE_SERVER is None:
+        _FAKE_SERVER = fakeredis.FakeServer()
+    return _FAKE_SERVER
+
+
+class RedisEventBus(EventBus):
+    """Event bus over Redis pub/sub, shared by the workers of every node.
+
+    A batch is published as a single JSON array on `channel`. A dropped
+    connection is logged and subscribed again, waiting `reconnect_delay`
+    seconds doubling up to `reconnect_max_delay`.
+    """
+
+    reconnect_delay = 0.5
+    reconnect_max_delay = 30.0
+
+    def __init__(self, url: URL | Text, *, channel: Optional[Text] = None, **kwargs):
+        super().__init__(**kwargs)
+        self._url = URL(url)
+        self.channel = channel or settings.EVENT_BUS_CHANNEL
+        if self._url.scheme == "fakeredis":
+            import fakeredis
+
+            self.client = fakeredis.FakeAsyncRedis(server=_fake_server())
+        else:
+            import redis.asyncio as redis
+
+            self.client = redis.from_url(str(self._url))
+        self._pubsub = None
+        self._listener: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        self._pubsub = await self._subscribe()
+        self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        await super().stop()
+        if self._listener is not None:
+            self._listener.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._listener
+            self._listener = None
+        await self._unsubscribe()
+        await self.client.aclose()
+
+    async def _subscribe(self):
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(self.channel)
+        return pubsub
+
+    async def _unsubscribe(self) -> None:
+        pubsub, self._pubsub = self._pubsub, None
+        if pubsub is None:
+            return
+        with contextlib.suppress(Exception):
+            await pubsub.unsubscribe(self.channel)
+        with contextlib.suppress(Exception):
+            await pubsub.aclose()
+
+    async def send_batch(self, events: List[Event]) -> None:
+        await self.client.publish(
+            self.channel,
+            json.dumps([e.model_dump(mode="json") for e in events]),
+        )
+
+    async def _listen(self) -> None:
+        """Dispatch the received batches, subscribing again with a backoff
+        whenever the connection drops."""
+
+        delay = self.reconnect_delay
+        while True:
+            try:
+                if self._pubsub is None:
+                    self._pubsub = await self._subscribe()
+                    logger.info("Event bus %s subscribed again", self)
+                    delay = self.reconnect_delay
+                async for message in self._pubsub.listen():
+                    await self._receive(message)
+                raise ConnectionError("Subscription ended")
+            except Exception as e:
+                # Events published meanwhile are lost, pub/sub does not keep them
+                logger.error(
+                    "Event bus %s lost its subscription, retrying in %.1fs: %r",
+                    self,
+                    delay,
+                    e,
+                )
+                await self._unsubscribe()
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.reconnect_max_delay)
+
+    async def _receive(self, message) -> None:
+        try:
+            events = [Event.model_validate(e) for e in json.loads(message["data"])]
+        except Exception as e:
+            logger.exception(e)
+            return
+        await self.dispatch(events)
+
+    def __str__(self) -> Text:
+        url = self._url.with_password("****") if self._url.password else self._url
+        return f"{self.__class__.__name__}(url={url}, origin={self.origin})"
@@ -0,0 +1,49 @@
+from typing import TYPE_CHECKING, Optional
+
+from ._base import (
+    TOPIC_CACHE_INVALIDATE,
+    TOPIC_CONVERSATION_EVENT,
+    TOPIC_TOKEN_REVOKED,
+    Event,
+    EventBus,
+)
+
+if TYPE_CHECKING:
+    from fastapi_chat.db._base import DatabaseBase
+    from fastapi_chat.realtime.hub import ConversationHub
+
+
+def register_event_handlers(
+    bus: EventBus,
+    *,
+    db: "DatabaseBase",
+    hub: Optional["ConversationHub"] = None,
+) -> None:
+    """Apply the changes published by other workers to this worker's state."""
+
+    from fastapi_chat.utils.oauth import forget_verified_token
+
+    async def on_token_revoked(event: Event) -> None:
+        digest = event.data["digest"]
+        forget_verified_token(digest=digest)
+        await db.blacklist_token_digest(digest, expires_at=event.data["expires_at"])
+
+    def on_cache_invalidate(event: Event) -> None:
+        caches = getattr(db, "_record_caches", None) or {}
+        cache = caches.get(event.data["cache"])
+        if cache is not None:
+            cache.invalidate(event.data["key"])
+
+    def on_conversation_event(event: Event) -> None:
+        if hub is not None:
+            hub.publish(
+                event.data["user_ids"],
+                event.data["event"],
+                event.data["data"],
+                conversation_id=event.data.get("conversation_id"),
+                event_id=event.data.get("event_id"),
+            )
+
+    bus.subscribe(TOPIC_TOKEN_REVOKED, on_token_revoked)
+    bus.subscribe(TOPIC_CACHE_INVALIDATE, on_cache_invalidate)
+    bus.subscribe(TOPIC_CONVERSATION_EVENT, on_conversation_event)
@@ -1,17 +1,26 @@
+import asyncio
+import contextlib
 import json
 from contextlib import asynccontextmanager
 from typing import Any, Text
 
 from fastapi import Depends, FastAPI, Request
+from fastapi.responses import PlainTextResponse
 from fastapi.routing import APIRoute
 from rich.table import Table
 from starlette.routing import Route as StarletteRoute
 
 from .config import console, logger, settings
+from .db._instrumented import DB_LIMIT_KEY
 from .deps.oauth import DependsUserPermissions, TokenUserDepends, depends_active_user
 from .schemas.permissions import Permission
 from .schemas.users import User
 from .utils.common import is_json_serializable, run_as_coro
+from .utils.executor import executor
+from .utils.loop_monitor import loop_monitor
+from .utils.metrics import CONTENT_TYPE_LATEST, render_text
+from .utils.middleware import MetricsMiddleware, collect_in_flight
+from .utils.oauth import password_executor, start_password_executor
 
 
 @asynccontextmanager
@@ -20,19 +29,69 @@ async def lifespan(app: FastAPI):
 
     print(f"Application '{settings.app_name}' is starting up.")
 
+    # <SET_EXECUTOR>
+    executor.start(max_workers=settings.EXECUTOR_MAX_WORKERS)
+    logger.info("Started shared executor with %d workers", executor.max_workers)
+    executor.set_limit(DB_LIMIT_KEY, settings.DB_SYNC_MAX_CONCURRENCY)
+    start_password_executor()
+    # </SET_EXECUTOR>
+
     # <SET_APP_STATE>
     # <SET_DB>
     from fastapi_chat.db._base import DatabaseBase
 
     _db = DatabaseBase.from_url(settings.DB_URL)
-    logger.info(f"Connected to database: {_db}")
+    logger.info("Connected to database: %s", _db)
     await run_as_coro(_db.touch)
     set_app_state(app, key="db", value=_db)
     # </SET_DB>
+
+    # <SET_EVENT_BUS>
+    from fastapi_chat.events import EventBus
+    from fastapi_chat.events.handlers import register_event_handlers
+    from fastapi_chat.realtime import hub
+
+    _event_bus = EventBus.from_url(settings.EVENT_BUS_URL)
+    register_event_handlers(_event_bus, db=_db, hub=hub)
+    await _event_bus.start()
+    logger.info("Started event bus: %s", _event_bus)
+    _db.event_bus = _event_bus
+    hub.event_bus = _event_bus
+    set_app_state(app, key="event_bus", value=_event_bus)
+    # </SET_EVENT_BUS>
     # </SET_APP_STATE>
 
+    # <BACKGROUND_TASKS>
+    from fastapi_chat.db.tokens import run_blacklist_sweeper
+
+    blacklist_sweeper = asyncio.create_task(
+        run_blacklist_sweeper(
+            _db, interval=settings.TOKEN_BLACKLIST_SWEEP_INTERVAL_SECONDS
+        )
+    )
+
+    if settings.LOOP_MONITOR_ENABLED:
+        loop_monitor.start(
+            interval=settings.LOOP_MONITOR_INTERVAL_SECONDS,
+            threshold=settings.LOOP_MONITOR_THRESHOLD_SECONDS,
+            log_interval=settings.LOOP_MONITOR_LOG_INTERVAL_SECONDS,
+        )
+    # </BACKGROUND_TASKS>
+
     yield
 
+    blacklist_sweeper.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await blacklist_sweeper
+    await loop_monitor.stop()
+
+    _db.event_bus = None
+    hub.event_bus = None
+    await _event_bus.stop()
+
+    password_executor.shutdown(wait=True)
+    executor.shutdown(wait=True)
+
     print(f"Application '{settings.app_name}' is shutting down.")
 
 
@@ -40,6 +99,10 @@ def create_app():
     app = FastAPI(
         title=settings.app_name.title(), version=settings.app_version, lifespan=lifespan
     )
+    app.add_middleware(
+        MetricsMiddleware,
+        timing_headers=settings.DB_TIMING_HEADERS or settings.DEPENDENCY_TIMING,
+    )
 
     @app.get("/")
     async def root():
@@ -71,6 +134,23 @@ def create_app():
             "cookies": request.cookies,
         }
 
+    @app.get(
+        "/metrics",
+        dependencies=[
+            Depends(
+                DependsUserPermissions(
+                    [Permission.MANAGE_ALL_RESOURCES], "depends_active_user"
+                )
+            )
+        ],
+        response_class=PlainTextResponse,
+    )
+    async def metrics():
+        """Metrics in the Prometheus text exposition format."""
+
+        collect_in_flight()
+        return PlainTextResponse(render_text(), media_type=CONTENT_TYPE_LATEST)
+
     @app.get("/me")
     async def api_me(
         token_payload_user: TokenUserDepends = Depends(depends_active_user),
@@ -0,0 +1,3 @@
+from .hub import Connection, ConversationHub, hub
+
+__all__ = ["Connection", "ConversationHub", "hub"]
@@ -0,0 +1,239 @@
+import asyncio
+import contextlib
+import json
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Optional, Set, Text
+
+from fastapi import WebSocket, status
+
+from ..config import logger, settings
+from ..events import TOPIC_CONVERSATION_EVENT
+from ..utils.metrics import Counter, Gauge
+
+if TYPE_CHECKING:
+    from fastapi_chat.events import EventBus
+
+REALTIME_CONNECTIONS = Gauge(
+    "realtime_connections", "Connected real-time clients.", labelnames=("transport",)
+)
+REALTIME_EVENTS_SENT = Counter(
+    "realtime_events_sent_total", "Events queued for connected clients."
+)
+REALTIME_SLOW_DISCONNECTS = Counter(
+    "realtime_slow_disconnects_total",
+    "Clients disconnected because their send queue was full.",
+)
+
+
+class Connection:
+    """A connected client, its events are sent from a bounded queue.
+
+    A connection with a `conversation_id` only receives the events of that
+    conversation, otherwise every event of the user's conversations.
+    """
+
+    def __init__(
+        self,
+        websocket: Optional[WebSocket],
+        *,
+        user_id: Text,
+        max_queue: int,
+        conversation_id: Optional[Text] = None,
+        transport: Text = "websocket",
+    ):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.conversation_id = conversation_id
+        self.transport = transport
+        self.queue: asyncio.Queue[Optional[Text]] = asyncio.Queue(maxsize=max_queue)
+        self.closed = False
+
+    def accepts(self, conversation_id: Optional[Text]) -> bool:
+        return self.conversation_id is None or self.conversation_id == conversation_id
+
+    def send(self, data: Text) -> bool:
+        """Queue serialized data without waiting, False if the client is too slow."""
+
+        if self.closed:
+            return False
+        try:
+            self.queue.put_nowait(data)
+        except asyncio.QueueFull:
+            return False
+        return True
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        # Make room for the sentinel, pending events are lost anyway
+        while self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+    async def run_sender(self) -> None:
+        """Send queued data until the connection is closed."""
+
+        assert self.websocket is not None
+        while True:
+            data = await self.queue.get()
+            if data is None:
+                break
+            await self.websocket.send_text(data)
+        with contextlib.suppress(Exception):
+            await self.websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+
+
+class ConversationHub:
+    """Per-process fan-out of conversation events to connected participants.
+
+    Connections are indexed by user, the participants of a conversation are
+    resolved from the conversation itself when an event is published. With an
+    `event_bus`, conversation events reach the clients of other workers too.
+    """
+
+    def __init__(self, *, max_queue: Optional[int] = None):
+        self.max_queue = max_queue or settings.REALTIME_SEND_QUEUE_SIZE
+        self.event_bus: Optional["EventBus"] = None
+        self._connections: Dict[Text, Set[Connection]] = {}
+        for transport in ("websocket", "sse"):
+            REALTIME_CONNECTIONS.labels(transport).set_function(
+                lambda transport=transport: self.count_connections(transport)
+            )
+
+    def connect(
+        self,
+        websocket: Optional[WebSocket],
+        *,
+        user_id: Text,
+        conversation_id: Optional[Text] = None,
+        transport: Text = "websocket",
+    ) -> Connection:
+        connection = Connection(
+            websocket,
+            user_id=user_id,
+            max_queue=self.max_queue,
+            conversation_id=conversation_id,
+            transport=transport,
+        )
+        self._connections.setdefault(user_id, set()).add(connection)
+        return connection
+
+    def disconnect(self, connection: Connection) -> None:
+        connection.close()
+        connections = self._connections.get(connection.user_id)
+        if connections is None:
+            return
+        connections.discard(connection)
+        if not connections:
+            del self._connections[connection.user_id]
+
+    def is_connected(self, user_id: Text) -> bool:
+        return user_id in self._connections
+
+    def count_connections(self, transport: Text) -> int:
+        return sum(
+            1
+            for connections in self._connections.values()
+            for connection in connections
+            if connection.transport == transport
+        )
+
+    def publish(
+        self,
+        user_ids: Iterable[Text],
+        event: Text,
+        data: Any,
+        *,
+        conversation_id: Optional[Text] = None,
+        event_id: Optional[Text] = None,
+    ) -> int:
+        """Send an event to the connections of the given users.
+
+        The event is serialized once per transport and the same text is queued
+        for every connection, returns the number of connections it was queued
+        for. `event_id` is the ID SSE clients resume from.
+        """
+
+        recipients = [
+            connection
+            for user_id in set(user_ids)
+            for connection in self._connections.get(user_id, ())
+            if connection.accepts(conversation_id)
+        ]
+        if not recipients:
+            return 0
+        data = self.to_json(data)
+        texts: Dict[Text, Text] = {}
+        count = 0
+        for connection in recipients:
+            text = texts.get(connection.transport)
+            if text is None:
+                text = texts[connection.transport] = (
+                    self.sse_frame(event, data, event_id=event_id)
+                    if connection.transport == "sse"
+                    else self.serialize(event, data)
+                )
+            if connection.send(text):
+                count += 1
+                continue
+            logger.warning("Disconnecting slow client of user '%s'", connection.user_id)
+            REALTIME_SLOW_DISCONNECTS.inc()
+            self.disconnect(connection)
+        REALTIME_EVENTS_SENT.inc(count)
+        return count
+
+    def publish_to_conversation(
+        self,
+        conversation: Any,
+        event: Text,
+        data: Any,
+        *,
+        user_ids: Optional[Iterable[Text]] = None,
+        event_id: Optional[Text] = None,
+    ) -> int:
+        """Send an event to the participants of a conversation, on every worker."""
+
+        if user_ids is None:
+            user_ids = [p.user_id for p in conversation.participants]
+        user_ids = list(user_ids)
+        data = self.to_json(data)
+        if self.event_bus is not None:
+            self.event_bus.publish(
+                TOPIC_CONVERSATION_EVENT,
+                {
+                    "user_ids": user_ids,
+                    "event": event,
+                    "data": data,
+                    "conversation_id": conversation.id,
+                    "event_id": event_id,
+                },
+            )
+        return self.publish(
+            user_ids, event, data, conversation_id=conversation.id, event_id=event_id
+        )
+
+    @staticmethod
+    def serialize(event: Text, data: Any) -> Text:
+        return json.dumps(
+            {"event": event, "data": ConversationHub.to_json(data)},
+            separators=(",", ":"),
+        )
+
+    @staticmethod
+    def sse_frame(event: Text, data: Any, *, event_id: Optional[Text] = None) -> Text:
+        """Format a Server-Sent Events frame, the data is a single JSON line."""
+
+        frame = f"event: {event}\n"
+        if event_id is not None:
+            frame = f"id: {event_id}\n" + frame
+        data = json.dumps(ConversationHub.to_json(data), separators=(",", ":"))
+        return f"{frame}data: {data}\n\n"
+
+    @staticmethod
+    def to_json(data: Any) -> Any:
+        if hasattr(data, "model_dump"):
+            return data.model_dump(mode="json")
+        return data
+
+
+hub = ConversationHub()
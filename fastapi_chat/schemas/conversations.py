@@ -19,6 +19,9 @@ class ConversationType(str, Enum):
 class Conversation(BaseModel):
     model_config = ConfigDict(str_strip_whitespace=True, use_enum_values=True)
     id: str = Field(..., description="Conversation ID in UUID Version 7 format")
+    organization_id: Optional[Text] = Field(
+        default=None, description="ID of the organization owning the conversation"
+    )
     type: ConversationType
     name: Optional[Text] = Field(
         None, description="Name of the conversation (for group chats)"
@@ -80,10 +83,16 @@ class ConversationCreate(BaseModel):
     participant_ids: List[Text]
     disabled: Optional[bool] = Field(default=None)
 
-    def to_conversation(self, conversation_id: Optional[Text] = None) -> Conversation:
+    def to_conversation(
+        self,
+        conversation_id: Optional[Text] = None,
+        *,
+        organization_id: Optional[Text] = None,
+    ) -> Conversation:
         conversation = Conversation.model_validate(
             {
                 "id": conversation_id or str(uuid.uuid7()),
+                "organization_id": organization_id,
                 "type": self.type,
                 "name": self.name,
                 "participants": [
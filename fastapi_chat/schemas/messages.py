@@ -45,16 +45,22 @@ class Message(BaseModel):
 
 
 class MessageCreate(BaseModel):
-    conversation_id: Text
-    sender_id: Text
     content: Text
     type: MessageType = Field(default=MessageType.TEXT)
     reply_to: Optional[Text] = None
     metadata: Optional[Dict[Text, Any]] = None
 
-    def to_message(self, message_id: Optional[Text] = None) -> Message:
+    def to_message(
+        self,
+        message_id: Optional[Text] = None,
+        *,
+        conversation_id: Text,
+        sender_id: Text,
+    ) -> Message:
         msg_create_data = self.model_dump()
         msg_create_data["id"] = message_id or str(uuid.uuid7())
+        msg_create_data["conversation_id"] = conversation_id
+        msg_create_data["sender_id"] = sender_id
         return Message.model_validate(msg_create_data)
 
 
@@ -70,18 +76,26 @@ class MessageUpdate(BaseModel):
         if self.content is not None:
             message.content = self.content
             message.is_edited = True
+            flag_update = True
         # Update deletion status
         if self.is_deleted is not None:
             message.is_deleted = self.is_deleted
+            flag_update = True
         # Update metadata
         if self.metadata is not None:
             message.metadata = message.metadata or {}
             message.metadata.update(self.metadata)
+            flag_update = True
         # Update reactions
         if self.reactions is not None:
             message.reactions = self.reactions
+            flag_update = True
 
         # Update timestamps
         if flag_update:
             message.updated_at = int(time.time())
         return message
+
+
+class MessageInDB(Message):
+    pass
@@ -6,6 +6,18 @@ from typing import Annotated, Dict, Literal, Optional, Required, Text, TypedDict
 from pydantic import BaseModel, ConfigDict, Field
 
 
+def token_digest(token: Text) -> Text:
+    """Return a fixed-length digest used to index a raw token."""
+
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def session_digest(session_id: Text) -> Text:
+    """Return the blacklist key revoking every token of a session."""
+
+    return token_digest(f"session:{session_id}")
+
+
 class Token(BaseModel):
     model_config = ConfigDict(str_strip_whitespace=True)
     access_token: Text
@@ -39,6 +51,8 @@ class Token(BaseModel):
     def to_db_model(self, *, username: Text) -> "TokenInDB":
         token_data = self.model_dump()
         token_data["username"] = username
+        token_data["access_token_digest"] = token_digest(self.access_token)
+        token_data["refresh_token_digest"] = token_digest(self.refresh_token)
         return TokenInDB.model_validate(token_data)
 
     def to_headers(self) -> Dict[Text, Text]:
@@ -48,6 +62,8 @@ class Token(BaseModel):
 class TokenInDB(Token):
     model_config = ConfigDict(str_strip_whitespace=True)
     username: Text
+    access_token_digest: Text
+    refresh_token_digest: Text
 
 
 class TokenBlacklisted(BaseModel):
@@ -85,3 +101,4 @@ class PayloadParam(TypedDict, total=False):
     user_id: Required[Annotated[Text, "user ID"]]
     organization_id: Optional[Annotated[Text, "organization ID"]]
     disabled: Optional[Annotated[bool, "user disabled status"]]
+    sid: Optional[Annotated[Text, "session ID of the token pair"]]
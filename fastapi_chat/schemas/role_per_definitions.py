@@ -1,28 +1,34 @@
-from typing import Literal, Sequence, Text
+from typing import Dict, Iterable, Literal, Sequence, Text
 
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr
 
 from ..utils.common import str_enum_value
 from .permissions import Permission
 from .roles import Role
 
+PERMISSION_BITS: Dict[Text, int] = {
+    per.value: 1 << index for index, per in enumerate(Permission)
+}
+
+
+def permissions_mask(permissions: Iterable[Permission | Text]) -> int:
+    """Compile the given permissions into a bitmask."""
+
+    mask = 0
+    for per in permissions:
+        value = str_enum_value(per)
+        if value not in PERMISSION_BITS:
+            raise ValueError(f"Unknown permission '{value}'")
+        mask |= PERMISSION_BITS[value]
+    return mask
+
 
 def get_role_permissions(role: "Role") -> "RolePermissionsBase":
-    return {
-        Role.PRISONER: PrisonerPermissions,
-        Role.ORG_CLIENT: OrgClientPermissions,
-        Role.ORG_VIEWER: OrgViewerPermissions,
-        Role.ORG_EDITOR: OrgEditorPermissions,
-        Role.ORG_ADMIN: OrgAdminPermissions,
-        Role.PLATFORM_VIEWER: PlatformViewerPermissions,
-        Role.PLATFORM_EDITOR: PlatformEditorPermissions,
-        Role.PLATFORM_ADMIN: PlatformAdminPermissions,
-        Role.SUPER_ADMIN: SuperAdminPermissions,
-    }[role]()
+    return ROLE_PERMISSIONS[role]
 
 
 class RolePermissionsBase(BaseModel):
-    model_config = ConfigDict(use_enum_values=True)
+    model_config = ConfigDict(use_enum_values=True, frozen=True)
     role: Role
     auth_level: int = Field(..., ge=0, le=100)
     manage_all_resources: bool
@@ -56,15 +62,31 @@ class RolePermissionsBase(BaseModel):
     # Forbidden
     forbidden: bool
 
+    _mask: int = PrivateAttr(default=0)
+
+    def model_post_init(self, __context) -> None:
+        self._mask = permissions_mask(
+            per for per in PERMISSION_BITS if getattr(self, per, False) is True
+        )
+
+    @property
+    def mask(self) -> int:
+        return self._mask
+
     def is_permission_granted(
-        self, required_permissions: Sequence["Permission"]
+        self, required_permissions: Sequence[Permission] | int
     ) -> bool:
-        return all(
-            getattr(self, str_enum_value(per), False) for per in required_permissions
+        required_mask = (
+            required_permissions
+            if isinstance(required_permissions, int)
+            else permissions_mask(required_permissions)
         )
+        return self._mask & required_mask == required_mask
 
     def has_permissions_str(self) -> Text:
-        return ", ".join([k for k, v in self.model_dump().items() if v is True])
+        return ", ".join(
+            [per for per, bit in PERMISSION_BITS.items() if self._mask & bit]
+        )
 
 
 class PrisonerPermissions(RolePermissionsBase):
@@ -170,3 +192,20 @@ class SuperAdminPermissions(PlatformAdminPermissions):
     auth_level: Literal[100] = Field(default=100)
     manage_all_resources: Literal[True] = Field(default=True)
     forbidden: Literal[False] = Field(default=False)
+
+
+# Compiled once, every role shares a single frozen instance
+ROLE_PERMISSIONS: Dict[Text, RolePermissionsBase] = {
+    per.role: per
+    for per in (
+        PrisonerPermissions(),
+        OrgClientPermissions(),
+        OrgViewerPermissions(),
+        OrgEditorPermissions(),
+        OrgAdminPermissions(),
+        PlatformViewerPermissions(),
+        PlatformEditorPermissions(),
+        PlatformAdminPermissions(),
+        SuperAdminPermissions(),
+    )
+}
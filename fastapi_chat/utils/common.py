@@ -1,5 +1,4 @@
 import asyncio
-import concurrent.futures
 import functools
 import json
 import platform
@@ -21,6 +20,7 @@ from typing import (
 import psutil
 
 from fastapi_chat.schemas import JSONSerializable
+from fastapi_chat.utils.executor import executor
 
 T = TypeVar("T")
 P = ParamSpec("P")
@@ -92,10 +92,14 @@ def is_coro_func(func: Union[Callable[P, T], Callable[P, Awaitable[T]]]) -> bool
 async def run_as_coro(
     func: Union[Callable[P, T], Callable[P, Awaitable[T]]],
     *args,
-    max_workers: Optional[int] = None,
+    limit_key: Optional[Text] = None,
     **kwargs,
 ) -> T:
-    """Run a function in a thread or coroutine."""
+    """Run a function in a thread or coroutine.
+
+    Sync functions run on the shared executor, `limit_key` selects the
+    concurrency limit configured with `executor.set_limit`.
+    """
 
     if not callable(func):
         raise ValueError(f"The {func} is not callable.")
@@ -108,10 +112,8 @@ async def run_as_coro(
         output = await partial_func()
 
     else:
-        loop = asyncio.get_running_loop()
-        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as pool:
-            partial_func = functools.partial(func, *args, **kwargs)
-            output = await loop.run_in_executor(pool, partial_func)
+        partial_func = functools.partial(func, *args, **kwargs)
+        output = await executor.run(partial_func, limit_key=limit_key)
 
     output = cast(T, output)
     return output
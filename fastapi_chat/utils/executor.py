@@ -0,0 +1,187 @@
+import asyncio
+import concurrent.futures
+import contextvars
+import functools
+import os
+import threading
+from typing import Callable, Dict, Optional, ParamSpec, Text, TypeVar
+
+from fastapi_chat.utils.metrics import Gauge
+
+T = TypeVar("T")
+P = ParamSpec("P")
+
+EXECUTOR_QUEUE_DEPTH = Gauge(
+    "executor_queue_depth",
+    "Calls waiting for a worker thread.",
+    labelnames=("executor",),
+)
+EXECUTOR_ACTIVE_WORKERS = Gauge(
+    "executor_active_workers",
+    "Worker threads currently running a call.",
+    labelnames=("executor",),
+)
+EXECUTOR_MAX_WORKERS = Gauge(
+    "executor_max_workers",
+    "Configured worker threads.",
+    labelnames=("executor",),
+)
+
+
+class SharedExecutor:
+    """Process-wide thread pool for running sync callables off the event loop."""
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        *,
+        name: Optional[Text] = None,
+        thread_name_prefix: Text = "fastapi-chat",
+    ):
+        self._max_workers = max_workers
+        self._thread_name_prefix = thread_name_prefix
+        self._pool: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        self._counter_lock = threading.Lock()
+        self._submitted = 0
+        self._started = 0
+        self._completed = 0
+        self._shut_down = False
+        self._limits: Dict[Text, int] = {}
+        self._semaphores: Dict[Text, asyncio.Semaphore] = {}
+        if name is not None:
+            EXECUTOR_QUEUE_DEPTH.labels(name).set_function(lambda: self.queue_depth)
+            EXECUTOR_ACTIVE_WORKERS.labels(name).set_function(
+                lambda: self.active_workers
+            )
+            EXECUTOR_MAX_WORKERS.labels(name).set_function(lambda: self.max_workers)
+
+    @property
+    def max_workers(self) -> int:
+        if self._max_workers is None:
+            return min(32, (os.cpu_count() or 1) + 4)
+        return self._max_workers
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of submitted calls waiting for a worker thread."""
+
+        return self._submitted - self._started
+
+    @property
+    def active_workers(self) -> int:
+        """Number of worker threads currently running a call."""
+
+        return self._started - self._completed
+
+    @property
+    def is_running(self) -> bool:
+        return self._pool is not None
+
+    def start(self, max_workers: Optional[int] = None) -> None:
+        """Create the thread pool, called on application startup."""
+
+        with self._pool_lock:
+            self._shut_down = False
+            # Semaphores bind to the running event loop, recreate them per start
+            self._semaphores = {}
+            if self._pool is not None:
+                return
+            if max_workers is not None:
+                self._max_workers = max_workers
+            self._pool = concurrent.futures.ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix=self._thread_name_prefix,
+            )
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Shut the thread pool down, called on application shutdown."""
+
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+            self._shut_down = True
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=not wait)
+
+    def set_limit(self, key: Text, limit: Optional[int]) -> None:
+        """Limit the concurrent calls submitted with the given `limit_key`."""
+
+        if limit is None:
+            self._limits.pop(key, None)
+        else:
+            self._limits[key] = max(int(limit), 1)
+        self._semaphores.pop(key, None)
+
+    async def run(
+        self,
+        func: Callable[P, T],
+        *args: P.args,
+        limit_key: Optional[Text] = None,
+        **kwargs: P.kwargs,
+    ) -> T:
+        """Run a sync callable in the pool, honoring the call-site limit.
+
+        The pool starts on first use, but once shut down it is not restarted:
+        late calls raise instead of leaking a pool nothing would shut down.
+        """
+
+        if self._pool is None and not self._shut_down:
+            self.start()
+        semaphore = self._get_semaphore(limit_key)
+        if semaphore is None:
+            return await self._submit(func, *args, **kwargs)
+        async with semaphore:
+            return await self._submit(func, *args, **kwargs)
+
+    def stats(self) -> Dict[Text, int]:
+        return {
+            "max_workers": self.max_workers,
+            "queue_depth": self.queue_depth,
+            "active_workers": self.active_workers,
+            "submitted": self._submitted,
+            "completed": self._completed,
+        }
+
+    def _get_semaphore(self, limit_key: Optional[Text]) -> Optional[asyncio.Semaphore]:
+        if limit_key is None:
+            return None
+        limit = self._limits.get(limit_key)
+        if limit is None:
+            return None
+        semaphore = self._semaphores.get(limit_key)
+        if semaphore is None:
+            semaphore = self._semaphores[limit_key] = asyncio.Semaphore(limit)
+        return semaphore
+
+    async def _submit(self, func: Callable[P, T], *args, **kwargs) -> T:
+        pool = self._pool
+        if pool is None:
+            raise RuntimeError(
+                f"Executor '{self._thread_name_prefix}' has been shut down"
+            )
+
+        def _call() -> T:
+            with self._counter_lock:
+                self._started += 1
+            try:
+                return func(*args, **kwargs)
+            finally:
+                with self._counter_lock:
+                    self._completed += 1
+
+        def _on_done(future: concurrent.futures.Future) -> None:
+            # Calls cancelled before reaching a worker leave the queue here
+            if future.cancelled():
+                with self._counter_lock:
+                    self._started += 1
+                    self._completed += 1
+
+        context = contextvars.copy_context()
+        with self._counter_lock:
+            self._submitted += 1
+        future = pool.submit(functools.partial(context.run, _call))
+        future.add_done_callback(_on_done)
+        return await asyncio.wrap_future(future)
+
+
+executor = SharedExecutor(name="default")
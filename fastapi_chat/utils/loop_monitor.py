@@ -0,0 +1,134 @@
+import asyncio
+import contextlib
+import sys
+import threading
+import time
+import traceback
+from typing import Optional
+
+from ..config import logger
+from .metrics import Counter, Histogram
+
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds",
+    "How late the event loop ran a scheduled wake-up.",
+    buckets=(
+        0.0005,
+        0.001,
+        0.0025,
+        0.005,
+        0.01,
+        0.025,
+        0.05,
+        0.1,
+        0.25,
+        0.5,
+        1.0,
+        2.5,
+        5.0,
+    ),
+)
+EVENT_LOOP_BLOCKED = Counter(
+    "event_loop_blocked_total", "Wake-ups later than the blocking threshold."
+)
+
+
+class LoopMonitor:
+    """Measure the event loop lag and log the stack of blocking code.
+
+    A task sleeps `interval` seconds at a time and records how late it woke
+    up. A watchdog thread checks the task's heartbeat, when the loop has not
+    run it for `threshold` seconds the loop thread's stack is logged, showing
+    the blocking frame while it still blocks. Stacks are logged at most once
+    per `log_interval` seconds.
+    """
+
+    def __init__(self):
+        self.interval = 0.1
+        self.threshold = 0.1
+        self.log_interval = 60.0
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._loop_thread_id: Optional[int] = None
+        self._heartbeat = 0.0
+        self._last_logged = -float("inf")
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def start(
+        self,
+        *,
+        interval: float = 0.1,
+        threshold: float = 0.1,
+        log_interval: float = 60.0,
+    ) -> None:
+        """Start monitoring the running loop, called from the loop."""
+
+        if self.running:
+            return
+        self.interval = interval
+        self.threshold = threshold
+        self.log_interval = log_interval
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.get_running_loop().create_task(self._measure())
+        self._thread = threading.Thread(
+            target=self._watch, name="event-loop-watchdog", daemon=True
+        )
+        self._thread.start()
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._stopped.set()
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+        if self._thread is not None:
+            self._thread.join(timeout=self.threshold + 1)
+            self._thread = None
+
+    async def _measure(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self._heartbeat = time.monotonic()
+            lag = max(0.0, loop.time() - expected)
+            EVENT_LOOP_LAG.observe(lag)
+            if lag >= self.threshold:
+                EVENT_LOOP_BLOCKED.inc()
+
+    def _watch(self) -> None:
+        reported_heartbeat = None
+        while not self._stopped.wait(self.threshold / 2):
+            heartbeat = self._heartbeat
+            blocked_for = time.monotonic() - heartbeat - self.interval
+            if blocked_for < self.threshold or heartbeat == reported_heartbeat:
+                continue
+            # One report per stall, the heartbeat moves once the loop runs again
+            reported_heartbeat = heartbeat
+            now = time.monotonic()
+            if now - self._last_logged < self.log_interval:
+                continue
+            self._last_logged = now
+            self._log_stack(blocked_for)
+
+    def _log_stack(self, blocked_for: float) -> None:
+        frame = sys._current_frames().get(self._loop_thread_id or -1)
+        if frame is None:
+            return
+        stack = "".join(traceback.format_stack(frame))
+        logger.warning(
+            "Event loop blocked for more than %.3fs, loop thread stack:\n%s",
+            blocked_for,
+            stack,
+        )
+
+
+loop_monitor = LoopMonitor()
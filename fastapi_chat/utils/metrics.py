@@ -0,0 +1,271 @@
+import bisect
+import math
+from typing import Callable, Dict, List, Optional, Sequence, Text, Tuple
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+# Content type of the Prometheus text exposition format
+CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class _Metric:
+    type_name: Text = "untyped"
+
+    def __init__(
+        self,
+        name: Text,
+        documentation: Text,
+        *,
+        labelnames: Sequence[Text] = (),
+        registry: Optional["MetricsRegistry"] = None,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames: Tuple[Text, ...] = tuple(labelnames)
+        self._children: Dict[Tuple[Text, ...], "_Metric"] = {}
+        (REGISTRY if registry is None else registry).register(self)
+
+    def labels(self, *values: Text):
+        """Return the child metric for the given label values."""
+
+        if len(values) != len(self.labelnames):
+            raise ValueError(
+                f"Metric '{self.name}' expects labels {self.labelnames}, "
+                + f"got {values}"
+            )
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            child = self._children[key] = self._new_child()
+        return child
+
+    def children(self) -> List[Tuple[Tuple[Text, ...], "_Metric"]]:
+        if not self.labelnames:
+            return [((), self)]
+        return list(self._children.items())
+
+    def _new_child(self) -> "_Metric":
+        raise NotImplementedError
+
+
+class _CounterValue:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def __init__(self, *args, **kwargs):
+        self.value = 0.0
+        super().__init__(*args, **kwargs)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def _new_child(self):
+        return _CounterValue()
+
+
+class _GaugeValue:
+    __slots__ = ("_value", "_function")
+
+    def __init__(self):
+        self._value = 0.0
+        self._function: Optional[Callable[[], float]] = None
+
+    @property
+    def value(self) -> float:
+        if self._function is not None:
+            return float(self._function())
+        return self._value
+
+    def set(self, value: float) -> None:
+        self._value = value
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._value -= amount
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        self._function = function
+
+
+class Gauge(_Metric):
+    type_name = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        self._gauge = _GaugeValue()
+        super().__init__(*args, **kwargs)
+
+    @property
+    def value(self) -> float:
+        return self._gauge.value
+
+    def set(self, value: float) -> None:
+        self._gauge.set(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._gauge.inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._gauge.dec(amount)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        self._gauge.set_function(function)
+
+    def _new_child(self):
+        return _GaugeValue()
+
+
+class _HistogramValue:
+    """Bucket counts of one histogram series.
+
+    Observations are expected from the event loop thread, so updates are
+    plain list increments without locking.
+    """
+
+    __slots__ = ("upper_bounds", "counts", "sum", "count")
+
+    def __init__(self, upper_bounds: Tuple[float, ...]):
+        self.upper_bounds = upper_bounds
+        self.counts = [0] * (len(upper_bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.upper_bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative_counts(self) -> List[Tuple[float, int]]:
+        output: List[Tuple[float, int]] = []
+        total = 0
+        for upper_bound, count in zip(self.upper_bounds + (math.inf,), self.counts):
+            total += count
+            output.append((upper_bound, total))
+        return output
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: Text,
+        documentation: Text,
+        *,
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        labelnames: Sequence[Text] = (),
+        registry: Optional["MetricsRegistry"] = None,
+    ):
+        self.upper_bounds = tuple(sorted(float(b) for b in buckets if b != math.inf))
+        self._histogram = _HistogramValue(self.upper_bounds)
+        super().__init__(name, documentation, labelnames=labelnames, registry=registry)
+
+    def observe(self, value: float) -> None:
+        self._histogram.observe(value)
+
+    @property
+    def sum(self) -> float:
+        return self._histogram.sum
+
+    @property
+    def count(self) -> int:
+        return self._histogram.count
+
+    def cumulative_counts(self) -> List[Tuple[float, int]]:
+        return self._histogram.cumulative_counts()
+
+    def _new_child(self):
+        return _HistogramValue(self.upper_bounds)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[Text, _Metric] = {}
+
+    def register(self, metric: _Metric) -> None:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric '{metric.name}' is already registered")
+        self._metrics[metric.name] = metric
+
+    def unregister(self, metric: _Metric) -> None:
+        self._metrics.pop(metric.name, None)
+
+    def get(self, name: Text) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def metrics(self) -> List[_Metric]:
+        return list(self._metrics.values())
+
+
+REGISTRY = MetricsRegistry()
+
+
+def _escape_help(text: Text) -> Text:
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _escape_label_value(value: Text) -> Text:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> Text:
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[Text], values: Sequence[Text]) -> Text:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape_label_value(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def render_text(registry: Optional[MetricsRegistry] = None) -> Text:
+    """Render the metrics in the Prometheus text exposition format."""
+
+    lines: List[Text] = []
+    for metric in (REGISTRY if registry is None else registry).metrics():
+        lines.append(f"# HELP {metric.name} {_escape_help(metric.documentation)}")
+        lines.append(f"# TYPE {metric.name} {metric.type_name}")
+        for values, child in metric.children():
+            if isinstance(metric, Histogram):
+                names = metric.labelnames + ("le",)
+                for upper_bound, count in child.cumulative_counts():
+                    labels = _format_labels(
+                        names, values + (_format_value(upper_bound),)
+                    )
+                    lines.append(f"{metric.name}_bucket{labels} {count}")
+                labels = _format_labels(metric.labelnames, values)
+                lines.append(f"{metric.name}_sum{labels} {_format_value(child.sum)}")
+                lines.append(f"{metric.name}_count{labels} {child.count}")
+            else:
+                labels = _format_labels(metric.labelnames, values)
+                lines.append(f"{metric.name}{labels} {_format_value(child.value)}")
+    return "\n".join(lines) + "\n"
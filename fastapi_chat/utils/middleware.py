@@ -0,0 +1,150 @@
+import time
+from typing import Any, Dict, Text, Tuple
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .metrics import Counter, Gauge, Histogram
+from .timing import reset_request_timings, start_request_timings
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests by route template and status code.",
+    labelnames=("method", "route", "status"),
+)
+HTTP_REQUEST_ERRORS = Counter(
+    "http_request_errors_total",
+    "HTTP requests answered with a server error or failing mid-response.",
+    labelnames=("method", "route"),
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    labelnames=("method", "route"),
+)
+HTTP_REQUEST_DB_CALLS = Histogram(
+    "http_request_db_calls",
+    "Database calls made while serving a request, by route template.",
+    buckets=(0, 1, 2, 3, 4, 5, 6, 8, 10, 15, 20, 30, 50),
+    labelnames=("method", "route"),
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "HTTP requests being served, counted when the metrics are collected.",
+    labelnames=("method", "route"),
+)
+
+# Route label of requests matching no route, raw paths would be unbounded
+UNMATCHED_ROUTE = "<unmatched>"
+
+# Scopes of the requests being served, by id
+_active_requests: Dict[int, Scope] = {}
+
+
+def route_template(scope: Scope) -> Text:
+    """Path template of the route the router picked for the request, e.g.
+    `/organizations/{org_id}/users`."""
+
+    route = scope.get("route")
+    return getattr(route, "path_format", None) or UNMATCHED_ROUTE
+
+
+class _RouteSeries:
+    """Metric children of one method and route, looked up once."""
+
+    __slots__ = ("method", "route", "duration", "db_calls", "errors", "requests")
+
+    def __init__(self, method: Text, route: Text):
+        self.method = method
+        self.route = route
+        self.duration = HTTP_REQUEST_DURATION.labels(method, route)
+        self.db_calls = HTTP_REQUEST_DB_CALLS.labels(method, route)
+        self.errors = HTTP_REQUEST_ERRORS.labels(method, route)
+        self.requests: Dict[int, Any] = {}
+        HTTP_REQUESTS_IN_FLIGHT.labels(method, route)
+
+    def count(self, status_code: int) -> None:
+        counter = self.requests.get(status_code)
+        if counter is None:
+            counter = self.requests[status_code] = HTTP_REQUESTS.labels(
+                self.method, self.route, str(status_code)
+            )
+        counter.inc()
+
+
+class MetricsMiddleware:
+    """Record the count, errors, latency and DB calls of HTTP requests per route
+    template.
+
+    The route is only known once the router picked it, so it is read from the
+    scope after the request. Updates are plain increments on the event loop
+    thread, the series of a route are looked up once. With `timing_headers`
+    the responses tell their DB calls in `X-DB-Calls`, and the DB, timed
+    dependencies and total time in `Server-Timing`.
+    """
+
+    def __init__(self, app: ASGIApp, *, timing_headers: bool = False):
+        self.app = app
+        self.timing_headers = timing_headers
+        self._series: Dict[Tuple[Text, Text], _RouteSeries] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        failed = False
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.timing_headers:
+                    headers = MutableHeaders(scope=message)
+                    headers.append("X-DB-Calls", str(timings.db_calls))
+                    headers.append(
+                        "Server-Timing",
+                        timings.server_timing(total=time.perf_counter() - started),
+                    )
+            await send(message)
+
+        _active_requests[id(scope)] = scope
+        timings, token = start_request_timings()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            del _active_requests[id(scope)]
+            reset_request_timings(token)
+            series = self.route_series(scope["method"], route_template(scope))
+            series.duration.observe(elapsed)
+            series.db_calls.observe(timings.db_calls)
+            timings.observe_dependencies()
+            series.count(status_code)
+            if failed or status_code >= 500:
+                series.errors.inc()
+
+    def route_series(self, method: Text, route: Text) -> _RouteSeries:
+        series = self._series.get((method, route))
+        if series is None:
+            series = self._series[(method, route)] = _RouteSeries(method, route)
+        return series
+
+
+def collect_in_flight() -> None:
+    """Set the in-flight gauges from the requests being served, called before
+    rendering the metrics."""
+
+    counts: Dict[Tuple[Text, Text], int] = {}
+    for scope in list(_active_requests.values()):
+        key = (scope["method"], route_template(scope))
+        counts[key] = counts.get(key, 0) + 1
+    for key in counts:
+        HTTP_REQUESTS_IN_FLIGHT.labels(*key)
+    for key, gauge in HTTP_REQUESTS_IN_FLIGHT.children():
+        gauge.set(counts.get(key, 0))
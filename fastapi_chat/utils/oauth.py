@@ -1,7 +1,11 @@
+import os
 import time
 from datetime import UTC, datetime, timedelta
-from typing import TYPE_CHECKING, Dict, Optional, Text, Union
+from typing import TYPE_CHECKING, Callable, Dict, Optional, Text, TypeVar, Union
 
+import uuid_utils as uuid
+from cachetools import TLRUCache
+from fastapi import HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
@@ -9,14 +13,49 @@ from pydantic import BaseModel
 
 from ..config import settings
 from ..db.users import get_user
-from ..schemas.oauth import PayloadParam, Token
+from ..schemas.oauth import PayloadParam, Token, token_digest
 from ..schemas.users import UserInDB
+from .executor import SharedExecutor
+from .metrics import Counter, Histogram
 
 if TYPE_CHECKING:
     from fastapi_chat.db._base import DatabaseBase
 
+T = TypeVar("T")
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# Bcrypt releases the GIL, so a thread per core keeps hashing off the event loop
+password_executor = SharedExecutor(
+    settings.PASSWORD_HASH_WORKERS or os.cpu_count() or 1,
+    name="password",
+    thread_name_prefix="fastapi-chat-password",
+)
+
+PASSWORD_HASH_SECONDS = Histogram(
+    "password_hash_duration_seconds",
+    "Time spent hashing or verifying a password.",
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0, 5.0),
+    labelnames=("operation",),
+)
+PASSWORD_HASH_QUEUE_WAIT_SECONDS = Histogram(
+    "password_hash_queue_wait_seconds",
+    "Time a password operation waited for a hashing worker.",
+    labelnames=("operation",),
+)
+PASSWORD_HASH_REJECTED = Counter(
+    "password_hash_rejected_total",
+    "Password operations rejected because the hashing queue was full.",
+    labelnames=("operation",),
+)
+
+# Verified payloads keyed by token digest, each entry expires with its token
+verified_token_cache: TLRUCache[Text, Dict] = TLRUCache(
+    maxsize=settings.VERIFIED_TOKEN_CACHE_SIZE,
+    ttu=lambda _key, payload, _now: payload["exp"],
+    timer=time.time,
+)
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=settings.token_url)
 
 
@@ -30,6 +69,48 @@ def get_password_hash(password: Text | bytes) -> Text:
     return pwd_context.hash(password)
 
 
+def start_password_executor() -> None:
+    """Start the password hashing pool, sized to the cores by default."""
+
+    password_executor.start()
+
+
+async def _run_password_operation(operation: Text, func: Callable[[], T]) -> T:
+    if password_executor.queue_depth >= settings.PASSWORD_HASH_MAX_QUEUE:
+        PASSWORD_HASH_REJECTED.labels(operation).inc()
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please retry later",
+            headers={"Retry-After": "1"},
+        )
+
+    def _timed():
+        started_at = time.perf_counter()
+        return func(), started_at, time.perf_counter()
+
+    submitted_at = time.perf_counter()
+    output, started_at, finished_at = await password_executor.run(_timed)
+    PASSWORD_HASH_QUEUE_WAIT_SECONDS.labels(operation).observe(
+        started_at - submitted_at
+    )
+    PASSWORD_HASH_SECONDS.labels(operation).observe(finished_at - started_at)
+    return output
+
+
+async def verify_password_async(plain_password: Text, hashed_password: Text) -> bool:
+    """Verify the given password in the password hashing pool."""
+
+    return await _run_password_operation(
+        "verify", lambda: verify_password(plain_password, hashed_password)
+    )
+
+
+async def get_password_hash_async(password: Text | bytes) -> Text:
+    """Get the password hash in the password hashing pool."""
+
+    return await _run_password_operation("hash", lambda: get_password_hash(password))
+
+
 async def authenticate_user(
     db: "DatabaseBase", username: Text, password: Text
 ) -> Optional["UserInDB"]:
@@ -38,7 +119,7 @@ async def authenticate_user(
     user = await get_user(db, username=username)
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    if not await verify_password_async(password, user.hashed_password):
         return None
     return user
 
@@ -64,6 +145,8 @@ def create_token(
         )
         expires_at = int(expire_at_dt.timestamp())
     to_encode.update({"exp": expires_at})
+    # Unique token ID, so every issued token identifies a single session
+    to_encode.setdefault("jti", str(uuid.uuid7()))
     encoded_jwt = jwt.encode(to_encode, key, algorithm=algorithm)
     return encoded_jwt
 
@@ -78,6 +161,8 @@ def create_token_model(
     """Create an access token and a refresh token with the given data."""
 
     data_dict = data.model_dump() if isinstance(data, BaseModel) else data
+    # Both tokens name the session, so either one can revoke it
+    data_dict = {**data_dict, "sid": str(uuid.uuid7())}
     expires_at_dt = datetime.now(UTC) + (
         access_token_expires_delta
         if access_token_expires_delta
@@ -101,13 +186,42 @@ def create_token_model(
 def verify_token(token: Text) -> Optional[Dict]:
     """Verify the given token and return the payload if valid."""
 
+    digest = token_digest(token)
+    payload = verified_token_cache.get(digest)
+    if payload is not None:
+        return dict(payload)
+
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
         )
-        return payload
     except JWTError:
         return None
+    if isinstance(payload.get("exp"), int):
+        verified_token_cache[digest] = dict(payload)
+    return payload
+
+
+def forget_verified_token(
+    token: Optional[Text] = None, *, digest: Optional[Text] = None
+) -> None:
+    """Drop the cached verification of a revoked token."""
+
+    if digest is None:
+        if token is None:
+            return
+        digest = token_digest(token)
+    verified_token_cache.pop(digest, None)
+
+
+def get_token_expires_at(token: Text) -> Optional[int]:
+    """Read the `exp` claim of the given token without verifying its signature."""
+
+    try:
+        expires = jwt.get_unverified_claims(token).get("exp")
+    except JWTError:
+        return None
+    return expires if isinstance(expires, int) else None
 
 
 def verify_payload(payload: Dict) -> Optional[PayloadParam]:
@@ -118,6 +232,7 @@ def verify_payload(payload: Dict) -> Optional[PayloadParam]:
     user_id = payload.get("user_id")
     organization_id = payload.get("organization_id")
     disabled = payload.get("disabled")
+    session_id = payload.get("sid")
 
     if not isinstance(subject, Text):
         return None
@@ -125,13 +240,16 @@ def verify_payload(payload: Dict) -> Optional[PayloadParam]:
         return None
     if not isinstance(user_id, Text):
         return None
-    return PayloadParam(
+    verified = PayloadParam(
         sub=subject,
         exp=expires,
         user_id=user_id,
         organization_id=organization_id,
         disabled=disabled,
     )
+    if isinstance(session_id, Text):
+        verified["sid"] = session_id
+    return verified
 
 
 def is_token_expired(token_or_payload: Text | Dict | PayloadParam) -> bool:
@@ -0,0 +1,146 @@
+import functools
+import inspect
+import time
+from contextvars import ContextVar, Token
+from typing import Any, Callable, Dict, List, Optional, Text, Tuple, TypeVar, cast
+
+from ..config import settings
+from .metrics import Histogram
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+DEPENDENCY_DURATION = Histogram(
+    "dependency_duration_seconds",
+    "Time spent in each timed FastAPI dependency, without its sub-dependencies.",
+    buckets=(
+        0.00001,
+        0.000025,
+        0.00005,
+        0.0001,
+        0.00025,
+        0.0005,
+        0.001,
+        0.0025,
+        0.005,
+        0.01,
+        0.025,
+        0.05,
+        0.1,
+        0.25,
+        1.0,
+    ),
+    labelnames=("dependency",),
+)
+
+
+class RequestTimings:
+    """Work done while serving one HTTP request.
+
+    The metrics middleware starts one per request, the instrumented layers add
+    to the current one. Sync code running in threads shares the same object
+    through the copied context.
+    """
+
+    __slots__ = ("db_calls", "db_seconds", "dependencies")
+
+    def __init__(self):
+        self.db_calls = 0
+        self.db_seconds = 0.0
+        self.dependencies: Optional[Dict[Text, float]] = None
+
+    def add_db_call(self, seconds: float) -> None:
+        self.db_calls += 1
+        self.db_seconds += seconds
+
+    def add_dependency(self, name: Text, seconds: float) -> None:
+        if self.dependencies is None:
+            self.dependencies = {}
+        self.dependencies[name] = self.dependencies.get(name, 0.0) + seconds
+
+    def observe_dependencies(self) -> None:
+        """Add the dependency timings to the histograms, called from the event
+        loop thread as sync dependencies run in threads."""
+
+        for name, seconds in (self.dependencies or {}).items():
+            DEPENDENCY_DURATION.labels(name).observe(seconds)
+
+    def server_timing(self, total: Optional[float] = None) -> Text:
+        """Value of the `Server-Timing` response header, durations in ms."""
+
+        metrics: List[Text] = [
+            f'db;dur={self.db_seconds * 1000:.3f};desc="{self.db_calls} calls"'
+        ]
+        for name, seconds in (self.dependencies or {}).items():
+            metrics.append(f"{name};dur={seconds * 1000:.3f}")
+        if total is not None:
+            metrics.append(f"total;dur={total * 1000:.3f}")
+        return ", ".join(metrics)
+
+
+TimingsToken = Token[Optional[RequestTimings]]
+
+_request_timings: ContextVar[Optional[RequestTimings]] = ContextVar(
+    "request_timings", default=None
+)
+
+
+def current_request_timings() -> Optional[RequestTimings]:
+    return _request_timings.get()
+
+
+def start_request_timings() -> Tuple[RequestTimings, TimingsToken]:
+    """Start the timings of a request, reset them with the returned token."""
+
+    timings = RequestTimings()
+    return timings, _request_timings.set(timings)
+
+
+def reset_request_timings(token: TimingsToken) -> None:
+    _request_timings.reset(token)
+
+
+def timed_dependency(
+    func: F, *, name: Optional[Text] = None, enabled: Optional[bool] = None
+) -> F:
+    """Time a FastAPI dependency into the current request's timings.
+
+    The function is returned as is unless `enabled` or
+    `settings.DEPENDENCY_TIMING` is true, so disabled timing costs nothing.
+    FastAPI resolves the sub-dependencies before calling the function, the
+    time is the dependency's own.
+    """
+
+    if enabled is None:
+        enabled = settings.DEPENDENCY_TIMING
+    if not enabled:
+        return func
+    if inspect.isgeneratorfunction(func) or inspect.isasyncgenfunction(func):
+        raise TypeError(f"Dependencies with yield cannot be timed: {func}")
+    dependency_name = name or func.__name__
+
+    def record(started: float) -> None:
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.add_dependency(dependency_name, time.perf_counter() - started)
+
+    if inspect.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def timed_async(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                record(started)
+
+        return cast(F, timed_async)
+
+    @functools.wraps(func)
+    def timed(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            record(started)
+
+    return cast(F, timed)
@@ -1,10 +1,32 @@
+import asyncio
+from datetime import timedelta
+
 import httpx
 import pytest
+import uuid_utils as uuid
+from faker import Faker
 from fastapi.testclient import TestClient
 
+from fastapi_chat.config import settings
+from fastapi_chat.db._instrumented import DB_CALLS
+from fastapi_chat.db._memory import DatabaseMemory
+from fastapi_chat.db.tokens import (
+    invalidate_token,
+    is_token_blocked,
+    run_blacklist_sweeper,
+    sweep_blacklisted_tokens,
+)
+from fastapi_chat.schemas.oauth import token_digest
 from fastapi_chat.schemas.roles import Role
+from fastapi_chat.utils.oauth import (
+    PASSWORD_HASH_REJECTED,
+    create_token_model,
+    verified_token_cache,
+)
 from tests.utils import LoginData, get_me, login
 
+fake = Faker()
+
 
 @pytest.mark.asyncio
 async def test_login(client: TestClient, user_super_admin: LoginData):
@@ -46,3 +68,184 @@ async def test_logout(client: TestClient, user_super_admin: LoginData):
     with pytest.raises(httpx.HTTPStatusError):
         response = client.get("/users/me", headers=token.to_headers())
         response.raise_for_status()
+
+
+@pytest.mark.asyncio
+async def test_revocation_evicts_verified_token_cache(
+    client: TestClient, user_super_admin: LoginData
+):
+    # Logout after the access token payload was cached by a request
+    token = login(client, **user_super_admin.model_dump())
+    response = client.get("/me", headers=token.to_headers())
+    response.raise_for_status()
+    assert token_digest(token.access_token) in verified_token_cache
+
+    response = client.post("/auth/logout", headers=token.to_headers())
+    response.raise_for_status()
+    assert token_digest(token.access_token) not in verified_token_cache
+    response = client.get("/me", headers=token.to_headers())
+    assert response.status_code == 401
+
+    # Replay a refresh token after its payload was cached by the first refresh
+    token = login(client, **user_super_admin.model_dump())
+    refresh = {"grant_type": "refresh_token", "refresh_token": token.refresh_token}
+    response = client.post("/auth/refresh-token", json=refresh)
+    response.raise_for_status()
+    assert token_digest(token.refresh_token) not in verified_token_cache
+    response = client.post("/auth/refresh-token", json=refresh)
+    assert response.status_code == 401
+    response = client.get("/me", headers=token.to_headers())
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_logout_token_of_another_worker(
+    client: TestClient, user_super_admin: LoginData
+):
+    # A session issued by another worker is not in this worker's store
+    me = get_me(client, user_super_admin)
+    token = create_token_model(
+        data={
+            "sub": me.username,
+            "user_id": me.id,
+            "organization_id": me.organization_id,
+            "disabled": me.disabled,
+        }
+    )
+    response = client.get("/me", headers=token.to_headers())
+    response.raise_for_status()
+
+    response = client.post("/auth/logout", headers=token.to_headers())
+    response.raise_for_status()
+
+    response = client.get("/me", headers=token.to_headers())
+    assert response.status_code == 401
+    response = client.post(
+        "/auth/refresh-token",
+        json={"grant_type": "refresh_token", "refresh_token": token.refresh_token},
+    )
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_sweep_expired_blacklisted_tokens():
+    db = DatabaseMemory()
+    expired = create_token_model(
+        {"sub": "someone"},
+        access_token_expires_delta=timedelta(seconds=-10),
+        refresh_token_expires_delta=timedelta(seconds=-10),
+    )
+    current = create_token_model({"sub": "someone"})
+    await invalidate_token(db, token=expired)
+    await invalidate_token(db, token=current)
+    assert await is_token_blocked(db, token=expired.access_token)
+
+    # Only the tokens past their expiry leave the blacklist
+    assert await sweep_blacklisted_tokens(db) == 2
+    assert not await is_token_blocked(db, token=expired.access_token)
+    assert not await is_token_blocked(db, token=expired.refresh_token)
+    assert await is_token_blocked(db, token=current.access_token)
+    assert await is_token_blocked(db, token=current.refresh_token)
+    assert await sweep_blacklisted_tokens(db) == 0
+
+    # The sweeper runs periodically until cancelled
+    expired = create_token_model(
+        {"sub": "someone"}, access_token_expires_delta=timedelta(seconds=-10)
+    )
+    await invalidate_token(db, token=expired)
+    sweeper = asyncio.create_task(run_blacklist_sweeper(db, interval=0.01))
+    try:
+        for _ in range(100):
+            if not await is_token_blocked(db, token=expired.access_token):
+                break
+            await asyncio.sleep(0.01)
+        assert not await is_token_blocked(db, token=expired.access_token)
+    finally:
+        sweeper.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await sweeper
+    assert await is_token_blocked(db, token=current.access_token)
+
+
+@pytest.mark.asyncio
+async def test_multiple_sessions(
+    client: TestClient, user_super_admin: LoginData, monkeypatch: pytest.MonkeyPatch
+):
+    # Each login is its own session, logging out one keeps the others
+    first = login(client, **user_super_admin.model_dump())
+    second = login(client, **user_super_admin.model_dump())
+    response = client.post("/auth/logout", headers=first.to_headers())
+    response.raise_for_status()
+    assert client.get("/me", headers=first.to_headers()).status_code == 401
+    assert client.get("/me", headers=second.to_headers()).status_code == 200
+
+    # Beyond the limit, the oldest sessions are revoked
+    monkeypatch.setattr(settings, "MAX_SESSIONS_PER_USER", 2)
+    third = login(client, **user_super_admin.model_dump())
+    fourth = login(client, **user_super_admin.model_dump())
+    assert client.get("/me", headers=second.to_headers()).status_code == 401
+    assert client.get("/me", headers=third.to_headers()).status_code == 200
+    assert client.get("/me", headers=fourth.to_headers()).status_code == 200
+    response = client.post(
+        "/auth/refresh-token",
+        json={"grant_type": "refresh_token", "refresh_token": second.refresh_token},
+    )
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_login_rejected_when_hashing_queue_is_full(
+    client: TestClient, user_super_admin: LoginData, monkeypatch: pytest.MonkeyPatch
+):
+    rejected = PASSWORD_HASH_REJECTED.labels("verify").value
+    monkeypatch.setattr(settings, "PASSWORD_HASH_MAX_QUEUE", 0)
+    response = client.post("/auth/login", data=user_super_admin.model_dump())
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert PASSWORD_HASH_REJECTED.labels("verify").value == rejected + 1
+
+    monkeypatch.undo()
+    login(client, **user_super_admin.model_dump())
+
+
+@pytest.mark.asyncio
+async def test_denied_requests_skip_path_lookups(
+    client: TestClient, user_super_admin: LoginData
+):
+    token = login(client, **user_super_admin.model_dump())
+    prisoner = LoginData(username=fake.user_name(), password=fake.password())
+    response = client.post(
+        "/platform/users",
+        json={
+            "username": prisoner.username,
+            "email": fake.safe_email(),
+            "password": prisoner.password,
+            "full_name": fake.name(),
+            "role": Role.PRISONER.value,
+        },
+        headers=token.to_headers(),
+    )
+    response.raise_for_status()
+    prisoner_token = login(client, **prisoner.model_dump())
+    # Cache the caller, so only path lookups would reach the database
+    assert get_me(client, prisoner_token).role == Role.PRISONER
+
+    lookups = [
+        DB_CALLS.labels("retrieve_user"),
+        DB_CALLS.labels("retrieve_organization"),
+    ]
+    denials = [
+        ({}, 401),
+        ({"Authorization": "Bearer not-a-token"}, 401),
+        (prisoner_token.to_headers(), 403),
+    ]
+    for headers, status_code in denials:
+        # Fresh IDs, any lookup of them would miss the caches
+        urls = [
+            f"/organizations/{uuid.uuid7()}/users/{uuid.uuid7()}",
+            f"/platform/users/{uuid.uuid7()}",
+        ]
+        for url in urls:
+            calls = [lookup.value for lookup in lookups]
+            assert client.get(url, headers=headers).status_code == status_code
+            assert [lookup.value for lookup in lookups] == calls
@@ -0,0 +1,118 @@
+import asyncio
+from typing import Callable, List
+
+import pytest
+
+from fastapi_chat.db._base import DatabaseBase
+from fastapi_chat.db.tokens import invalidate_token, is_token_blocked
+from fastapi_chat.db.users import get_user_by_id, get_user_cache, update_user
+from fastapi_chat.events import Event, EventBus
+from fastapi_chat.events.handlers import register_event_handlers
+from fastapi_chat.realtime import ConversationHub
+from fastapi_chat.schemas.users import UserUpdate
+from fastapi_chat.utils.oauth import create_token_model
+
+
+async def wait_for(condition: Callable[[], bool], timeout: float = 2.0) -> bool:
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not condition():
+        if loop.time() > deadline:
+            return False
+        await asyncio.sleep(0.01)
+    return True
+
+
+@pytest.mark.asyncio
+async def test_events_propagate_between_workers():
+    # Two workers, each with its own database state, sharing a fake Redis
+    workers = []
+    for _ in range(2):
+        db = DatabaseBase.from_url(None)
+        hub = ConversationHub()
+        bus = EventBus.from_url("fakeredis://localhost", channel="test-events")
+        register_event_handlers(bus, db=db, hub=hub)
+        await bus.start()
+        db.event_bus = hub.event_bus = bus
+        workers.append((db, hub, bus))
+    (db_a, hub_a, bus_a), (db_b, hub_b, bus_b) = workers
+    received: List[Event] = []
+    bus_b.subscribe("test.coalesced", received.append)
+
+    try:
+        # A token revoked on one worker is blocked on the other
+        token = create_token_model({"sub": "someone"})
+        await invalidate_token(db_a, token=token)
+        assert await is_token_blocked(db_a, token=token.access_token)
+        assert await wait_for(lambda: db_b._db["blacklisted_tokens"] != {})
+        assert await is_token_blocked(db_b, token=token.access_token)
+        assert await is_token_blocked(db_b, token=token.refresh_token)
+
+        # An updated user is dropped from the cache of the other worker
+        user_id = next(iter(db_b._db["users"]))
+        assert await get_user_by_id(db_b, user_id=user_id) is not None
+        assert get_user_cache(db_b).get(user_id) is not None
+        await update_user(
+            db_a, user_id=user_id, user_update=UserUpdate(full_name="Renamed")
+        )
+        assert await wait_for(lambda: get_user_cache(db_b).get(user_id) is None)
+
+        # Conversation events reach clients connected to the other worker
+        connection = hub_b.connect(None, user_id="user-b")  # type: ignore[arg-type]
+        conversation = type(
+            "Conversation",
+            (),
+            {
+                "id": "conversation-b",
+                "participants": [type("Participant", (), {"user_id": "user-b"})()],
+            },
+        )()
+        assert hub_a.publish_to_conversation(conversation, "message.created", {}) == 0
+        assert await wait_for(lambda: not connection.queue.empty())
+        assert "message.created" in connection.queue.get_nowait()
+
+        # Events with the same key in a batch coalesce to the latest one
+        for i in range(5):
+            bus_a.publish("test.coalesced", {"value": i}, key="same")
+        assert await wait_for(lambda: len(received) > 0)
+        await asyncio.sleep(0.05)
+        assert [e.data["value"] for e in received] == [4]
+    finally:
+        for _, _, bus in workers:
+            await bus.stop()
+
+
+@pytest.mark.asyncio
+async def test_event_bus_subscribes_again_after_disconnect():
+    from fastapi_chat.events._redis import RedisEventBus, _fake_server
+
+    publisher = EventBus.from_url("fakeredis://localhost", channel="test-reconnect")
+    subscriber = EventBus.from_url("fakeredis://localhost", channel="test-reconnect")
+    assert isinstance(subscriber, RedisEventBus)
+    subscriber.reconnect_delay = 0.01
+    received: List[Event] = []
+    subscriber.subscribe("test.reconnect", received.append)
+    await publisher.start()
+    await subscriber.start()
+
+    try:
+        # The listener outlives a dropped connection
+        _fake_server().connected = False
+        await asyncio.sleep(0.05)
+        _fake_server().connected = True
+        assert subscriber._listener is not None
+        assert not subscriber._listener.done()
+
+        async def published() -> bool:
+            publisher.publish("test.reconnect", {})
+            await publisher.flush()
+            return await wait_for(lambda: len(received) > 0, timeout=0.1)
+
+        for _ in range(20):
+            if await published():
+                break
+        assert received
+    finally:
+        _fake_server().connected = True
+        await publisher.stop()
+        await subscriber.stop()
@@ -0,0 +1,59 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from fastapi_chat.db._instrumented import DB_LIMIT_KEY, _instrument
+from fastapi_chat.utils.executor import SharedExecutor, executor
+
+
+class ConcurrencyProbe:
+    """Sync callable recording the most calls running at the same time."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running = 0
+        self.peak = 0
+
+    def __call__(self) -> None:
+        with self.lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        time.sleep(0.05)
+        with self.lock:
+            self.running -= 1
+
+
+@pytest.mark.asyncio
+async def test_limit_caps_concurrent_calls():
+    pool = SharedExecutor(8, thread_name_prefix="test-limit")
+    pool.set_limit("limited", 2)
+    try:
+        limited = ConcurrencyProbe()
+        await asyncio.gather(
+            *(pool.run(limited, limit_key="limited") for _ in range(8))
+        )
+        assert limited.peak == 2
+
+        # Calls without a limit key use every worker
+        unlimited = ConcurrencyProbe()
+        await asyncio.gather(*(pool.run(unlimited) for _ in range(8)))
+        assert unlimited.peak > 2
+    finally:
+        pool.shutdown()
+
+    with pytest.raises(RuntimeError):
+        await pool.run(ConcurrencyProbe())
+
+
+@pytest.mark.asyncio
+async def test_sync_database_calls_share_the_db_limit():
+    probe = ConcurrencyProbe()
+    call = _instrument("retrieve_user", probe)
+    executor.set_limit(DB_LIMIT_KEY, 3)
+    try:
+        await asyncio.gather(*(call() for _ in range(9)))
+    finally:
+        executor.set_limit(DB_LIMIT_KEY, None)
+    assert probe.peak == 3
@@ -0,0 +1,159 @@
+from typing import Dict, Text
+
+import pytest
+from faker import Faker
+from fastapi.testclient import TestClient
+
+from fastapi_chat.schemas.conversations import Conversation, ConversationCreate
+from fastapi_chat.schemas.organizations import Organization, OrganizationCreate
+from fastapi_chat.schemas.pagination import Pagination
+from fastapi_chat.schemas.roles import Role
+from fastapi_chat.schemas.users import User, UserCreate
+from tests.utils import LoginData, get_me, login
+
+fake = Faker()
+
+state: Dict[Text, Text] = {}
+
+
+@pytest.mark.asyncio
+async def test_init_organization(
+    client: TestClient,
+    user_super_admin: LoginData,
+    user_org_admin: LoginData,
+    user_org_client: LoginData,
+    user_org_viewer: LoginData,
+):
+    token = login(client, **user_super_admin.model_dump())
+
+    # Create an organization
+    response = client.post(
+        "/organizations",
+        json=OrganizationCreate.model_validate({"name": fake.company()}).model_dump(
+            exclude_none=True
+        ),
+        headers=token.to_headers(),
+    )
+    response.raise_for_status()
+    org = Organization.model_validate(response.json())
+    state["org_id"] = org.id
+
+    # Create organization users
+    for login_data, role in (
+        (user_org_admin, Role.ORG_ADMIN),
+        (user_org_client, Role.ORG_CLIENT),
+        (user_org_viewer, Role.ORG_VIEWER),
+    ):
+        user_create = UserCreate.model_validate(
+            {
+                "username": login_data.username,
+                "email": fake.safe_email(),
+                "password": login_data.password,
+                "full_name": fake.name(),
+                "role": role.value,
+            }
+        )
+        response = client.post(
+            f"/organizations/{org.id}/users",
+            json=user_create.model_dump(exclude_none=True),
+            headers=token.to_headers(),
+        )
+        response.raise_for_status()
+        user = User.model_validate(response.json())
+        assert user.organization_id == org.id
+        assert user.role == role
+
+
+@pytest.mark.asyncio
+async def test_org_admin_create_conversations(
+    client: TestClient,
+    user_org_admin: LoginData,
+    user_org_client: LoginData,
+    user_org_viewer: LoginData,
+):
+    org_id = state["org_id"]
+    token = login(client, **user_org_admin.model_dump())
+    admin = get_me(client, token)
+    org_client = get_me(client, user_org_client)
+    org_viewer = get_me(client, user_org_viewer)
+
+    # Three conversations with the client, one with the viewer only
+    for participant_ids in (
+        [admin.id, org_client.id],
+        [admin.id, org_client.id, org_viewer.id],
+        [org_client.id, org_viewer.id],
+        [admin.id, org_viewer.id],
+    ):
+        conversation_create = ConversationCreate.model_validate(
+            {"type": "group", "name": fake.word(), "participant_ids": participant_ids}
+        )
+        response = client.post(
+            f"/organizations/{org_id}/conversations",
+            json=conversation_create.model_dump(exclude_none=True),
+            headers=token.to_headers(),
+        )
+        response.raise_for_status()
+        conversation = Conversation.model_validate(response.json())
+        assert conversation.organization_id == org_id
+
+    response = client.get(
+        f"/organizations/{org_id}/conversations", headers=token.to_headers()
+    )
+    response.raise_for_status()
+    conversations_res = Pagination[Conversation].model_validate(response.json())
+    assert len(conversations_res.data) == 4
+
+
+@pytest.mark.asyncio
+async def test_list_my_conversations(
+    client: TestClient, user_org_client: LoginData, user_org_viewer: LoginData
+):
+    org_id = state["org_id"]
+    token = login(client, **user_org_client.model_dump())
+    org_client = get_me(client, token)
+
+    response = client.get(
+        f"/organizations/{org_id}/conversations/me", headers=token.to_headers()
+    )
+    response.raise_for_status()
+    my_conversations = Pagination[Conversation].model_validate(response.json())
+    assert len(my_conversations.data) == 3
+    assert my_conversations.has_more is False
+    for conversation in my_conversations.data:
+        assert org_client.id in [p.user_id for p in conversation.participants]
+    conversation_ids = [conversation.id for conversation in my_conversations.data]
+    assert conversation_ids == sorted(conversation_ids)
+
+    # Paginate in descending order
+    response = client.get(
+        f"/organizations/{org_id}/conversations/me",
+        params={"sort": "desc", "limit": 2},
+        headers=token.to_headers(),
+    )
+    response.raise_for_status()
+    page = Pagination[Conversation].model_validate(response.json())
+    assert [c.id for c in page.data] == conversation_ids[::-1][:2]
+    assert page.has_more is True
+    response = client.get(
+        f"/organizations/{org_id}/conversations/me",
+        params={"sort": "desc", "limit": 2, "start": page.last_id},
+        headers=token.to_headers(),
+    )
+    response.raise_for_status()
+    page = Pagination[Conversation].model_validate(response.json())
+    assert [c.id for c in page.data] == conversation_ids[::-1][1:]
+    assert page.has_more is False
+
+    # Organization clients cannot list every conversation
+    response = client.get(
+        f"/organizations/{org_id}/conversations", headers=token.to_headers()
+    )
+    assert response.status_code == 403
+
+    # The viewer sees its own conversations only
+    response = client.get(
+        f"/organizations/{org_id}/conversations/me",
+        headers=login(client, **user_org_viewer.model_dump()).to_headers(),
+    )
+    response.raise_for_status()
+    assert len(Pagination[Conversation].model_validate(response.json()).data) == 3
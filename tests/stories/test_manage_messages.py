@@ -0,0 +1,285 @@
+import threading
+import uuid
+from typing import Dict, Text
+
+import pytest
+from faker import Faker
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from fastapi_chat.config import settings
+from fastapi_chat.schemas.conversations import Conversation, ConversationCreate
+from fastapi_chat.schemas.messages import Message, MessageCreate, MessageUpdate
+from fastapi_chat.schemas.organizations import Organization, OrganizationCreate
+from fastapi_chat.schemas.pagination import Pagination
+from fastapi_chat.schemas.roles import Role
+from fastapi_chat.schemas.users import UserCreate
+from tests.utils import LoginData, get_me, login
+
+fake = Faker()
+
+state: Dict[Text, Text] = {}
+
+
+@pytest.mark.asyncio
+async def test_init_conversation(
+    client: TestClient,
+    user_super_admin: LoginData,
+    user_org_admin: LoginData,
+    user_org_client: LoginData,
+    user_org_viewer: LoginData,
+):
+    token = login(client, **user_super_admin.model_dump())
+
+    # Create an organization with its users
+    response = client.post(
+        "/organizations",
+        json=OrganizationCreate.model_validate({"name": fake.company()}).model_dump(
+            exclude_none=True
+        ),
+        headers=token.to_headers(),
+    )
+    response.raise_for_status()
+    org = Organization.model_validate(response.json())
+    state["org_id"] = org.id
+    for login_data, role in (
+        (user_org_admin, Role.ORG_ADMIN),
+        (user_org_client, Role.ORG_CLIENT),
+        (user_org_viewer, Role.ORG_VIEWER),
+    ):
+        user_create = UserCreate.model_validate(
+            {
+                "username": login_data.username,
+                "email": fake.safe_email(),
+                "password": login_data.password,
+                "full_name": fake.name(),
+                "role": role.value,
+            }
+        )
+        response = client.post(
+            f"/organizations/{org.id}/users",
+            json=user_create.model_dump(exclude_none=True),
+            headers=token.to_headers(),
+        )
+        response.raise_for_status()
+
+    # The admin opens a conversation with the client
+    token = login(client, **user_org_admin.model_dump())
+    admin = get_me(client, token)
+    org_client = get_me(client, user_org_client)
+    response = client.post(
+        f"/organizations/{org.id}/conversations",
+        json=ConversationCreate.model_validate(
+            {
+                "type": "one_on_one",
+                "participant_ids": [admin.id, org_client.id],
+            }
+        ).model_dump(exclude_none=True),
+        headers=token.to_headers(),
+    )
+    response.raise_for_status()
+    state["conversation_id"] = Conversation.model_validate(response.json()).id
+
+
+@pytest.mark.asyncio
+async def test_send_and_list_messages(
+    client: TestClient, user_org_admin: LoginData, user_org_client: LoginData
+):
+    url = (
+        f"/organizations/{state['org_id']}"
+        + f"/conversations/{state['conversation_id']}/messages"
+    )
+    admin_token = login(client, **user_org_admin.model_dump())
+    client_token = login(client, **user_org_client.model_dump())
+    org_client = get_me(client, client_token)
+
+    message_ids = []
+    for i, token in enumerate((admin_token, client_token) * 3):
+        response = client.post(
+            url,
+            json=MessageCreate.model_validate({"content": f"message {i}"}).model_dump(
+                exclude_none=True
+            ),
+            headers=token.to_headers(),
+        )
+        assert response.status_code == 201
+        message = Message.model_validate(response.json())
+        assert message.conversation_id == state["conversation_id"]
+        message_ids.append(message.id)
+    assert message_ids == sorted(message_ids)
+    state["client_message_id"] = message_ids[1]
+
+    # Latest messages come first
+    response = client.get(url, params={"limit": 4}, headers=client_token.to_headers())
+    response.raise_for_status()
+    page = Pagination[Message].model_validate(response.json())
+    assert [m.id for m in page.data] == message_ids[::-1][:4]
+    assert page.has_more is True
+    response = client.get(
+        url,
+        params={"limit": 4, "start": page.last_id},
+        headers=client_token.to_headers(),
+    )
+    response.raise_for_status()
+    page = Pagination[Message].model_validate(response.json())
+    assert [m.id for m in page.data] == message_ids[2::-1]
+    assert page.has_more is False
+    assert page.data[1].sender_id == org_client.id
+
+
+@pytest.mark.asyncio
+async def test_update_and_delete_messages(
+    client: TestClient, user_org_client: LoginData, user_org_viewer: LoginData
+):
+    url = (
+        f"/organizations/{state['org_id']}"
+        + f"/conversations/{state['conversation_id']}/messages"
+    )
+    message_url = f"{url}/{state['client_message_id']}"
+    client_token = login(client, **user_org_client.model_dump())
+
+    # The sender edits the message
+    response = client.put(
+        message_url,
+        json=MessageUpdate.model_validate({"content": "edited"}).model_dump(
+            exclude_none=True
+        ),
+        headers=client_token.to_headers(),
+    )
+    response.raise_for_status()
+    message = Message.model_validate(response.json())
+    assert message.content == "edited"
+    assert message.is_edited is True
+
+    # Viewers may read the conversation but cannot post or edit in it
+    viewer_token = login(client, **user_org_viewer.model_dump())
+    response = client.get(url, headers=viewer_token.to_headers())
+    response.raise_for_status()
+    response = client.post(
+        url, json={"content": "hello"}, headers=viewer_token.to_headers()
+    )
+    assert response.status_code == 403
+    response = client.put(
+        message_url, json={"content": "hijacked"}, headers=viewer_token.to_headers()
+    )
+    assert response.status_code == 403
+
+    # Soft delete keeps the message in the log
+    response = client.delete(message_url, headers=client_token.to_headers())
+    assert response.status_code == 204
+    response = client.get(message_url, headers=client_token.to_headers())
+    response.raise_for_status()
+    assert Message.model_validate(response.json()).is_deleted is True
+
+
+@pytest.mark.asyncio
+async def test_receive_messages_over_websocket(
+    client: TestClient, user_org_admin: LoginData, user_org_client: LoginData
+):
+    url = (
+        f"/organizations/{state['org_id']}"
+        + f"/conversations/{state['conversation_id']}/messages"
+    )
+    admin_token = login(client, **user_org_admin.model_dump())
+    client_token = login(client, **user_org_client.model_dump())
+
+    # Unauthenticated connections are refused
+    with pytest.raises(WebSocketDisconnect):
+        with client.websocket_connect("/ws?access_token=invalid") as websocket:
+            websocket.receive_text()
+
+    with client.websocket_connect(
+        "/ws", headers=client_token.to_headers()
+    ) as websocket:
+        websocket.send_text("ping")
+        assert websocket.receive_text() == "pong"
+
+        response = client.post(
+            url, json={"content": "pushed"}, headers=admin_token.to_headers()
+        )
+        assert response.status_code == 201
+        event = websocket.receive_json()
+        assert event["event"] == "message.created"
+        assert event["data"]["id"] == response.json()["id"]
+        assert event["data"]["content"] == "pushed"
+
+
+@pytest.mark.asyncio
+async def test_receive_messages_over_sse(
+    client: TestClient,
+    user_org_admin: LoginData,
+    user_org_client: LoginData,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    url = (
+        f"/organizations/{state['org_id']}"
+        + f"/conversations/{state['conversation_id']}"
+    )
+    admin_token = login(client, **user_org_admin.model_dump())
+    client_token = login(client, **user_org_client.model_dump())
+    response = client.get(
+        f"{url}/messages",
+        params={"sort": "asc", "limit": 100},
+        headers=client_token.to_headers(),
+    )
+    response.raise_for_status()
+    message_ids = [
+        m.id for m in Pagination[Message].model_validate(response.json()).data
+    ]
+
+    # Unauthenticated streams are refused
+    response = client.get(f"{url}/events")
+    assert response.status_code == 401
+
+    # Short streams, so the test client can read them to the end
+    monkeypatch.setattr(settings, "REALTIME_SSE_MAX_STREAM_SECONDS", 1.0)
+    monkeypatch.setattr(settings, "REALTIME_SSE_HEARTBEAT_SECONDS", 0.2)
+    sender = threading.Timer(
+        0.3,
+        client.post,
+        args=(f"{url}/messages",),
+        kwargs={"json": {"content": "streamed"}, "headers": admin_token.to_headers()},
+    )
+    sender.start()
+    # Resuming replays the messages created after the last seen event
+    response = client.get(
+        f"/organizations/{state['org_id']}/conversations/me/events",
+        params={"access_token": client_token.access_token},
+        headers={"Last-Event-ID": message_ids[-3]},
+    )
+    sender.join()
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    event_ids = [
+        line.removeprefix("id: ")
+        for line in response.text.splitlines()
+        if line.startswith("id: ")
+    ]
+    assert event_ids[:2] == message_ids[-2:]
+    assert len(event_ids) == 3
+    assert "data: " in response.text and '"streamed"' in response.text
+    assert ": heartbeat" in response.text
+
+    # Metadata changes reach the conversation stream
+    sender = threading.Timer(
+        0.3,
+        client.put,
+        args=(url,),
+        kwargs={"json": {"name": "renamed"}, "headers": admin_token.to_headers()},
+    )
+    sender.start()
+    response = client.get(f"{url}/events", headers=client_token.to_headers())
+    sender.join()
+    assert response.status_code == 200
+    assert "event: conversation.updated" in response.text
+    assert '"renamed"' in response.text
+
+    # IDs which are not message UUIDv7s start a fresh stream
+    for last_event_id in (str(uuid.uuid4()), "garbage"):
+        response = client.get(
+            f"/organizations/{state['org_id']}/conversations/me/events",
+            headers={**client_token.to_headers(), "Last-Event-ID": last_event_id},
+        )
+        assert response.status_code == 200
+        assert not any(line.startswith("id: ") for line in response.text.splitlines())
+        assert ": heartbeat" in response.text
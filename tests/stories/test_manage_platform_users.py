@@ -173,3 +173,48 @@ async def test_platform_admin_delete_users(
     response.raise_for_status()
     user_list_res = Pagination[User].model_validate(response.json())
     assert len(user_list_res.data) == 3
+
+
+@pytest.mark.asyncio
+async def test_cached_user_follows_updates_and_deletes(
+    client: TestClient, user_super_admin: LoginData
+):
+    token = login(client, **user_super_admin.model_dump())
+    user_login = LoginData(username=fake.user_name(), password=fake.password())
+    response = client.post(
+        "/platform/users",
+        json={
+            "username": user_login.username,
+            "email": fake.safe_email(),
+            "password": user_login.password,
+            "full_name": fake.name(),
+            "role": Role.PLATFORM_VIEWER.value,
+        },
+        headers=token.to_headers(),
+    )
+    response.raise_for_status()
+    user_id = User.model_validate(response.json()).id
+
+    # The user's own requests cache the user
+    user_token = login(client, **user_login.model_dump())
+    assert get_me(client, user_token).role == Role.PLATFORM_VIEWER
+    response = client.get(f"/platform/users/{user_id}", headers=token.to_headers())
+    response.raise_for_status()
+
+    # Updates replace the cached user
+    response = client.put(
+        f"/platform/users/{user_id}",
+        json={"full_name": "Renamed User", "role": Role.PLATFORM_EDITOR.value},
+        headers=token.to_headers(),
+    )
+    response.raise_for_status()
+    me = get_me(client, user_token)
+    assert me.full_name == "Renamed User"
+    assert me.role == Role.PLATFORM_EDITOR
+    response = client.get(f"/platform/users/{user_id}", headers=token.to_headers())
+    assert User.model_validate(response.json()).full_name == "Renamed User"
+
+    # A deleted user is refused at once, not when the cache expires
+    response = client.delete(f"/platform/users/{user_id}", headers=token.to_headers())
+    response.raise_for_status()
+    assert client.get("/me", headers=user_token.to_headers()).status_code == 403
@@ -0,0 +1,164 @@
+import asyncio
+import logging
+import time
+from typing import Text
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from fastapi_chat.config import settings
+from fastapi_chat.db._base import DatabaseBase
+from fastapi_chat.db._instrumented import InstrumentedDatabase
+from fastapi_chat.utils.loop_monitor import (
+    EVENT_LOOP_BLOCKED,
+    EVENT_LOOP_LAG,
+    LoopMonitor,
+)
+from fastapi_chat.utils.metrics import Histogram, MetricsRegistry, render_text
+from fastapi_chat.utils.middleware import MetricsMiddleware
+from fastapi_chat.utils.timing import timed_dependency
+from tests.utils import LoginData, get_headers
+
+
+def test_render_text():
+    registry = MetricsRegistry()
+    histogram = Histogram(
+        "test_seconds",
+        "Test latency.",
+        labelnames=("route",),
+        buckets=(0.1, 1.0),
+        registry=registry,
+    )
+    histogram.labels('/a"b').observe(0.1)
+    histogram.labels('/a"b').observe(5)
+
+    assert render_text(registry).splitlines() == [
+        "# HELP test_seconds Test latency.",
+        "# TYPE test_seconds histogram",
+        'test_seconds_bucket{route="/a\\"b",le="0.1"} 1',
+        'test_seconds_bucket{route="/a\\"b",le="1.0"} 1',
+        'test_seconds_bucket{route="/a\\"b",le="+Inf"} 2',
+        'test_seconds_sum{route="/a\\"b"} 5.1',
+        'test_seconds_count{route="/a\\"b"} 2',
+    ]
+
+
+@pytest.mark.asyncio
+async def test_metrics_by_route_template(
+    client: TestClient, user_super_admin: LoginData
+):
+    response = client.get("/metrics")
+    assert response.status_code == 401
+
+    headers = get_headers(client, user_super_admin)
+    response = client.get("/organizations/not-an-organization/users", headers=headers)
+    assert response.status_code == 404
+    client.get("/no/such/path")
+
+    response = client.get("/metrics", headers=headers)
+    response.raise_for_status()
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+    labels = 'method="GET",route="/organizations/{org_id}/users"'
+    assert f'http_requests_total{{{labels},status="404"}} ' in text
+    assert f"http_request_duration_seconds_count{{{labels}}} " in text
+    assert f"http_request_errors_total{{{labels}}} 0.0" in text
+    assert 'route="<unmatched>",status="404"' in text
+    assert "not-an-organization" not in text
+    # The /metrics request itself is in flight while rendering
+    assert 'http_requests_in_flight{method="GET",route="/metrics"} 1.0' in text
+
+
+def test_db_calls_per_request():
+    db = DatabaseBase.from_url(None, instrument=True)
+    assert isinstance(db, InstrumentedDatabase)
+    db.event_bus = "bus"
+    assert db.db.event_bus == "bus"
+
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware, timing_headers=True)
+
+    @app.get("/test/db-calls/{count}")
+    async def db_calls(count: int):
+        for _ in range(count):
+            await db.list_organizations()
+        return "OK"
+
+    with TestClient(app) as client:
+        response = client.get("/test/db-calls/3")
+    response.raise_for_status()
+    assert response.headers["X-DB-Calls"] == "3"
+    assert response.headers["Server-Timing"].startswith("db;dur=")
+    assert ';desc="3 calls"' in response.headers["Server-Timing"]
+
+    text = render_text()
+    assert 'db_calls_total{method="list_organizations"} ' in text
+    labels = 'method="GET",route="/test/db-calls/{count}"'
+    assert f"http_request_db_calls_sum{{{labels}}} 3.0" in text
+
+
+def test_dependency_timing():
+    def dependency_sync() -> Text:
+        return "sync"
+
+    async def dependency_async(value: Text = Depends(dependency_sync)) -> Text:
+        return value
+
+    assert timed_dependency(dependency_sync, enabled=False) is dependency_sync
+    timed_sync = timed_dependency(dependency_sync, name="timed_sync", enabled=True)
+    timed_async = timed_dependency(dependency_async, name="timed_async", enabled=True)
+
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware, timing_headers=True)
+
+    @app.get("/test/dependencies")
+    async def dependencies(
+        value: Text = Depends(timed_async), other: Text = Depends(timed_sync)
+    ):
+        return value
+
+    with TestClient(app) as client:
+        response = client.get("/test/dependencies")
+    assert response.json() == "sync"
+    server_timing = response.headers["Server-Timing"].split(", ")
+    assert {m.split(";")[0] for m in server_timing} == {
+        "db",
+        "timed_sync",
+        "timed_async",
+        "total",
+    }
+
+    text = render_text()
+    assert 'dependency_duration_seconds_count{dependency="timed_sync"} 1' in text
+    assert 'dependency_duration_seconds_count{dependency="timed_async"} 1' in text
+
+
+def block_the_loop(seconds: float) -> None:
+    time.sleep(seconds)
+
+
+@pytest.mark.asyncio
+async def test_loop_monitor_logs_blocking_stack(caplog: pytest.LogCaptureFixture):
+    blocked = EVENT_LOOP_BLOCKED.value
+    monitor = LoopMonitor()
+    monitor.start(interval=0.01, threshold=0.05, log_interval=60)
+    try:
+        await asyncio.sleep(0.05)
+        lag_count = EVENT_LOOP_LAG.count
+        with caplog.at_level(logging.WARNING, logger=settings.app_name):
+            block_the_loop(0.3)
+            await asyncio.sleep(0.05)
+            # A second stall within the log interval is counted, not logged
+            block_the_loop(0.3)
+            await asyncio.sleep(0.05)
+    finally:
+        await monitor.stop()
+
+    messages = [
+        r.getMessage() for r in caplog.records if "Event loop blocked" in r.getMessage()
+    ]
+    assert len(messages) == 1
+    assert "in block_the_loop" in messages[0]
+    assert EVENT_LOOP_BLOCKED.value >= blocked + 2
+    assert EVENT_LOOP_LAG.count > lag_count
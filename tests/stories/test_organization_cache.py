@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+import uuid_utils as uuid
+from faker import Faker
+from fastapi.testclient import TestClient
+
+from fastapi_chat.config import settings
+from fastapi_chat.db._instrumented import DB_CALLS
+from fastapi_chat.db._memory import DatabaseMemory
+from fastapi_chat.db.organizations import get_organization_cache, retrieve_organization
+from fastapi_chat.schemas.organizations import Organization
+from tests.utils import LoginData, login
+
+fake = Faker()
+
+
+@pytest.mark.asyncio
+async def test_cached_organization_follows_updates_and_deletes(
+    client: TestClient, user_super_admin: LoginData
+):
+    token = login(client, **user_super_admin.model_dump())
+    response = client.post(
+        "/organizations", json={"name": fake.company()}, headers=token.to_headers()
+    )
+    response.raise_for_status()
+    org_id = Organization.model_validate(response.json()).id
+    url = f"/organizations/{org_id}"
+    client.get(url, headers=token.to_headers()).raise_for_status()
+    assert get_organization_cache(client.app.state.db).get(org_id) is not None
+
+    # Updates replace the cached organization
+    response = client.put(url, json={"name": "Renamed"}, headers=token.to_headers())
+    response.raise_for_status()
+    response = client.get(url, headers=token.to_headers())
+    assert Organization.model_validate(response.json()).name == "Renamed"
+
+    # Deletes are seen at once, not when the cache expires
+    response = client.delete(url, headers=token.to_headers())
+    response.raise_for_status()
+    response = client.get(url, headers=token.to_headers())
+    assert Organization.model_validate(response.json()).disabled is True
+
+
+@pytest.mark.asyncio
+async def test_missing_organization_is_negatively_cached(
+    client: TestClient, user_super_admin: LoginData
+):
+    token = login(client, **user_super_admin.model_dump())
+    retrievals = DB_CALLS.labels("retrieve_organization")
+    calls = retrievals.value
+
+    # Repeated lookups of a missing organization reach the database once
+    url = f"/organizations/{uuid.uuid7()}"
+    for _ in range(3):
+        assert client.get(url, headers=token.to_headers()).status_code == 404
+    assert retrievals.value == calls + 1
+
+
+@pytest.mark.asyncio
+async def test_negative_cache_entry_expires(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(settings, "ORG_CACHE_NEGATIVE_TTL_SECONDS", 0.05)
+    db = DatabaseMemory()
+    org_id = str(uuid.uuid7())
+    assert await retrieve_organization(db, organization_id=org_id) is None
+    assert get_organization_cache(db).is_missing(org_id)
+
+    await asyncio.sleep(0.1)
+    assert not get_organization_cache(db).is_missing(org_id)